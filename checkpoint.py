@@ -0,0 +1,206 @@
+"""
+Checkpoint and resume support for long conversions.
+This module periodically persists the finished part of the mesh next to the output so that an interrupted run can continue from the last consistent checkpoint.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+from shp2obj import build_mesh
+
+# Number of footprints extruded between two checks of the checkpoint timer
+BLOCK_SIZE = 256
+
+class Checkpoint:
+    """
+    Incremental checkpoint of an extruded mesh in a directory next to the output.
+
+    Every checkpoint appends only the mesh built since the previous one as a
+    new ``.npz`` part, then atomically replaces ``state.json``, which lists the
+    consistent parts. Parts not listed in the state are ignored on resume.
+    """
+
+    def __init__(self, directory, signature, interval=60.0, max_overhead=0.05):
+        """
+        Args:
+            directory (str): Checkpoint directory
+            signature (str): Hash of the input and settings the mesh was built from
+            interval (float): Minimum number of seconds between checkpoints (default: 60)
+            max_overhead (float): Maximum fraction of the run time spent writing
+                                  checkpoints; the interval grows when writes are slow (default: 0.05)
+        """
+        self.directory = directory
+        self.signature = signature
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.parts = []
+        self.completed = 0
+        self.write_seconds = 0.0
+        self.last_time = time.perf_counter()
+
+    def load(self):
+        """
+        Load the parts of a previous run with the same signature.
+
+        Returns:
+            tuple: (list of parts as (positions, faces, ranges), number of completed footprints)
+        """
+        state_path = os.path.join(self.directory, 'state.json')
+        if not os.path.exists(state_path):
+            return [], 0
+        with open(state_path) as f:
+            state = json.load(f)
+        if state['signature'] != self.signature:
+            raise ValueError(f'Checkpoint in {self.directory} was made from a different input or settings')
+
+        parts = []
+        for part in state['parts']:
+            with np.load(os.path.join(self.directory, part)) as data:
+                parts.append((data['positions'], data['faces'], data['ranges']))
+        self.parts = list(state['parts'])
+        self.completed = state['completed']
+        return parts, self.completed
+
+    def due(self):
+        """
+        Check whether enough time has passed since the last checkpoint.
+
+        Returns:
+            bool: Whether the next checkpoint should be written now
+        """
+        return time.perf_counter() - self.last_time >= self.interval
+
+    def save(self, positions, faces, ranges, completed):
+        """
+        Persist the mesh built since the last checkpoint.
+
+        Args:
+            positions (list): Vertex positions built since the last checkpoint
+            faces (list): 1-based faces of those vertices
+            ranges (numpy.ndarray): Per-feature ranges relative to those vertices and faces
+            completed (int): Total number of footprints finished so far
+        """
+        start = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+
+        part = f'part-{len(self.parts):05d}.npz'
+        np.savez(
+            os.path.join(self.directory, part),
+            positions=np.asarray(positions, dtype=np.float64).reshape(-1, 3),
+            faces=np.asarray(faces, dtype=np.int64).reshape(-1, 3),
+            ranges=np.asarray(ranges, dtype=np.int64).reshape(-1, 4),
+        )
+
+        # The state is replaced atomically, so it always describes complete parts
+        state = {'signature': self.signature, 'parts': self.parts + [part], 'completed': completed}
+        state_path = os.path.join(self.directory, 'state.json')
+        with open(state_path + '.tmp', 'w') as f:
+            json.dump(state, f)
+        os.replace(state_path + '.tmp', state_path)
+        self.parts.append(part)
+        self.completed = completed
+
+        # Stretch the interval when writing takes more than the allowed share of the time
+        seconds = time.perf_counter() - start
+        self.write_seconds += seconds
+        self.interval = max(self.interval, seconds / self.max_overhead)
+        self.last_time = time.perf_counter()
+
+    def remove(self):
+        """
+        Delete the checkpoint directory after the outputs were written.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def checkpoint_signature(shp_path, indices, inputs=(), **settings):
+    """
+    Identify the input files, the selected footprints and the build settings.
+
+    Args:
+        shp_path (str): Path to the input footprints
+        indices (numpy.ndarray): Polygon indices extruded in order
+        inputs (iterable): Further input files that change the mesh, such as a DEM
+                           or a point cloud; None entries are skipped (default: none)
+        **settings: Build settings that change the mesh
+
+    Returns:
+        str: Hex digest
+    """
+    # A file changed at the same path has a different size or modification time
+    files = []
+    for path in (shp_path, *inputs):
+        if path is not None:
+            stat = os.stat(path)
+            files.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    digest = hashlib.sha256()
+    digest.update(json.dumps([files, settings], sort_keys=True, default=str).encode())
+    digest.update(np.ascontiguousarray(indices, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+def build_mesh_checkpointed(footprints, shp_center, building_height, indices, culling, checkpoint, resume=False):
+    """
+    Extrude footprints like ``build_mesh`` while writing periodic checkpoints.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        shp_center (numpy.ndarray): Global center used for coordinate normalization
+        building_height (float): Default building height in meters
+        indices (numpy.ndarray): Polygon indices to extrude, in order
+        culling (dict, optional): Hidden walls from ``cull.find_hidden_walls``
+        checkpoint (Checkpoint): Checkpoint to write to
+        resume (bool): Whether to continue from the parts of a previous run (default: False)
+
+    Returns:
+        tuple: (positions, faces, ranges) as returned by ``build_mesh``
+    """
+    parts, completed = checkpoint.load() if resume else ([], 0)
+    if completed:
+        print(f'Resuming after {completed} of {len(indices)} footprints')
+
+    # Mesh built since the last checkpoint
+    pending = []
+    pending_start = completed
+    for start in range(completed, len(indices), BLOCK_SIZE):
+        end = min(start + BLOCK_SIZE, len(indices))
+        pending.append(build_mesh(footprints, shp_center, building_height, indices[start:end], culling))
+        if checkpoint.due() and end < len(indices):
+            part = concatenate_meshes(pending)
+            checkpoint.save(*part, end)
+            parts.append(part)
+            pending = []
+            pending_start = end
+
+    if pending_start < len(indices):
+        parts.append(concatenate_meshes(pending))
+    if checkpoint.write_seconds:
+        print(f'Checkpoints: {len(checkpoint.parts)} parts, {checkpoint.write_seconds:.2f} s spent writing')
+
+    positions, faces, ranges = concatenate_meshes(parts)
+    return positions.tolist(), faces.tolist(), ranges
+
+def concatenate_meshes(meshes):
+    """
+    Concatenate meshes given as (positions, 1-based faces, ranges) tuples.
+
+    Args:
+        meshes (list): Meshes to concatenate in order
+
+    Returns:
+        tuple: (positions array, 1-based faces array, ranges array)
+    """
+    positions, faces, ranges = [np.zeros((0, 3))], [np.zeros((0, 3), dtype=np.int64)], [np.zeros((0, 4), dtype=np.int64)]
+    vertex_offset = 0
+    face_offset = 0
+    for mesh_positions, mesh_faces, mesh_ranges in meshes:
+        mesh_positions = np.asarray(mesh_positions, dtype=np.float64).reshape(-1, 3)
+        mesh_faces = np.asarray(mesh_faces, dtype=np.int64).reshape(-1, 3)
+        positions.append(mesh_positions)
+        faces.append(mesh_faces + vertex_offset)
+        ranges.append(np.asarray(mesh_ranges, dtype=np.int64).reshape(-1, 4)
+                      + [vertex_offset, vertex_offset, face_offset, face_offset])
+        vertex_offset += len(mesh_positions)
+        face_offset += len(mesh_faces)
+    return np.concatenate(positions), np.concatenate(faces), np.concatenate(ranges)
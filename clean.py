@@ -0,0 +1,108 @@
+"""
+Geometry cleanup before triangulation and degenerate triangle filtering after it.
+This module removes duplicate, collinear and spike vertices and repairs invalid rings of all footprints at once with Shapely 2 ufuncs, and drops zero-area triangles of a finished mesh in one vectorized step.
+"""
+
+import numpy as np
+import shapely
+from ingest import make_footprints
+
+# Distance in coordinate units (degrees) below which vertices are duplicates or collinear (about 0.1 mm)
+CLEAN_TOLERANCE = 1e-9
+
+# Triangles with a smaller area in square meters are degenerate
+MIN_TRIANGLE_AREA = 1e-8
+
+def clean_footprints(footprints, tolerance=CLEAN_TOLERANCE):
+    """
+    Remove redundant vertices and repair invalid rings of all footprints.
+
+    Repeated consecutive vertices are removed first. Invalid polygons
+    (self-intersections, spikes) are repaired with the 'structure' method of
+    ``make_valid``, which drops collapsed spikes instead of keeping them as
+    lines; a repaired polygon may split into several parts, which keep the
+    feature ID and height of their source. Finally collinear runs are
+    simplified away while preserving the topology. The total bounds are kept,
+    so the global center does not move.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        tolerance (float): Distance in coordinate units below which vertices
+                           are merged or dropped as collinear (default: 1e-9)
+
+    Returns:
+        tuple: (cleaned footprint buffers, statistics with 'vertices_removed' (net of
+               intersection points added by repairs), 'polygons_repaired' and 'polygons_dropped')
+    """
+    num_polygons = len(footprints['feature_ids'])
+    if num_polygons == 0:
+        return footprints, {'vertices_removed': 0, 'polygons_repaired': 0, 'polygons_dropped': 0}
+
+    polygons = shapely.from_ragged_array(shapely.GeometryType.POLYGON, footprints['coords'],
+                                         (footprints['ring_offsets'], footprints['polygon_offsets']))
+    num_coords = int(shapely.get_num_coordinates(polygons).sum())
+
+    # Duplicate consecutive vertices
+    polygons = shapely.remove_repeated_points(polygons, tolerance)
+
+    # Self-intersections and spikes
+    invalid = ~shapely.is_valid(polygons)
+    if invalid.any():
+        polygons[invalid] = shapely.make_valid(polygons[invalid], method='structure', keep_collapsed=False)
+
+    # Collinear runs
+    polygons = shapely.simplify(polygons, tolerance, preserve_topology=True)
+
+    # Repaired polygons may have become multipolygons or empty
+    parts, sources = shapely.get_parts(polygons, return_index=True)
+    keep = (shapely.get_type_id(parts) == shapely.GeometryType.POLYGON) & ~shapely.is_empty(parts)
+    parts, sources = parts[keep], sources[keep]
+
+    if len(parts):
+        _, coords, (ring_offsets, polygon_offsets) = shapely.to_ragged_array(parts)
+    else:
+        coords, ring_offsets, polygon_offsets = np.zeros((0, 2)), np.zeros(1), np.zeros(1)
+    cleaned = make_footprints(coords, ring_offsets, polygon_offsets, footprints['feature_ids'][sources])
+    cleaned['heights'] = footprints['heights'][sources] if footprints['heights'] is not None else None
+    cleaned['bounds'] = footprints['bounds']
+
+    stats = {
+        'vertices_removed': num_coords - len(coords),
+        'polygons_repaired': int(invalid.sum()),
+        'polygons_dropped': int(num_polygons - len(np.unique(sources))),
+    }
+    return cleaned, stats
+
+def drop_degenerate_faces(positions, faces, ranges, min_area=MIN_TRIANGLE_AREA):
+    """
+    Drop triangles with (almost) zero area and update the per-feature ranges.
+
+    Zero-area triangles have no defined normal, so ``normal.normalized``
+    would turn them into NaN. Vertices are left in place, and the inputs are
+    returned unchanged when nothing is dropped.
+
+    Args:
+        positions (list): Vertex positions
+        faces (list): 1-based faces
+        ranges (numpy.ndarray): Per-feature [vertex_start, vertex_end, face_start, face_end] rows
+        min_area (float): Smallest area kept in square meters (default: 1e-8)
+
+    Returns:
+        tuple: (1-based faces, ranges, number of dropped triangles)
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    indices = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+
+    p1, p2, p3 = (positions[indices[:, k] - 1] for k in range(3))
+    kept = np.linalg.norm(np.cross(p2 - p1, p3 - p1), axis=1) / 2 >= min_area
+    if kept.all():
+        return faces, ranges, 0
+    ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 4)
+
+    # Every feature's faces shrink by its dropped triangles
+    face_features = np.repeat(np.arange(len(ranges)), ranges[:, 3] - ranges[:, 2])
+    face_ends = np.cumsum(np.bincount(face_features[kept], minlength=len(ranges)))
+    ranges = ranges.copy()
+    ranges[:, 2] = np.concatenate([[0], face_ends[:-1]])
+    ranges[:, 3] = face_ends
+    return indices[kept], ranges, int((~kept).sum())
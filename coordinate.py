@@ -59,4 +59,41 @@ def calculate_coordinate(targe_coordinate, center_coordinate):
     # This aligns the coordinate system with standard 3D modeling conventions
     point = rotate_2d(np.array([dist_y, -dist_x]), -90)
 
-    return point
\ No newline at end of file
+    return point
+
+def polygon_centroid(rings):
+    """
+    Calculate the area centroid of a polygon given as coordinate rings.
+    
+    This matches the centroid of a Shapely Polygon: the signed shoelace areas
+    of the exterior ring and its holes are combined so that holes are removed
+    from the area.
+    
+    Args:
+        rings (list): Ring coordinate arrays without the closing point, exterior first
+    
+    Returns:
+        numpy.ndarray: Centroid coordinates (longitude, latitude)
+    """
+    total_area = 0.0
+    moment = np.zeros(2)
+
+    for index, ring in enumerate(rings):
+        # Shift the ring near the origin to keep the shoelace sums precise
+        origin = ring[0]
+        local = ring - origin
+        following = np.roll(local, -1, axis=0)
+        cross = local[:, 0] * following[:, 1] - following[:, 0] * local[:, 1]
+        area = cross.sum() / 2
+        if area == 0:
+            continue
+        centroid = ((local + following) * cross[:, None]).sum(axis=0) / (6 * area) + origin
+
+        # Exterior ring adds area, holes subtract it regardless of their orientation
+        weight = abs(area) if index == 0 else -abs(area)
+        total_area += weight
+        moment += weight * centroid
+
+    if total_area == 0:
+        return rings[0].mean(axis=0)
+    return moment / total_area
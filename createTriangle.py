@@ -57,12 +57,6 @@ def polygon_to_triangle_normal(polygon):
     """
     Triangulate a simple polygon without holes using the triangle library.
     
-    This function converts a Shapely polygon to a triangular mesh by:
-    1. Extracting exterior coordinates
-    2. Defining boundary constraints
-    3. Performing constrained triangulation
-    4. Visualizing the result
-    
     Args:
         polygon (shapely.geometry.Polygon): Input polygon geometry
     
@@ -70,39 +64,53 @@ def polygon_to_triangle_normal(polygon):
         dict: Triangulation result containing vertices, triangles, and edges
     """
     # Convert Shapely polygon to triangle library format
-    coord_list = np.array(polygon.exterior.coords[:-1])
-
-    # Define boundary constraints for triangulation
-    edges = []
-    for i in range(len(coord_list) - 1):
-        edges.append([i, i + 1])
-    # Close the boundary
-    edges.append([len(coord_list) - 1, 0])
+    return ring_to_triangle_normal(np.array(polygon.exterior.coords[:-1]))
 
-    # Convert boundary constraints to numpy array
-    edges = np.array(edges)
+def polygon_to_triangle_hole(polygon, interiors):
+    """
+    Triangulate a polygon with holes using the triangle library.
+    
+    Args:
+        polygon (shapely.geometry.Polygon): Input polygon geometry
+        interiors (list): List of interior LinearRing objects representing holes
+    
+    Returns:
+        dict: Triangulation result containing vertices, triangles, and edges
+    """
+    # Convert Shapely rings to triangle library format
+    holes = [np.array(interior.coords[:-1]) for interior in interiors if isinstance(interior, LinearRing)]
+    return rings_to_triangle_hole(np.array(polygon.exterior.coords[:-1]), holes)
 
-    # Define triangulation constraints
-    constraints = {'segments': edges}
+def ring_to_triangle_normal(coord_list):
+    """
+    Triangulate a simple polygon ring without holes using the triangle library.
+    
+    This function converts a polygon ring to a triangular mesh by:
+    1. Defining boundary constraints from consecutive ring vertices
+    2. Performing constrained triangulation
+    
+    Args:
+        coord_list (numpy.ndarray): Exterior ring coordinates without the closing point
+    
+    Returns:
+        dict: Triangulation result containing vertices, triangles, and edges
+    """
+    # Define boundary constraints for triangulation, closing the boundary
+    edges = ring_segments(len(coord_list), 0)
 
     # Perform constrained triangulation with edge preservation
-    triangulation = tr.triangulate({'vertices': coord_list, 'segments': constraints['segments']}, '-pe')
+    triangulation = tr.triangulate({'vertices': coord_list, 'segments': edges}, '-pe')
 
-    # Extract triangulation results
-    # triangles = triangulation['triangles']
-    # vertices = triangulation['vertices']
-    # edges = triangulation['edges']
-    
     # Visualize the triangulation result
     # plt.figure(num='triangle库效果')
-    # draw_delaunay_from_triangle(edges, vertices)
+    # draw_delaunay_from_triangle(triangulation['edges'], triangulation['vertices'])
     # plt.show()
 
     return triangulation
 
-def polygon_to_triangle_hole(polygon, interiors):
+def rings_to_triangle_hole(coord_list, holes):
     """
-    Triangulate a polygon with holes using the triangle library.
+    Triangulate a polygon ring with holes using the triangle library.
     
     This function handles complex polygons with interior holes by:
     1. Processing exterior boundary
@@ -111,66 +119,74 @@ def polygon_to_triangle_hole(polygon, interiors):
     4. Performing constrained triangulation with hole specification
     
     Args:
-        polygon (shapely.geometry.Polygon): Input polygon geometry
-        interiors (list): List of interior LinearRing objects representing holes
+        coord_list (numpy.ndarray): Exterior ring coordinates without the closing point
+        holes (list): Interior ring coordinate arrays without the closing point
     
     Returns:
         dict: Triangulation result containing vertices, triangles, and edges
     """
-    # Convert Shapely polygon to triangle library format
-    coord_list = np.array(polygon.exterior.coords[:-1])
-
     # Define exterior boundary constraints
-    edges = []
-    index = 0
-    for i in range(len(coord_list) - 1):
-        edges.append([i, i + 1])
-        index = i + 1
-    # Close the exterior boundary
-    edges.append([len(coord_list) - 1, 0])
+    segments = [ring_segments(len(coord_list), 0)]
+    index = len(coord_list)
 
     # Process interior holes
-    hole_edges = []
-    hole_points = None
     center_list = []
+    for hole_points in holes:
+        # Calculate hole center for triangle library
+        center_list.append(ring_centroid(hole_points))
 
-    coord_list = coord_list.tolist()
-
-    for interior in interiors:
-        if isinstance(interior, LinearRing):
-            # Calculate hole center for triangle library
-            center = interior.centroid.coords[0]
-            center_list.append(center)
-            hole_points = interior.coords[:-1]
-
-        index = index + 1
         # Define interior boundary constraints
-        for i in range(len(hole_points) - 1):
-            hole_edges.append([i + index, i + index + 1])
-
-        # Close the interior boundary
-        hole_edges.append([len(hole_points) - 1 + index, index])
-        coord_list = coord_list + hole_points
-        index += len(hole_points) - 1
+        segments.append(ring_segments(len(hole_points), index))
+        index += len(hole_points)
 
     # Define triangulation constraints including both exterior and interior edges
-    constraints = {'segments': edges + hole_edges}
+    vertices = np.concatenate([coord_list] + list(holes))
+    segments = np.concatenate(segments)
 
     # Perform constrained triangulation with hole specification
-    triangulation = tr.triangulate({'vertices': coord_list, 'segments': constraints['segments'], 'holes': center_list }, '-pe')
-    
-    # Extract triangulation results
-    # triangles = triangulation['triangles']
-    # vertices = triangulation['vertices']
-    # edges = triangulation['edges']
-    
+    triangulation = tr.triangulate({'vertices': vertices, 'segments': segments, 'holes': center_list}, '-pe')
+
     # Visualize the triangulation result
     # plt.figure(num='triangle库效果')
-    # draw_delaunay_from_triangle(edges, vertices)
+    # draw_delaunay_from_triangle(triangulation['edges'], triangulation['vertices'])
     # plt.show()
-    
+
     return triangulation
 
+def ring_segments(count, start):
+    """
+    Build the closed boundary segments of a ring for constrained triangulation.
+    
+    Args:
+        count (int): Number of ring vertices
+        start (int): Index of the first ring vertex in the vertex list
+    
+    Returns:
+        numpy.ndarray: Segment vertex index pairs with shape (count, 2)
+    """
+    first = np.arange(count) + start
+    return np.column_stack([first, np.roll(first, -1)])
+
+def ring_centroid(ring):
+    """
+    Calculate the centroid of a ring treated as a closed line.
+    
+    This matches the centroid of a Shapely LinearRing: the length-weighted
+    mean of the segment midpoints.
+    
+    Args:
+        ring (numpy.ndarray): Ring coordinates without the closing point
+    
+    Returns:
+        tuple: Centroid coordinates (x, y)
+    """
+    following = np.roll(ring, -1, axis=0)
+    lengths = np.linalg.norm(following - ring, axis=1)
+    midpoints = (ring + following) / 2
+    if lengths.sum() == 0:
+        return tuple(ring.mean(axis=0))
+    return tuple((midpoints * lengths[:, None]).sum(axis=0) / lengths.sum())
+
 # Example usage and testing code (commented out)
 # # Regular square
 # if __name__ == '__main__':
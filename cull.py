@@ -0,0 +1,110 @@
+"""
+Hidden-surface culling for extruded building meshes.
+This module finds wall segments shared by adjacent footprints so that walls buried between neighbouring buildings can be dropped or trimmed.
+"""
+
+import numpy as np
+import shapely
+
+def find_hidden_walls(footprints, building_height=3, tolerance=1e-7):
+    """
+    Find the visible parts of footprint walls that touch neighbouring buildings.
+
+    Every ring segment becomes a wall. A wall is hidden where a segment of a
+    different footprint lies on it (within ``tolerance``) and that neighbour
+    reaches at least as high and starts at most as low. Candidate segment pairs
+    come from an STRtree, and the collinearity and overlap tests are vectorized.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        building_height (float): Default building height in meters (default: 3)
+        tolerance (float): Distance in source coordinate units under which
+                           segments count as coincident (default: 1e-7 degrees, about 1 cm)
+
+    Returns:
+        dict: Culling information with keys
+              'visible' - {segment start coordinate index: list of visible (t0, t1) intervals}
+                          for every partially or fully hidden wall
+              'hidden_walls' - number of walls hidden completely
+              'trimmed_walls' - number of walls hidden partially
+    """
+    coords = footprints['coords']
+    ring_offsets = footprints['ring_offsets']
+    polygon_offsets = footprints['polygon_offsets']
+
+    # Every coordinate except the closing point of a ring starts a segment
+    starts = np.ones(len(coords), dtype=bool)
+    starts[ring_offsets[1:] - 1] = False
+    starts = np.flatnonzero(starts)
+
+    # Polygon index and base/top height of every segment
+    ring_polygons = np.repeat(np.arange(len(polygon_offsets) - 1), np.diff(polygon_offsets))
+    point_rings = np.repeat(np.arange(len(ring_offsets) - 1), np.diff(ring_offsets))
+    segment_polygons = ring_polygons[point_rings[starts]]
+    if footprints['heights'] is not None:
+        base = footprints['heights'][segment_polygons]
+    else:
+        base = np.zeros(len(starts))
+    if footprints.get('extrusions') is not None:
+        top = base + footprints['extrusions'][segment_polygons]
+    else:
+        top = base + building_height
+
+    # Query candidate pairs of nearby segments from a spatial index
+    lines = shapely.linestrings(np.stack([coords[starts], coords[starts + 1]], axis=1))
+    tree = shapely.STRtree(lines)
+    a, b = tree.query(lines, predicate='dwithin', distance=tolerance)
+
+    # Keep pairs of different footprints where the neighbour is not lower
+    keep = (segment_polygons[a] != segment_polygons[b]) & (top[b] >= top[a]) & (base[b] <= base[a])
+    a, b = a[keep], b[keep]
+
+    # Neighbour endpoints must lie on the wall line
+    a0 = coords[starts[a]]
+    direction = coords[starts[a] + 1] - a0
+    length = np.linalg.norm(direction, axis=1)
+    valid = length > 0
+    a, b, a0, direction, length = a[valid], b[valid], a0[valid], direction[valid], length[valid]
+
+    b0 = coords[starts[b]] - a0
+    b1 = coords[starts[b] + 1] - a0
+    distance0 = np.abs(direction[:, 0] * b0[:, 1] - direction[:, 1] * b0[:, 0]) / length
+    distance1 = np.abs(direction[:, 0] * b1[:, 1] - direction[:, 1] * b1[:, 0]) / length
+    collinear = (distance0 <= tolerance) & (distance1 <= tolerance)
+
+    # Covered parameter interval of the wall
+    t0 = np.einsum('ij,ij->i', b0, direction) / length ** 2
+    t1 = np.einsum('ij,ij->i', b1, direction) / length ** 2
+    low = np.clip(np.minimum(t0, t1), 0, 1)
+    high = np.clip(np.maximum(t0, t1), 0, 1)
+    overlapping = collinear & (high - low > tolerance / length)
+
+    a, low, high, length = a[overlapping], low[overlapping], high[overlapping], length[overlapping]
+
+    # Merge the covered intervals of every wall and keep what remains visible
+    visible = {}
+    hidden_walls = 0
+    trimmed_walls = 0
+    order = np.lexsort((low, a))
+    groups = np.flatnonzero(np.diff(a[order], prepend=-1))
+    for group, first in enumerate(groups):
+        last = groups[group + 1] if group + 1 < len(groups) else len(order)
+        rows = order[first:last]
+        gap = tolerance / length[rows[0]]
+
+        intervals = []
+        cursor = 0.0
+        for lo, hi in zip(low[rows], high[rows]):
+            if lo - cursor > gap:
+                intervals.append((cursor, float(lo)))
+            cursor = max(cursor, float(hi))
+        if 1 - cursor > gap:
+            intervals.append((cursor, 1.0))
+
+        visible[int(starts[a[rows[0]]])] = intervals
+        if intervals:
+            trimmed_walls += 1
+        else:
+            hidden_walls += 1
+
+    return {'visible': visible, 'hidden_walls': hidden_walls, 'trimmed_walls': trimmed_walls}
@@ -0,0 +1,129 @@
+"""
+Space-filling curve keys for ordering features spatially.
+This module computes vectorized Morton (Z-order) and Hilbert keys of 2D points and the curve order of footprints by their centers.
+"""
+
+import numpy as np
+
+def quantize(points, bits=16, bounds=None):
+    """
+    Quantize 2D points onto a square integer grid.
+
+    Args:
+        points (numpy.ndarray): Point coordinates with shape (N, 2)
+        bits (int): Quantization bits per axis
+        bounds (numpy.ndarray, optional): [minx, miny, maxx, maxy] of the grid (default: the points' bounds)
+
+    Returns:
+        numpy.ndarray: Grid cell of every point as unsigned integers with shape (N, 2)
+    """
+    if bounds is None:
+        low = points.min(axis=0)
+        extent = (points.max(axis=0) - low).max()
+    else:
+        low = np.asarray(bounds[:2], dtype=np.float64)
+        extent = (np.asarray(bounds[2:], dtype=np.float64) - low).max()
+    scale = (2 ** bits - 1) / extent if extent > 0 else 0
+    return np.clip((points - low) * scale, 0, 2 ** bits - 1).astype(np.uint64)
+
+def morton_keys(points, bits=16, bounds=None):
+    """
+    Calculate Morton (Z-order) keys of 2D points.
+
+    Args:
+        points (numpy.ndarray): Point coordinates with shape (N, 2)
+        bits (int): Quantization bits per axis (default: 16)
+        bounds (numpy.ndarray, optional): [minx, miny, maxx, maxy] of the grid (default: the points' bounds)
+
+    Returns:
+        numpy.ndarray: Morton key of every point
+    """
+    # Quantize both axes onto the same integer grid
+    grid = quantize(points, bits, bounds)
+
+    # Interleave the bits of x and y
+    keys = np.zeros(len(points), dtype=np.uint64)
+    for bit in range(bits):
+        keys |= ((grid[:, 0] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit)
+        keys |= ((grid[:, 1] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit + 1)
+
+    return keys
+
+def hilbert_keys(points, bits=16, bounds=None):
+    """
+    Calculate Hilbert curve keys of 2D points.
+
+    Unlike the Morton curve, consecutive Hilbert keys are always neighbouring
+    cells, so runs of features in key order never jump across the map.
+
+    Args:
+        points (numpy.ndarray): Point coordinates with shape (N, 2)
+        bits (int): Quantization bits per axis (default: 16)
+        bounds (numpy.ndarray, optional): [minx, miny, maxx, maxy] of the grid (default: the points' bounds)
+
+    Returns:
+        numpy.ndarray: Hilbert key of every point
+    """
+    grid = quantize(points, bits, bounds).astype(np.int64)
+    x, y = grid[:, 0].copy(), grid[:, 1].copy()
+    n = 2 ** bits
+
+    # Walk the quadrants from the coarsest level, rotating each into the base orientation
+    keys = np.zeros(len(points), dtype=np.uint64)
+    s = n // 2
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        keys += np.uint64(s) * np.uint64(s) * ((3 * rx.astype(np.uint64)) ^ ry.astype(np.uint64))
+
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s //= 2
+
+    return keys
+
+def footprint_centers(footprints):
+    """
+    Calculate the bounding box center of every footprint's exterior ring.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+
+    Returns:
+        numpy.ndarray: Centers with shape (N, 2)
+    """
+    if len(footprints['feature_ids']) == 0:
+        return np.zeros((0, 2))
+
+    coords = footprints['coords']
+    ring_starts = footprints['ring_offsets'][:-1]
+    exteriors = footprints['polygon_offsets'][:-1]
+    low = np.minimum.reduceat(coords, ring_starts)[exteriors]
+    high = np.maximum.reduceat(coords, ring_starts)[exteriors]
+    return (low + high) / 2
+
+def curve_order(footprints, curve='hilbert', indices=None):
+    """
+    Order footprints along a space-filling curve over the total bounds.
+
+    Args:
+        footprints (dict): Footprint buffers
+        curve (str): 'hilbert' or 'morton' (default: 'hilbert')
+        indices (numpy.ndarray, optional): Polygon indices to order (default: all)
+
+    Returns:
+        numpy.ndarray: The polygon indices in curve order
+    """
+    if curve not in ('hilbert', 'morton'):
+        raise ValueError(f'Unknown curve "{curve}", expected "hilbert" or "morton"')
+    if indices is None:
+        indices = np.arange(len(footprints['feature_ids']))
+    indices = np.asarray(indices, dtype=np.int64)
+    if len(indices) == 0:
+        return indices
+
+    keys = (hilbert_keys if curve == 'hilbert' else morton_keys)(footprint_centers(footprints)[indices],
+                                                                   bounds=footprints['bounds'])
+    return indices[np.argsort(keys, kind='stable')]
@@ -0,0 +1,435 @@
+"""
+Terrain sampling from local GeoTIFF digital elevation models (DEM).
+This module reads DEM blocks through a memory map with an LRU block cache and samples many points in one vectorized call, so large rasters never have to be loaded into RAM.
+"""
+
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+import numpy as np
+
+# TIFF tags used by the reader
+TAG_WIDTH = 256
+TAG_LENGTH = 257
+TAG_BITS_PER_SAMPLE = 258
+TAG_COMPRESSION = 259
+TAG_STRIP_OFFSETS = 273
+TAG_SAMPLES_PER_PIXEL = 277
+TAG_ROWS_PER_STRIP = 278
+TAG_STRIP_BYTE_COUNTS = 279
+TAG_PLANAR_CONFIG = 284
+TAG_PREDICTOR = 317
+TAG_TILE_WIDTH = 322
+TAG_TILE_LENGTH = 323
+TAG_TILE_OFFSETS = 324
+TAG_TILE_BYTE_COUNTS = 325
+TAG_SAMPLE_FORMAT = 339
+TAG_PIXEL_SCALE = 33550
+TAG_TIEPOINT = 33922
+TAG_TRANSFORMATION = 34264
+TAG_GEO_KEY_DIRECTORY = 34735
+TAG_GDAL_NODATA = 42113
+
+# GeoTIFF keys describing the coordinate system
+KEY_MODEL_TYPE = 1024
+KEY_GEOGRAPHIC_TYPE = 2048
+KEY_PROJECTED_TYPE = 3072
+MODEL_GEOGRAPHIC = 2
+
+# Footprints are longitude/latitude on WGS 84, so the DEM must be as well
+EPSG_WGS84 = 4326
+
+# TIFF field types as NumPy dtype codes
+FIELD_TYPES = {1: 'u1', 2: 'S1', 3: 'u2', 4: 'u4', 6: 'i1', 7: 'u1', 8: 'i2', 9: 'i4',
+               11: 'f4', 12: 'f8', 16: 'u8', 17: 'i8', 18: 'u8'}
+
+# Supported compressions: none, LZW and Deflate (Adobe and old-style codes)
+COMPRESSION_NONE = 1
+COMPRESSION_LZW = 5
+COMPRESSION_DEFLATE = (8, 32946)
+
+# Supported predictors: none, horizontal differencing and floating point
+PREDICTOR_NONE = 1
+PREDICTOR_HORIZONTAL = 2
+PREDICTOR_FLOATING_POINT = 3
+
+# LZW control codes and the largest code width
+LZW_CLEAR = 256
+LZW_END = 257
+LZW_MAX_BITS = 12
+
+def open_dem(dem_path, cache_blocks=64):
+    """
+    Open a single-band GeoTIFF DEM for block-wise sampling.
+
+    Only the TIFF directory is parsed; raster blocks are read lazily from a
+    memory map. Uncompressed blocks are used as zero-copy views of the map and
+    LZW or Deflate blocks are decompressed on demand. Decoded blocks are kept
+    in an LRU cache. The DEM must use longitude/latitude on WGS 84 like the
+    footprints; a DEM declaring another coordinate system is rejected.
+
+    Args:
+        dem_path (str): Path to the GeoTIFF file (classic TIFF or BigTIFF)
+        cache_blocks (int): Maximum number of decoded blocks kept in memory (default: 64)
+
+    Returns:
+        dict: DEM description with the memory map, block layout, geotransform and block cache
+    """
+    data = np.memmap(dem_path, dtype=np.uint8, mode='r')
+    order = '<' if bytes(data[:2]) == b'II' else '>'
+    version, = struct.unpack_from(order + 'H', data, 2)
+
+    # Classic TIFF uses 32-bit offsets and BigTIFF 64-bit ones
+    if version == 42:
+        ifd_offset, = struct.unpack_from(order + 'I', data, 4)
+        count_format, entry_size, value_size, offset_format = 'H', 12, 4, 'I'
+    elif version == 43:
+        ifd_offset, = struct.unpack_from(order + 'Q', data, 8)
+        count_format, entry_size, value_size, offset_format = 'Q', 20, 8, 'Q'
+    else:
+        raise ValueError(f'{dem_path} is not a TIFF file')
+
+    # Read the tags of the first image directory
+    tags = {}
+    num_entries, = struct.unpack_from(order + count_format, data, ifd_offset)
+    position = ifd_offset + struct.calcsize(count_format)
+    for _ in range(num_entries):
+        tag, field_type = struct.unpack_from(order + 'HH', data, position)
+        count, = struct.unpack_from(order + offset_format, data, position + 4)
+        value_position = position + 4 + value_size
+        if field_type in FIELD_TYPES:
+            dtype = np.dtype(order + FIELD_TYPES[field_type])
+            if count * dtype.itemsize > value_size:
+                value_position, = struct.unpack_from(order + offset_format, data, value_position)
+            tags[tag] = np.frombuffer(data, dtype=dtype, count=count, offset=value_position)
+        position += entry_size
+
+    def tag_value(tag, default=None):
+        return int(tags[tag][0]) if tag in tags else default
+
+    compression = tag_value(TAG_COMPRESSION, COMPRESSION_NONE)
+    if compression not in (COMPRESSION_NONE, COMPRESSION_LZW) + COMPRESSION_DEFLATE:
+        raise ValueError(f'Unsupported TIFF compression {compression}; use uncompressed, LZW or Deflate tiles')
+    predictor = tag_value(TAG_PREDICTOR, PREDICTOR_NONE)
+    if predictor not in (PREDICTOR_NONE, PREDICTOR_HORIZONTAL, PREDICTOR_FLOATING_POINT):
+        raise ValueError(f'Unsupported TIFF predictor {predictor}')
+
+    # Heights sampled in another coordinate system would land on the wrong buildings
+    if TAG_GEO_KEY_DIRECTORY in tags:
+        check_crs(dem_path, geo_keys(tags[TAG_GEO_KEY_DIRECTORY]))
+
+    # Pixel data type of the first band
+    bits = tag_value(TAG_BITS_PER_SAMPLE, 8)
+    sample_format = {1: 'u', 2: 'i', 3: 'f'}[tag_value(TAG_SAMPLE_FORMAT, 1)]
+    dtype = np.dtype(order + sample_format + str(bits // 8))
+
+    width = tag_value(TAG_WIDTH)
+    height = tag_value(TAG_LENGTH)
+
+    # Tiled images have fixed-size tiles; striped images have full-width strips
+    if TAG_TILE_OFFSETS in tags:
+        block_width = tag_value(TAG_TILE_WIDTH)
+        block_height = tag_value(TAG_TILE_LENGTH)
+        offsets, byte_counts = tags[TAG_TILE_OFFSETS], tags[TAG_TILE_BYTE_COUNTS]
+    else:
+        block_width = width
+        block_height = min(tag_value(TAG_ROWS_PER_STRIP, height), height)
+        offsets, byte_counts = tags[TAG_STRIP_OFFSETS], tags[TAG_STRIP_BYTE_COUNTS]
+
+    # Affine geotransform (x = a*col + b*row + c, y = d*col + e*row + f) of pixel corners
+    if TAG_TRANSFORMATION in tags:
+        matrix = tags[TAG_TRANSFORMATION].astype(np.float64)
+        transform = (matrix[0], matrix[1], matrix[3], matrix[4], matrix[5], matrix[7])
+    else:
+        scale = tags[TAG_PIXEL_SCALE].astype(np.float64)
+        tiepoint = tags[TAG_TIEPOINT].astype(np.float64)
+        transform = (scale[0], 0.0, tiepoint[3] - tiepoint[0] * scale[0],
+                     0.0, -scale[1], tiepoint[4] + tiepoint[1] * scale[1])
+
+    nodata = None
+    if TAG_GDAL_NODATA in tags:
+        nodata = float(tags[TAG_GDAL_NODATA].tobytes().split(b'\x00')[0])
+
+    return {
+        'data': data,
+        'dtype': dtype,
+        'width': width,
+        'height': height,
+        'samples': tag_value(TAG_SAMPLES_PER_PIXEL, 1),
+        'planar': tag_value(TAG_PLANAR_CONFIG, 1),
+        'compression': compression,
+        'predictor': predictor,
+        'block_width': block_width,
+        'block_height': block_height,
+        'blocks_across': -(-width // block_width),
+        'offsets': offsets,
+        'byte_counts': byte_counts,
+        'transform': transform,
+        'nodata': nodata,
+        'cache': OrderedDict(),
+        'cache_blocks': cache_blocks,
+        'lock': threading.Lock(),
+    }
+
+def geo_keys(directory):
+    """
+    Read the numeric keys of a GeoTIFF key directory.
+
+    Args:
+        directory (numpy.ndarray): Values of the GeoKeyDirectory tag
+
+    Returns:
+        dict: Value per key ID, for keys stored directly in the directory
+    """
+    entries = np.asarray(directory, dtype=np.int64)[4:4 + 4 * int(directory[3])].reshape(-1, 4)
+    return {int(key): int(value) for key, location, _, value in entries if location == 0}
+
+def check_crs(dem_path, keys):
+    """
+    Reject DEMs whose coordinate system is not longitude/latitude on WGS 84.
+
+    Args:
+        dem_path (str): Path to the GeoTIFF file, for the error message
+        keys (dict): GeoTIFF keys from ``geo_keys``
+    """
+    model = keys.get(KEY_MODEL_TYPE)
+    if model is not None and model != MODEL_GEOGRAPHIC:
+        epsg = keys.get(KEY_PROJECTED_TYPE, 'user-defined')
+        raise ValueError(f'{dem_path} uses projected coordinate system EPSG:{epsg}; the footprints are '
+                         f'longitude/latitude, so reproject the DEM to EPSG:{EPSG_WGS84} first')
+    geographic = keys.get(KEY_GEOGRAPHIC_TYPE)
+    if geographic is not None and geographic != EPSG_WGS84:
+        raise ValueError(f'{dem_path} uses geographic coordinate system EPSG:{geographic}; '
+                         f'reproject the DEM to EPSG:{EPSG_WGS84} first')
+
+def lzw_decode(data):
+    """
+    Decompress a TIFF LZW block.
+
+    Codes are packed most significant bit first and grow from 9 to 12 bits one
+    code early, as written by libtiff.
+
+    Args:
+        data (bytes): Compressed block
+
+    Returns:
+        bytes: Decompressed block
+    """
+    # Padding lets every code be read from three bytes
+    data = data + b'\x00\x00\x00'
+    total_bits = (len(data) - 3) * 8
+    output = bytearray()
+    table = [bytes([value]) for value in range(256)] + [b'', b'']
+    width = 9
+    mask = (1 << width) - 1
+    limit = (1 << width) - 1
+    position = 0
+    previous = None
+    while position + width <= total_bits:
+        byte = position >> 3
+        code = ((data[byte] << 16 | data[byte + 1] << 8 | data[byte + 2]) >> (24 - (position & 7) - width)) & mask
+        position += width
+
+        if code == LZW_END:
+            break
+        if code == LZW_CLEAR:
+            del table[LZW_END + 1:]
+            width, mask, limit = 9, 511, 511
+            previous = None
+            continue
+
+        if previous is None:
+            entry = table[code]
+        else:
+            # A code not yet in the table repeats the previous string plus its first byte
+            entry = table[code] if code < len(table) else previous + previous[:1]
+            table.append(previous + entry[:1])
+            if len(table) >= limit and width < LZW_MAX_BITS:
+                width += 1
+                mask = limit = (1 << width) - 1
+        output += entry
+        previous = entry
+    return bytes(output)
+
+def read_block(dem, block_id):
+    """
+    Read one decoded raster block of the first band through the block cache.
+
+    Args:
+        dem (dict): DEM opened with ``open_dem``
+        block_id (int): Block index in row-major order
+
+    Returns:
+        numpy.ndarray: Block values with shape (block_height, block_width)
+    """
+    cache = dem['cache']
+    with dem['lock']:
+        if block_id in cache:
+            cache.move_to_end(block_id)
+            return cache[block_id]
+
+    offset = int(dem['offsets'][block_id])
+    byte_count = int(dem['byte_counts'][block_id])
+    dtype = dem['dtype']
+    chunky_samples = dem['samples'] if dem['planar'] == 1 else 1
+    row_values = dem['block_width'] * chunky_samples
+
+    # Uncompressed blocks are views of the memory map; LZW and Deflate blocks are decoded
+    raw = dem['data'][offset:offset + byte_count]
+    if dem['compression'] == COMPRESSION_LZW:
+        raw = np.frombuffer(lzw_decode(raw.tobytes()), dtype=np.uint8)
+    elif dem['compression'] != COMPRESSION_NONE:
+        raw = np.frombuffer(zlib.decompress(raw.tobytes()), dtype=np.uint8)
+    rows = len(raw) // (row_values * dtype.itemsize)
+
+    # Undo floating-point prediction: bytes were differenced along the row after
+    # being split into planes from the most to the least significant byte
+    if dem['predictor'] == PREDICTOR_FLOATING_POINT:
+        planes = np.cumsum(np.asarray(raw[:rows * row_values * dtype.itemsize]).reshape(rows, -1), axis=1,
+                           dtype=np.uint8)
+        raw = planes.reshape(rows, dtype.itemsize, row_values).transpose(0, 2, 1).copy()
+        dtype = dtype.newbyteorder('>')
+
+    values = np.frombuffer(raw, dtype=dtype, count=rows * row_values).reshape(rows, dem['block_width'], chunky_samples)
+
+    # Undo horizontal differencing, which works on the integer bit patterns
+    if dem['predictor'] == PREDICTOR_HORIZONTAL:
+        integer = np.dtype(f'u{dtype.itemsize}')
+        values = np.cumsum(values.view(integer.newbyteorder(dtype.byteorder)), axis=1, dtype=integer)
+        values = values.view(dtype.newbyteorder('='))
+
+    block = values[:, :, 0]
+
+    # Short last strips are padded so that every block has the same shape
+    if rows < dem['block_height']:
+        block = np.concatenate([block, np.zeros((dem['block_height'] - rows, block.shape[1]), dtype=dtype)])
+
+    with dem['lock']:
+        cache[block_id] = block
+        while len(cache) > dem['cache_blocks']:
+            cache.popitem(last=False)
+
+    return block
+
+def sample_pixels(dem, rows, cols):
+    """
+    Read the DEM values of many pixels, visiting every touched block once.
+
+    Args:
+        dem (dict): DEM opened with ``open_dem``
+        rows (numpy.ndarray): Pixel row of every sample
+        cols (numpy.ndarray): Pixel column of every sample
+
+    Returns:
+        numpy.ndarray: Pixel values, NaN outside the raster or at nodata pixels
+    """
+    values = np.full(len(rows), np.nan)
+    inside = np.flatnonzero((rows >= 0) & (rows < dem['height']) & (cols >= 0) & (cols < dem['width']))
+    rows, cols = rows[inside], cols[inside]
+
+    # Group the samples by block so each block is fetched once
+    block_ids = (rows // dem['block_height']) * dem['blocks_across'] + cols // dem['block_width']
+    order = np.argsort(block_ids, kind='stable')
+    boundaries = np.flatnonzero(np.diff(block_ids[order])) + 1
+    for group in np.split(order, boundaries):
+        if len(group) == 0:
+            continue
+        block = read_block(dem, int(block_ids[group[0]]))
+        values[inside[group]] = block[rows[group] % dem['block_height'], cols[group] % dem['block_width']]
+
+    if dem['nodata'] is not None:
+        values[values == dem['nodata']] = np.nan
+
+    return values
+
+def sample_dem(dem, x, y):
+    """
+    Sample terrain elevations at many points with bilinear interpolation.
+
+    Args:
+        dem (dict): DEM opened with ``open_dem``
+        x (numpy.ndarray): X (longitude) coordinates of the points
+        y (numpy.ndarray): Y (latitude) coordinates of the points
+
+    Returns:
+        numpy.ndarray: Elevation of every point, NaN where the DEM has no data
+    """
+    # Invert the geotransform to continuous pixel coordinates
+    a, b, c, d, e, f = dem['transform']
+    determinant = a * e - b * d
+    dx = np.asarray(x, dtype=np.float64) - c
+    dy = np.asarray(y, dtype=np.float64) - f
+    col = (e * dx - b * dy) / determinant - 0.5
+    row = (a * dy - d * dx) / determinant - 0.5
+
+    # Interpolate between the four surrounding pixel centers
+    col0 = np.floor(col).astype(np.int64)
+    row0 = np.floor(row).astype(np.int64)
+    tx = col - col0
+    ty = row - row0
+
+    # Clamp to the raster edge so points in the outer half pixel still sample
+    col0 = np.clip(col0, 0, dem['width'] - 1)
+    row0 = np.clip(row0, 0, dem['height'] - 1)
+    col1 = np.clip(col0 + 1, 0, dem['width'] - 1)
+    row1 = np.clip(row0 + 1, 0, dem['height'] - 1)
+
+    outside = (col < -0.5) | (col > dem['width'] - 0.5) | (row < -0.5) | (row > dem['height'] - 0.5)
+    top = sample_pixels(dem, row0, col0) * (1 - tx) + sample_pixels(dem, row0, col1) * tx
+    bottom = sample_pixels(dem, row1, col0) * (1 - tx) + sample_pixels(dem, row1, col1) * tx
+    values = top * (1 - ty) + bottom * ty
+    values[outside] = np.nan
+
+    return values
+
+def terrain_heights(footprints, dem, mode='vertices', chunk_size=1000000):
+    """
+    Calculate the terrain elevation at the base of every footprint.
+
+    In 'vertices' mode every footprint vertex is sampled and the building is
+    placed at the lowest one, so that no corner floats above the terrain. In
+    'centroid' mode only the centroid of each footprint's vertices is sampled.
+    Vertices are sampled in chunks, each in one vectorized call.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        dem (dict): DEM opened with ``open_dem``
+        mode (str): 'vertices' or 'centroid' (default: 'vertices')
+        chunk_size (int): Number of points sampled per call (default: 1,000,000)
+
+    Returns:
+        numpy.ndarray: Base elevation per polygon, 0 where the DEM has no data
+    """
+    coords = footprints['coords']
+    ring_offsets = footprints['ring_offsets']
+    polygon_offsets = footprints['polygon_offsets']
+
+    # Polygon index of every vertex
+    point_rings = np.repeat(np.arange(len(ring_offsets) - 1), np.diff(ring_offsets))
+    ring_polygons = np.repeat(np.arange(len(polygon_offsets) - 1), np.diff(polygon_offsets))
+    point_polygons = ring_polygons[point_rings]
+    num_polygons = len(polygon_offsets) - 1
+
+    if mode == 'centroid':
+        counts = np.bincount(point_polygons, minlength=num_polygons)
+        points = np.column_stack([np.bincount(point_polygons, weights=coords[:, 0], minlength=num_polygons),
+                                  np.bincount(point_polygons, weights=coords[:, 1], minlength=num_polygons)])
+        points /= np.maximum(counts, 1)[:, None]
+        owners = np.arange(num_polygons)
+    elif mode == 'vertices':
+        points = coords
+        owners = point_polygons
+    else:
+        raise ValueError(f'Unknown terrain sampling mode {mode}')
+
+    # Sample chunk by chunk and keep the lowest elevation per polygon
+    heights = np.full(num_polygons, np.inf)
+    for start in range(0, len(points), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        values = sample_dem(dem, points[chunk, 0], points[chunk, 1])
+        valid = ~np.isnan(values)
+        np.minimum.at(heights, owners[chunk][valid], values[valid])
+
+    heights[np.isinf(heights)] = 0
+    return heights
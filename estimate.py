@@ -0,0 +1,506 @@
+"""
+Dry-run cost estimation for conversions.
+This module predicts the mesh size, output sizes, runtime and peak memory of a conversion from the geometry structure of the input and a calibrated local benchmark, without extruding anything.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from importlib import metadata
+import numpy as np
+import pyarrow.parquet as pq
+import pyogrio
+from guard import TIME_BUDGET
+from ingest import read_footprints, iter_footprints
+from shpreader import (POLYGON_TYPES, HEADER_SIZE, RECORD_HEADER_SIZE, read_header, find_sidecar,
+                       read_values)
+
+# Directory of the calibrations written by the benchmark and reused by every dry run
+CALIBRATION_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'shp-transform-obj')
+
+# Libraries whose version changes the measured throughput
+CALIBRATED_PACKAGES = ('numpy', 'shapely', 'triangle', 'pyogrio', 'pyarrow')
+
+# Footprints shipped with the repository, used as the default benchmark input
+BENCHMARK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'building.shp')
+
+# Number of source rows read when the structure cannot be taken from an index
+SAMPLE_ROWS = 10000
+
+# Bytes of the GLB position (float32 x 3) and feature ID (float32) attributes per vertex
+GLB_VERTEX_BYTES = 16
+
+# Bytes of a uint16 triangle in the GLB index buffer
+GLB_FACE_BYTES = 6
+
+def shapefile_counts(shp_path):
+    """
+    Count records, rings and ring vertices of a Shapefile from its index and record headers.
+
+    Only the .shx index and the fixed-size part of every record header are
+    read; coordinates are never touched. Rings after the first one of a record
+    are counted as holes, which holds for building footprints.
+
+    Args:
+        shp_path (str): Path to the .shp file
+
+    Returns:
+        dict: Structure counts (see ``footprint_counts``)
+    """
+    base = os.path.splitext(shp_path)[0]
+    shp = np.memmap(shp_path, dtype=np.uint8, mode='r')
+    header = read_header(shp)
+    if header['shape_type'] not in POLYGON_TYPES:
+        raise ValueError(f'{shp_path} does not contain polygons (shape type {header["shape_type"]})')
+
+    shx = np.memmap(find_sidecar(base, '.shx'), dtype='>i4', mode='r', offset=HEADER_SIZE).reshape(-1, 2)
+    record_starts = shx[:, 0].astype(np.int64) * 2 + RECORD_HEADER_SIZE
+    record_starts = record_starts[np.isin(read_values(shp, record_starts, '<i4'), POLYGON_TYPES)]
+    num_parts = read_values(shp, record_starts + 36, '<i4').astype(np.int64)
+    num_points = read_values(shp, record_starts + 40, '<i4').astype(np.int64)
+
+    # Shapefile rings repeat their first point at the end
+    return {
+        'features': len(record_starts),
+        'polygons': len(record_starts),
+        'rings': int(num_parts.sum()),
+        'ring_vertices': int((num_points - num_parts).sum()),
+        'sampled': False,
+    }
+
+def footprint_counts(footprints):
+    """
+    Count the polygons, rings and ring vertices of footprint buffers.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+
+    Returns:
+        dict: 'features', 'polygons', 'rings', 'ring_vertices' (closing points excluded) and 'sampled'
+    """
+    num_rings = len(footprints['ring_offsets']) - 1
+    return {
+        'features': len(np.unique(footprints['feature_ids'])),
+        'polygons': len(footprints['feature_ids']),
+        'rings': num_rings,
+        'ring_vertices': len(footprints['coords']) - num_rings,
+        'sampled': False,
+    }
+
+def sample_counts(path, sample=SAMPLE_ROWS):
+    """
+    Estimate the structure counts of a file from its first rows.
+
+    Args:
+        path (str): Path to a .parquet/.geoparquet, .fgb, .shp or .zip/.shp.zip file
+        sample (int): Number of source rows to read (default: 10000)
+
+    Returns:
+        dict: Structure counts scaled to all rows of the file
+    """
+    lower = str(path).lower()
+    if lower.endswith('.parquet') or lower.endswith('.geoparquet'):
+        total = pq.ParquetFile(path).metadata.num_rows
+    else:
+        total = pyogrio.read_info(path, force_feature_count=True)['features']
+
+    batch = next(iter_footprints(path, batch_size=sample), None)
+    if batch is None or total == 0:
+        return {'features': 0, 'polygons': 0, 'rings': 0, 'ring_vertices': 0, 'sampled': False}
+
+    # Scale the sample to the whole file
+    counts = footprint_counts(batch)
+    scale = total / min(sample, total)
+    scaled = {key: int(round(value * scale)) for key, value in counts.items() if key != 'sampled'}
+    scaled['sampled'] = scale > 1
+    return scaled
+
+def geometry_counts(path, sample=SAMPLE_ROWS):
+    """
+    Count the geometry structure of an input, from the index where possible.
+
+    Args:
+        path (str): Path to the input footprints
+        sample (int): Number of source rows to read when there is no usable index (default: 10000)
+
+    Returns:
+        dict: Structure counts (see ``footprint_counts``)
+    """
+    if str(path).lower().endswith('.shp'):
+        try:
+            return shapefile_counts(path)
+        except (ValueError, FileNotFoundError):
+            pass
+    return sample_counts(path, sample)
+
+def mesh_counts(counts, cull=False):
+    """
+    Predict the vertices and triangles ``build_mesh`` emits for the given structure.
+
+    Every polygon gets a bottom and a top copy of its ring vertices, a cap of
+    ``n + 2h - 2`` triangles per side for ``n`` ring vertices and ``h`` holes,
+    and two wall triangles per ring segment. Culling drops the bottom caps;
+    the walls it removes depend on the neighbours and are not predicted.
+
+    Args:
+        counts (dict): Structure counts from ``geometry_counts``
+        cull (bool): Whether bottom caps are dropped (default: False)
+
+    Returns:
+        tuple: (number of vertices, number of triangles)
+    """
+    vertices = 2 * counts['ring_vertices']
+    holes = counts['rings'] - counts['polygons']
+    cap = max(counts['ring_vertices'] + 2 * holes - 2 * counts['polygons'], 0)
+    walls = 2 * counts['ring_vertices']
+    return vertices, cap * (1 if cull else 2) + walls
+
+def mean_digits(count):
+    """
+    Calculate the mean number of decimal digits of the integers 1..count.
+
+    Args:
+        count (int): Largest integer
+
+    Returns:
+        float: Mean digit count (0 for an empty range)
+    """
+    if count <= 0:
+        return 0.0
+    total = 0
+    digits = 1
+    low = 1
+    while low <= count:
+        high = min(low * 10 - 1, count)
+        total += (high - low + 1) * digits
+        low *= 10
+        digits += 1
+    return total / count
+
+def output_sizes(vertices, faces, calibration, is_normal=False, ply=False):
+    """
+    Predict the size of every output file.
+
+    OBJ vertex and normal lines are sized from the calibrated mean line
+    lengths, face lines from the index digit counts. GLB and PLY sizes follow
+    from their fixed binary layouts.
+
+    Args:
+        vertices (int): Number of vertices
+        faces (int): Number of triangles
+        calibration (dict): Calibration from ``calibrate``
+        is_normal (bool): Whether the OBJ carries face normals (default: False)
+        ply (bool): Whether a PLY file is written (default: False)
+
+    Returns:
+        dict: Predicted bytes per output format
+    """
+    vertex_digits = mean_digits(vertices)
+    obj = calibration['obj_vertex_bytes'] * vertices
+    if is_normal:
+        obj += (calibration['obj_normal_bytes'] + 2 + 3 * (vertex_digits + mean_digits(faces) + 3)) * faces
+    else:
+        obj += (2 + 3 * (vertex_digits + 1)) * faces
+
+    chunks = max(int(np.ceil(vertices / 65535)), 1)
+    glb = calibration['glb_chunk_bytes'] * chunks + GLB_VERTEX_BYTES * vertices + GLB_FACE_BYTES * faces
+
+    sizes = {'obj': int(obj), 'glb': int(glb)}
+    if ply:
+        sizes['ply'] = int(calibration['ply_header_bytes'] + 16 * vertices + (17 + 12 * is_normal) * faces)
+    return sizes
+
+def calibration_key():
+    """
+    Describe what a calibration depends on: the code, the library versions and the machine.
+
+    Returns:
+        dict: Hash of the module sources, Python and library versions, host name and processor
+    """
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+
+    packages = {}
+    for name in CALIBRATED_PACKAGES:
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            packages[name] = None
+    return {
+        'code': digest.hexdigest(),
+        'python': platform.python_version(),
+        'packages': packages,
+        'machine': platform.node(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+def calibration_path(key=None):
+    """
+    Get the cache file of the calibration for a key.
+
+    Args:
+        key (dict, optional): Key from ``calibration_key`` (default: the current one)
+
+    Returns:
+        str: Path of the calibration JSON file in the user cache
+    """
+    key = calibration_key() if key is None else key
+    name = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+    return os.path.join(CALIBRATION_DIR, f'calibration-{name}.json')
+
+def calibrate(path=BENCHMARK_PATH, output='', repeat=3):
+    """
+    Benchmark every conversion stage on local footprints and store the throughput.
+
+    Each stage runs ``repeat`` times and the fastest run is kept. Peak memory
+    is traced over a full build and write of the OBJ and GLB. The calibration
+    records its ``calibration_key``, so it is only reused with the same code,
+    libraries and machine.
+
+    Args:
+        path (str): Footprints to benchmark with (default: the repository sample data)
+        output (str, optional): JSON file to store the calibration in; None does not store it
+                                (default: ``calibration_path()`` in the user cache)
+        repeat (int): Number of runs per stage (default: 3)
+
+    Returns:
+        dict: Seconds per unit of every stage, mean OBJ line lengths and memory per triangle
+    """
+    # (imported here because shp2obj builds on this module for --dry-run)
+    from shp2obj import build_mesh
+    from ingest import footprint_center
+    from normal import obj_normals
+    from save import write_obj_default, write_obj_normal
+    from glb import glb_bytes
+    from ply import write_ply, ply_header
+
+    def fastest(stage):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = stage()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None or seconds < best else best
+        return best, result
+
+    read_seconds, footprints = fastest(lambda: read_footprints(path))
+    center = footprint_center(footprints)
+    build_seconds, (positions, faces, ranges) = fastest(lambda: build_mesh(footprints, center, 3))
+    normal_seconds, normals = fastest(lambda: obj_normals(positions, faces))
+    counts = footprint_counts(footprints)
+
+    with tempfile.TemporaryDirectory() as directory:
+        obj_path = os.path.join(directory, 'benchmark.obj')
+        obj_seconds, _ = fastest(lambda: write_obj_default(obj_path, positions, faces))
+        obj_size = os.path.getsize(obj_path)
+        with open(obj_path) as f:
+            vertex_bytes = sum(len(line) for line in f if line.startswith('v '))
+
+        obj_normal_seconds, _ = fastest(lambda: write_obj_normal(obj_path, positions, faces, normals))
+        obj_normal_size = os.path.getsize(obj_path)
+        with open(obj_path) as f:
+            normal_bytes = sum(len(line) + 1 for line in f if line.startswith('vn '))
+
+        glb_seconds, glb = fastest(lambda: glb_bytes(positions, faces, ranges))
+
+        ply_path = os.path.join(directory, 'benchmark.ply')
+        ply_seconds, _ = fastest(lambda: write_ply(ply_path, np.asarray(positions), np.asarray(faces) - 1,
+                                                   None, ranges, footprints['feature_ids']))
+        ply_size = os.path.getsize(ply_path)
+
+        # Memory held by the mesh lists, normals and output strings, per triangle
+        tracemalloc.start()
+        mesh = build_mesh(footprints, center, 3)
+        write_obj_normal(obj_path, mesh[0], mesh[1], obj_normals(mesh[0], mesh[1]))
+        glb_bytes(mesh[0], mesh[1], mesh[2])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    num_vertices, num_faces = len(positions), len(faces)
+    chunks = max(int(np.ceil(num_vertices / 65535)), 1)
+    key = calibration_key()
+    calibration = {
+        'key': key,
+        'benchmark': os.path.abspath(path),
+        'read_seconds_per_vertex': read_seconds / max(counts['ring_vertices'], 1),
+        'build_seconds_per_face': build_seconds / max(num_faces, 1),
+        'normal_seconds_per_face': normal_seconds / max(num_faces, 1),
+        'obj_seconds_per_byte': obj_seconds / max(obj_size, 1),
+        'obj_normal_seconds_per_byte': obj_normal_seconds / max(obj_normal_size, 1),
+        'glb_seconds_per_byte': glb_seconds / max(len(glb), 1),
+        'ply_seconds_per_byte': ply_seconds / max(ply_size, 1),
+        'obj_vertex_bytes': vertex_bytes / max(num_vertices, 1),
+        'obj_normal_bytes': normal_bytes / max(num_faces, 1),
+        'glb_chunk_bytes': (len(glb) - GLB_VERTEX_BYTES * num_vertices - GLB_FACE_BYTES * num_faces) / chunks,
+        'ply_header_bytes': len(ply_header(0, 0, False, True)),
+        'memory_bytes_per_face': peak / max(num_faces, 1),
+    }
+
+    if output == '':
+        output = calibration_path(key)
+    if output:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output + '.tmp', 'w') as f:
+            json.dump(calibration, f, indent=2)
+        os.replace(output + '.tmp', output)
+    return calibration
+
+def load_calibration(path=None):
+    """
+    Load the stored calibration, running the benchmark once if there is none.
+
+    A calibration made with other code, libraries or on another machine is
+    not reused. Running the benchmark is announced, since it takes a few seconds.
+
+    Args:
+        path (str, optional): Calibration JSON file (default: ``calibration_path()`` in the user cache)
+
+    Returns:
+        dict: Calibration (see ``calibrate``)
+    """
+    key = calibration_key()
+    path = calibration_path(key) if path is None else path
+    if os.path.exists(path):
+        with open(path) as f:
+            calibration = json.load(f)
+        if calibration.get('key') == key:
+            return calibration
+
+    print(f'Calibrating the estimator on {BENCHMARK_PATH} for this code, library versions and machine')
+    calibration = calibrate(output=path)
+    print(f'Calibration stored in {path}')
+    return calibration
+
+def estimate_conversion(shp_path, is_normal=False, cull=False, ply=False, sample=SAMPLE_ROWS, calibration=None,
+                        instance=False, weld=None, time_budget=None):
+    """
+    Predict the cost of converting a footprint file without converting it.
+
+    Instancing, welding and guard fallbacks depend on the coordinates, which
+    the estimate never reads; when they are requested the estimate lists them
+    as not included instead of guessing their effect.
+
+    Args:
+        shp_path (str): Path to the input footprints
+        is_normal (bool): Whether the OBJ carries normals (default: False)
+        cull (bool): Whether bottom caps are dropped (default: False)
+        ply (bool): Whether a PLY file is written (default: False)
+        sample (int): Number of source rows read when there is no usable index (default: 10000)
+        calibration (dict, optional): Calibration to use (default: ``load_calibration()``)
+        instance (bool): Whether repeated footprints are instanced (default: False)
+        weld (float, optional): Weld tolerance of the conversion, if any
+        time_budget (float, optional): Guard time budget per pathological footprint, if any
+
+    Returns:
+        dict: 'counts', 'vertices', 'faces', 'sizes' (bytes per format), 'seconds'
+              (per stage and 'total'), 'peak_memory' (bytes), 'excluded' (effects
+              not included) and 'estimate_seconds'
+    """
+    start = time.perf_counter()
+    if calibration is None:
+        calibration = load_calibration()
+
+    counts = geometry_counts(shp_path, sample)
+    vertices, faces = mesh_counts(counts, cull)
+    sizes = output_sizes(vertices, faces, calibration, is_normal, ply)
+
+    seconds = {
+        'read': calibration['read_seconds_per_vertex'] * counts['ring_vertices'],
+        'build': calibration['build_seconds_per_face'] * faces,
+    }
+    if is_normal:
+        seconds['normals'] = calibration['normal_seconds_per_face'] * faces
+        seconds['obj'] = calibration['obj_normal_seconds_per_byte'] * sizes['obj']
+    else:
+        seconds['obj'] = calibration['obj_seconds_per_byte'] * sizes['obj']
+    seconds['glb'] = calibration['glb_seconds_per_byte'] * sizes['glb']
+    if ply:
+        seconds['ply'] = calibration['ply_seconds_per_byte'] * sizes['ply']
+    seconds['total'] = sum(seconds.values())
+
+    # Coordinate buffers of the input plus everything held per output triangle
+    peak_memory = 16 * (counts['ring_vertices'] + counts['rings']) + calibration['memory_bytes_per_face'] * faces
+
+    # Effects that need the coordinates; the estimate is an upper bound for the first two
+    excluded = []
+    if instance:
+        excluded.append('instancing (repeated footprints are stored once in the GLB, so it may be smaller)')
+    if weld is not None:
+        excluded.append(f'welding within {weld} m (fewer vertices and smaller outputs, plus the welding time)')
+    if time_budget is not None:
+        excluded.append(f'guard fallbacks (up to {time_budget} s more per pathological footprint)')
+
+    return {
+        'counts': counts,
+        'vertices': vertices,
+        'faces': faces,
+        'sizes': sizes,
+        'seconds': seconds,
+        'peak_memory': int(peak_memory),
+        'excluded': excluded,
+        'estimate_seconds': time.perf_counter() - start,
+    }
+
+def format_bytes(size):
+    """
+    Format a byte count with a binary unit.
+
+    Args:
+        size (float): Number of bytes
+
+    Returns:
+        str: Human-readable size such as ``12.3 MiB``
+    """
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f'{size:.1f} {unit}' if unit != 'B' else f'{int(size)} B'
+        size /= 1024
+
+def print_estimate(estimate):
+    """
+    Print a dry-run estimate.
+
+    Args:
+        estimate (dict): Estimate returned by ``estimate_conversion``
+    """
+    counts = estimate['counts']
+    source = 'sampled' if counts['sampled'] else 'exact'
+    print(f"Input: {counts['features']} features, {counts['polygons']} polygons, {counts['rings']} rings, "
+          f"{counts['ring_vertices']} ring vertices ({source})")
+    print(f"Mesh: {estimate['vertices']} vertices, {estimate['faces']} triangles")
+    for name, size in estimate['sizes'].items():
+        print(f'  {name.upper():<4} {format_bytes(size)}')
+    print(f"Runtime: {estimate['seconds']['total']:.2f} s, peak memory {format_bytes(estimate['peak_memory'])}")
+    for stage, seconds in estimate['seconds'].items():
+        if stage != 'total':
+            print(f'  {stage:<8} {seconds:8.3f} s')
+    for effect in estimate.get('excluded', []):
+        print(f'Not included: {effect}')
+    print(f"Estimated in {estimate['estimate_seconds']:.3f} s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Estimate the cost of a conversion or calibrate the estimator')
+    parser.add_argument('shp_path', nargs='?', help='Input footprints to estimate')
+    parser.add_argument('--normal', action='store_true', help='Include vertex normals in the OBJ')
+    parser.add_argument('--cull', action='store_true', help='Drop bottom caps')
+    parser.add_argument('--ply', action='store_true', help='Also write a PLY file')
+    parser.add_argument('--instance', action='store_true', help='Instance repeated footprints')
+    parser.add_argument('--weld', type=float, default=None, metavar='TOLERANCE', help='Weld tolerance in meters')
+    parser.add_argument('--calibrate', nargs='?', const=BENCHMARK_PATH, default=None, metavar='PATH',
+                        help='Benchmark the stages on PATH (default: the sample data) and store the calibration')
+    args = parser.parse_args()
+
+    if args.calibrate:
+        print(json.dumps(calibrate(args.calibrate), indent=2))
+    if args.shp_path:
+        print_estimate(estimate_conversion(args.shp_path, args.normal, args.cull, args.ply, instance=args.instance,
+                                           weld=args.weld, time_budget=TIME_BUDGET))
@@ -0,0 +1,649 @@
+"""
+Binary glTF (GLB) writing utilities for 3D model export.
+This module encodes vertex positions and triangle faces directly into GLB bytes, split into 16-bit indexed chunks, without an intermediate OBJ file.
+"""
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+import numpy as np
+from curve import morton_keys
+
+# GLB container constants
+GLB_MAGIC = 0x46546C67
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+# glTF buffer view targets and accessor component types
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+COMPONENT_TYPES = {
+    np.dtype(np.float32): 5126,
+    np.dtype(np.uint32): 5125,
+    np.dtype(np.uint16): 5123,
+    np.dtype(np.uint8): 5121,
+}
+ACCESSOR_TYPES = {1: 'SCALAR', 2: 'VEC2', 3: 'VEC3', 4: 'VEC4'}
+
+# Largest vertex count addressable with 16-bit indices
+MAX_CHUNK_VERTICES = 65535
+
+# Metadata class of the property tables holding the source feature IDs (EXT_structural_metadata)
+METADATA_CLASS = 'building'
+METADATA_SCHEMA = {
+    'id': 'shp_transform_obj',
+    'classes': {METADATA_CLASS: {'properties': {
+        'source_id': {'type': 'SCALAR', 'componentType': 'INT64', 'description': 'Source feature ID'},
+    }}},
+}
+
+# Faces are wound counter-clockwise from outside, so clients may cull back faces
+MATERIAL = {
+    'pbrMetallicRoughness': {'baseColorFactor': [1.0, 1.0, 1.0, 1.0], 'metallicFactor': 0.0, 'roughnessFactor': 1.0},
+    'doubleSided': False,
+}
+
+# Faces meeting at a smaller angle in degrees lie in one plane, so their shared edge is no outline
+OUTLINE_ANGLE = 1.0
+
+def glb_bytes(positions, faces, ranges=None, feature_ids=None, max_vertices=MAX_CHUNK_VERTICES, instances=None,
+              out=None, outline=True):
+    """
+    Encode a triangle mesh as GLB bytes split into 16-bit indexed chunks.
+
+    Features are ordered along a Morton curve of their centroids and packed into
+    primitives of at most ``max_vertices`` vertices, so every primitive holds a
+    compact group of nearby buildings and uses a uint16 index buffer. A single
+    feature larger than the limit gets its own uint32 primitive. Each vertex
+    carries the index of its feature within the chunk in a ``_FEATURE_ID_0``
+    attribute (EXT_mesh_features), and every chunk has a property table with
+    the 64-bit source feature IDs (EXT_structural_metadata), so IDs of any size
+    stay exact and valid across chunks. With ``outline``
+    every primitive also carries the index buffer of its roof and base ring
+    edges and wall corners (CESIUM_primitive_outline), so clients draw
+    building outlines without scanning the triangles.
+
+    Args:
+        positions (list): List of vertex positions as [x, y, z] coordinates
+        faces (list): List of face definitions with 1-based vertex indices (as in OBJ)
+        ranges (numpy.ndarray, optional): Per-feature [vertex_start, vertex_end,
+                                          face_start, face_end] rows from ``build_mesh``
+                                          (default: the whole mesh is one feature)
+        feature_ids (numpy.ndarray, optional): Source feature ID of every range row
+                                               (default: the row number)
+        max_vertices (int): Maximum vertex count of a chunk (default: 65535)
+        instances (list, optional): Instanced groups, each a dict with the prototype
+                                    'positions' and 1-based 'faces', the per-member
+                                    'translations', 'rotations' (quaternions) and
+                                    'feature_ids'; written with EXT_mesh_gpu_instancing
+        out (writable buffer, optional): Buffer to encode into instead of new bytes (see ``pack_glb``)
+        outline (bool): Whether to write precomputed outline edges (default: True)
+
+    Returns:
+        bytes or int: GLB file content, or the number of bytes written into ``out``
+    """
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    indices = np.asarray(faces, dtype=np.int64).reshape(-1, 3) - 1
+    if ranges is None:
+        ranges = np.array([[0, len(positions), 0, len(indices)]])
+    ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 4)
+    if feature_ids is None:
+        feature_ids = np.arange(len(ranges))
+
+    gltf = new_gltf()
+    binary = []
+    add_mesh_node(gltf, add_chunks(gltf, binary, positions, indices, ranges, feature_ids, max_vertices, outline))
+
+    # Every instanced group is one mesh drawn once per member
+    for group in instances or []:
+        add_instanced_group(gltf, binary, group, outline)
+
+    return pack_glb(gltf, binary, out)
+
+def add_chunks(gltf, binary, positions, indices, ranges, feature_ids, max_vertices=MAX_CHUNK_VERTICES,
+               outline=True):
+    """
+    Store a mesh as spatially compact primitives with feature IDs (see ``glb_bytes``).
+
+    Args:
+        gltf (dict): glTF JSON document
+        binary (list): Binary chunk parts, extended in place
+        positions (numpy.ndarray): Vertex positions with shape (N, 3) as float32
+        indices (numpy.ndarray): 0-based triangle vertex indices with shape (M, 3)
+        ranges (numpy.ndarray): Per-feature [vertex_start, vertex_end, face_start, face_end] rows
+        feature_ids (numpy.ndarray): Source feature ID of every range row
+        max_vertices (int): Maximum vertex count of a chunk (default: 65535)
+        outline (bool): Whether to write precomputed outline edges (default: True)
+
+    Returns:
+        list: glTF primitives, one per non-empty chunk
+    """
+    primitives = []
+    for chunk in chunk_features(positions, ranges, max_vertices):
+        vertex_starts, vertex_ends, face_starts, face_ends = ranges[chunk].T
+        vertex_counts = vertex_ends - vertex_starts
+        face_counts = face_ends - face_starts
+
+        # Gather the chunk's vertices and rebase its faces onto them
+        chunk_vertices = concatenate_ranges(vertex_starts, vertex_counts)
+        chunk_faces = concatenate_ranges(face_starts, face_counts)
+        new_starts = np.concatenate([[0], np.cumsum(vertex_counts)[:-1]])
+        shift = np.repeat(new_starts - vertex_starts, face_counts)
+        chunk_indices = indices[chunk_faces] + shift[:, None]
+
+        # glTF accessors cannot be empty
+        if len(chunk_indices) == 0:
+            continue
+
+        index_type = np.uint16 if len(chunk_vertices) <= MAX_CHUNK_VERTICES else np.uint32
+        feature_index = np.repeat(feature_indices(len(chunk)), vertex_counts)
+        primitive = {
+            'attributes': {
+                'POSITION': add_accessor(gltf, binary, positions[chunk_vertices], ARRAY_BUFFER, with_bounds=True),
+                '_FEATURE_ID_0': add_accessor(gltf, binary, feature_index, ARRAY_BUFFER),
+            },
+            'indices': add_accessor(gltf, binary, chunk_indices.reshape(-1).astype(index_type), ELEMENT_ARRAY_BUFFER),
+            'material': 0,
+            'mode': 4,
+            'extensions': {'EXT_mesh_features': {'featureIds': [{
+                'featureCount': len(chunk), 'attribute': 0,
+                'propertyTable': add_property_table(gltf, binary, np.asarray(feature_ids)[chunk]),
+            }]}},
+        }
+        if outline:
+            add_outline(gltf, binary, primitive, outline_indices(positions[chunk_vertices], chunk_indices), index_type)
+        primitives.append(primitive)
+
+    return primitives
+
+def add_mesh_node(gltf, primitives):
+    """
+    Add the node drawing the chunk primitives of a mesh.
+
+    Args:
+        gltf (dict): glTF JSON document
+        primitives (list): glTF primitives from ``add_chunks``
+    """
+    # An empty mesh yields an empty scene
+    if primitives:
+        add_node(gltf, {'primitives': primitives})
+        gltf['extensionsUsed'] = ['EXT_mesh_features'] + [name for name in gltf.get('extensionsUsed', [])
+                                                          if name != 'EXT_mesh_features']
+
+def add_node(gltf, mesh, extensions=None):
+    """
+    Add a mesh and a scene node drawing it.
+
+    Args:
+        gltf (dict): glTF JSON document
+        mesh (dict): glTF mesh with its primitives
+        extensions (dict, optional): Node extensions
+
+    Returns:
+        int: Index of the new node
+    """
+    gltf['meshes'].append(mesh)
+    node = {'mesh': len(gltf['meshes']) - 1}
+    if extensions:
+        node['extensions'] = extensions
+    gltf['nodes'].append(node)
+    gltf['scenes'][0]['nodes'].append(len(gltf['nodes']) - 1)
+    return len(gltf['nodes']) - 1
+
+def outline_indices(positions, indices, angle=OUTLINE_ANGLE):
+    """
+    Find the outline edges of an extruded building mesh.
+
+    Caps and walls share their ring vertices, so roof and base ring edges join
+    a cap and a wall at a right angle and wall corners join two walls at the
+    ring's turning angle, while triangulation diagonals of caps and walls join
+    two faces of the same plane. An edge is therefore an outline edge when its
+    faces meet at more than ``angle`` degrees or when it belongs to one face
+    only (trimmed wall pieces, culled bottoms).
+
+    Args:
+        positions (numpy.ndarray): Vertex positions with shape (N, 3)
+        indices (numpy.ndarray): 0-based triangle vertex indices with shape (M, 3)
+        angle (float): Largest angle in degrees between faces of one plane (default: 1)
+
+    Returns:
+        numpy.ndarray: 0-based vertex index pairs with shape (E, 2), one per outline edge
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    if len(indices) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    # Unit normal of every face
+    p1, p2, p3 = (positions[indices[:, k]] for k in range(3))
+    normals = np.cross(p2 - p1, p3 - p1)
+    normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-12)[:, None]
+
+    # Undirected edges of all faces, grouped by their end points
+    edges = np.sort(indices[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    edge_faces = np.repeat(np.arange(len(indices)), 3)
+    keys = edges[:, 0] * len(positions) + edges[:, 1]
+    order = np.argsort(keys, kind='stable')
+    keys, edges, edge_faces = keys[order], edges[order], edge_faces[order]
+    first = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    group = np.cumsum(np.concatenate([[False], keys[1:] != keys[:-1]]))
+
+    # Compare every face of an edge with the edge's first face
+    folded = np.einsum('ij,ij->i', normals[edge_faces], normals[edge_faces[first]][group]) < np.cos(np.radians(angle))
+    counts = np.diff(np.concatenate([first, [len(keys)]]))
+    outline = (counts == 1) | (np.bincount(group, weights=folded, minlength=len(first)) > 0)
+    return edges[first[outline]]
+
+def add_outline(gltf, binary, primitive, edges, index_type):
+    """
+    Attach outline edges to a primitive with CESIUM_primitive_outline.
+
+    Args:
+        gltf (dict): glTF JSON document
+        binary (list): Binary chunk parts, extended in place
+        primitive (dict): glTF primitive, extended in place
+        edges (numpy.ndarray): 0-based vertex index pairs of the primitive
+        index_type (type): Index component type of the primitive
+    """
+    # glTF accessors cannot be empty
+    if len(edges) == 0:
+        return
+    accessor = add_accessor(gltf, binary, edges.reshape(-1).astype(index_type), ELEMENT_ARRAY_BUFFER)
+    primitive.setdefault('extensions', {})['CESIUM_primitive_outline'] = {'indices': accessor}
+    if 'CESIUM_primitive_outline' not in gltf.setdefault('extensionsUsed', []):
+        gltf['extensionsUsed'].append('CESIUM_primitive_outline')
+
+def add_instanced_group(gltf, binary, group, outline=True):
+    """
+    Add a prototype mesh drawn at every group member with EXT_mesh_gpu_instancing.
+
+    Every instance carries its index within the group (EXT_instance_features),
+    which points into a property table with the 64-bit source feature IDs.
+
+    Args:
+        gltf (dict): glTF JSON document
+        binary (list): Binary chunk parts, extended in place
+        group (dict): Instanced group (see ``glb_bytes``)
+        outline (bool): Whether to write precomputed outline edges (default: True)
+    """
+    positions = np.asarray(group['positions'], dtype=np.float32).reshape(-1, 3)
+    indices = np.asarray(group['faces'], dtype=np.int64).reshape(-1) - 1
+    index_type = np.uint16 if len(positions) <= MAX_CHUNK_VERTICES else np.uint32
+
+    primitive = {
+        'attributes': {'POSITION': add_accessor(gltf, binary, positions, ARRAY_BUFFER, with_bounds=True)},
+        'indices': add_accessor(gltf, binary, indices.astype(index_type), ELEMENT_ARRAY_BUFFER),
+        'material': 0,
+        'mode': 4,
+    }
+    if outline:
+        add_outline(gltf, binary, primitive, outline_indices(positions, indices.reshape(-1, 3)), index_type)
+    feature_ids = np.asarray(group['feature_ids'])
+    add_node(gltf, {'primitives': [primitive]}, {
+        'EXT_mesh_gpu_instancing': {'attributes': {
+            'TRANSLATION': add_accessor(gltf, binary, np.asarray(group['translations'], dtype=np.float32)),
+            'ROTATION': add_accessor(gltf, binary, np.asarray(group['rotations'], dtype=np.float32)),
+            '_FEATURE_ID_0': add_accessor(gltf, binary, feature_indices(len(feature_ids))),
+        }},
+        'EXT_instance_features': {'featureIds': [{
+            'featureCount': len(feature_ids), 'attribute': 0,
+            'propertyTable': add_property_table(gltf, binary, feature_ids),
+        }]},
+    })
+
+    # Clients without instancing would draw a single copy, so the extension is required
+    for name in ('EXT_mesh_gpu_instancing', 'EXT_instance_features'):
+        if name not in gltf.setdefault('extensionsUsed', []):
+            gltf['extensionsUsed'].append(name)
+    if 'EXT_mesh_gpu_instancing' not in gltf.setdefault('extensionsRequired', []):
+        gltf['extensionsRequired'].append('EXT_mesh_gpu_instancing')
+
+def feature_indices(count):
+    """
+    Number the features of a chunk or instanced group for their ``_FEATURE_ID_0`` attribute.
+
+    Indices are unsigned shorts when they fit and floats (exact up to 2^24) otherwise,
+    the component types EXT_mesh_features allows for feature ID attributes.
+
+    Args:
+        count (int): Number of features
+
+    Returns:
+        numpy.ndarray: Indices 0..count-1
+    """
+    return np.arange(count, dtype=np.uint16 if count <= 65536 else np.float32)
+
+def add_property_table(gltf, binary, feature_ids):
+    """
+    Store source feature IDs in an EXT_structural_metadata property table.
+
+    Args:
+        gltf (dict): glTF JSON document
+        binary (list): Binary chunk parts, extended in place
+        feature_ids (numpy.ndarray): Source feature ID of every feature, in feature index order
+
+    Returns:
+        int: Index of the new property table
+    """
+    metadata = gltf.setdefault('extensions', {}).setdefault('EXT_structural_metadata',
+                                                            {'schema': METADATA_SCHEMA, 'propertyTables': []})
+    values = add_buffer_view(gltf, binary, np.asarray(feature_ids, dtype='<i8'), alignment=8)
+    metadata['propertyTables'].append({
+        'class': METADATA_CLASS,
+        'count': len(feature_ids),
+        'properties': {'source_id': {'values': values}},
+    })
+    if 'EXT_structural_metadata' not in gltf.setdefault('extensionsUsed', []):
+        gltf['extensionsUsed'].append('EXT_structural_metadata')
+    return len(metadata['propertyTables']) - 1
+
+def write_glb(filepath, positions, faces, ranges=None, feature_ids=None, max_vertices=MAX_CHUNK_VERTICES,
+              instances=None):
+    """
+    Write a triangle mesh to a GLB file split into 16-bit indexed chunks.
+
+    Args:
+        filepath (str): Output file path for the GLB file
+        positions (list): List of vertex positions as [x, y, z] coordinates
+        faces (list): List of face definitions with 1-based vertex indices (as in OBJ)
+        ranges (numpy.ndarray, optional): Per-feature ranges from ``build_mesh``
+        feature_ids (numpy.ndarray, optional): Source feature ID of every range row
+        max_vertices (int): Maximum vertex count of a chunk (default: 65535)
+        instances (list, optional): Instanced groups (see ``glb_bytes``)
+
+    Returns:
+        None: Writes the GLB file to disk
+    """
+    with open(filepath, 'wb') as f:
+        f.write(glb_bytes(positions, faces, ranges, feature_ids, max_vertices, instances))
+
+class GlbWriter:
+    """
+    Write a GLB file block by block without keeping the whole mesh in memory.
+
+    Every block added is split into chunks like ``glb_bytes`` does, but chunks
+    never span two blocks. The binary data of finished blocks is spooled to an
+    anonymous temporary file next to the output; only the glTF JSON stays in
+    memory until ``close`` writes the header and copies the binary chunk after it.
+    """
+
+    def __init__(self, filepath, max_vertices=MAX_CHUNK_VERTICES, outline=True):
+        """
+        Args:
+            filepath (str): Output file path for the GLB file
+            max_vertices (int): Maximum vertex count of a chunk (default: 65535)
+            outline (bool): Whether to write precomputed outline edges (default: True)
+        """
+        self.filepath = filepath
+        self.max_vertices = max_vertices
+        self.outline = outline
+        self.gltf = new_gltf()
+        self.primitives = []
+        self.body_length = 0
+        self.spool = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(filepath)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.spool.close()
+
+    def add(self, positions, faces, ranges, feature_ids):
+        """
+        Encode one block of buildings and spool its binary data.
+
+        Args:
+            positions (list): Vertex positions of the block as [x, y, z] coordinates
+            faces (list): 1-based faces within the block
+            ranges (numpy.ndarray): Per-feature ranges of the block from ``build_mesh``
+            feature_ids (numpy.ndarray): Source feature ID of every range row
+        """
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        indices = np.asarray(faces, dtype=np.int64).reshape(-1, 3) - 1
+        ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 4)
+        first_view = len(self.gltf['bufferViews'])
+        binary = []
+        self.primitives += add_chunks(self.gltf, binary, positions, indices, ranges, feature_ids, self.max_vertices,
+                                      self.outline)
+
+        # Views were laid out from the start of this block, which starts on an 8-byte boundary
+        for view in self.gltf['bufferViews'][first_view:]:
+            view['byteOffset'] += self.body_length
+        length = sum(part.nbytes for part in binary)
+        binary.append(np.zeros(-length % 8, dtype=np.uint8))
+        for part in binary:
+            self.spool.write(memoryview(part).cast('B'))
+            self.body_length += part.nbytes
+
+    def close(self):
+        """
+        Write the GLB header and JSON chunk followed by the spooled binary chunk.
+        """
+        add_mesh_node(self.gltf, self.primitives)
+        parts, _ = glb_header(self.gltf, self.body_length)
+        with open(self.filepath, 'wb') as f:
+            f.writelines(parts)
+            if self.body_length:
+                self.spool.seek(0)
+                shutil.copyfileobj(self.spool, f)
+        self.spool.close()
+
+def chunk_features(positions, ranges, max_vertices=MAX_CHUNK_VERTICES):
+    """
+    Group features into spatially compact chunks below a vertex budget.
+
+    Features are sorted by the Morton key of their horizontal (x, z) centroid
+    and packed greedily in that order.
+
+    Args:
+        positions (numpy.ndarray): Vertex positions with shape (N, 3)
+        ranges (numpy.ndarray): Per-feature [vertex_start, vertex_end, face_start, face_end] rows
+        max_vertices (int): Maximum vertex count of a chunk
+
+    Returns:
+        list: Arrays of range row indices, one per chunk
+    """
+    if len(ranges) == 0:
+        return []
+
+    # Horizontal centroid of every feature from its vertices
+    vertex_counts = ranges[:, 1] - ranges[:, 0]
+    vertices = positions[concatenate_ranges(ranges[:, 0], vertex_counts)].astype(np.float64)
+    owners = np.repeat(np.arange(len(ranges)), vertex_counts)
+    centroids = np.column_stack([
+        np.bincount(owners, weights=vertices[:, 0], minlength=len(ranges)),
+        np.bincount(owners, weights=vertices[:, 2], minlength=len(ranges)),
+    ]) / np.maximum(vertex_counts, 1)[:, None]
+    order = np.argsort(morton_keys(centroids), kind='stable')
+
+    # Greedily fill chunks in curve order
+    chunks = []
+    current = []
+    current_vertices = 0
+    for feature in order:
+        count = vertex_counts[feature]
+        if current and current_vertices + count > max_vertices:
+            chunks.append(np.array(current))
+            current = []
+            current_vertices = 0
+        current.append(feature)
+        current_vertices += count
+    if current:
+        chunks.append(np.array(current))
+
+    return chunks
+
+def concatenate_ranges(starts, counts):
+    """
+    Concatenate the integer ranges [start, start + count) into one index array.
+
+    Args:
+        starts (numpy.ndarray): First index of every range
+        counts (numpy.ndarray): Length of every range
+
+    Returns:
+        numpy.ndarray: Concatenated indices
+    """
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, counts)
+
+def new_gltf():
+    """
+    Create an empty glTF 2.0 document with a single scene.
+
+    Returns:
+        dict: glTF JSON document
+    """
+    return {
+        'asset': {'version': '2.0', 'generator': 'shp-transform-obj'},
+        'scene': 0,
+        'scenes': [{'nodes': []}],
+        'nodes': [],
+        'meshes': [],
+        'materials': [dict(MATERIAL)],
+        'accessors': [],
+        'bufferViews': [],
+        'buffers': [],
+    }
+
+def add_buffer_view(gltf, binary, data, target=None, alignment=4):
+    """
+    Append raw array data to the binary chunk and register a buffer view for it.
+
+    The array itself is kept as a part (no byte copy is made until packing).
+
+    Args:
+        gltf (dict): glTF JSON document
+        binary (list): Binary chunk parts, extended in place
+        data (numpy.ndarray): Array data to store
+        target (int, optional): Buffer view target (ARRAY_BUFFER or ELEMENT_ARRAY_BUFFER)
+        alignment (int): Byte boundary the view starts on (default: 4; 8 for 64-bit metadata)
+
+    Returns:
+        int: Index of the new buffer view
+    """
+    # Buffer views start on 4-byte boundaries, 64-bit property values on 8-byte ones
+    offset = sum(part.nbytes for part in binary)
+    if offset % alignment:
+        binary.append(np.zeros(-offset % alignment, dtype=np.uint8))
+        offset += binary[-1].nbytes
+    payload = np.ascontiguousarray(data)
+    binary.append(payload)
+    if payload.nbytes % 4:
+        binary.append(np.zeros(-payload.nbytes % 4, dtype=np.uint8))
+
+    view = {'buffer': 0, 'byteOffset': offset, 'byteLength': payload.nbytes}
+    if target is not None:
+        view['target'] = target
+    gltf['bufferViews'].append(view)
+    return len(gltf['bufferViews']) - 1
+
+def add_accessor(gltf, binary, data, target=None, with_bounds=False):
+    """
+    Store an array in the binary chunk and describe it with an accessor.
+
+    Args:
+        gltf (dict): glTF JSON document
+        binary (list): Binary chunk parts, extended in place
+        data (numpy.ndarray): Array with shape (N,) or (N, components)
+        target (int, optional): Buffer view target
+        with_bounds (bool): Whether to record the min/max values (required for POSITION)
+
+    Returns:
+        int: Index of the new accessor
+    """
+    components = 1 if data.ndim == 1 else data.shape[1]
+    accessor = {
+        'bufferView': add_buffer_view(gltf, binary, data, target),
+        'componentType': COMPONENT_TYPES[data.dtype],
+        'count': len(data),
+        'type': ACCESSOR_TYPES[components],
+    }
+    if with_bounds and len(data) > 0:
+        accessor['min'] = np.atleast_1d(data.min(axis=0)).tolist()
+        accessor['max'] = np.atleast_1d(data.max(axis=0)).tolist()
+    gltf['accessors'].append(accessor)
+    return len(gltf['accessors']) - 1
+
+def pack_glb(gltf, binary, out=None):
+    """
+    Pack a glTF JSON document and its binary chunk into the GLB container.
+
+    Every part is copied exactly once, either into new bytes or straight into
+    a caller-provided buffer.
+
+    Args:
+        gltf (dict): glTF JSON document
+        binary (list): Binary chunk parts (NumPy arrays or bytes-like objects)
+        out (writable buffer, optional): bytearray, memoryview, mmap or NumPy
+                                         array to write into from its start
+
+    Returns:
+        bytes or int: GLB file content, or the number of bytes written into ``out``
+    """
+    body_length = sum(memoryview(part).nbytes for part in binary)
+    parts, total = glb_header(gltf, body_length)
+    if body_length:
+        parts.extend(binary)
+
+    if out is None:
+        return b''.join(parts)
+    return write_parts(out, parts, total)
+
+def glb_header(gltf, body_length):
+    """
+    Encode the GLB header, the JSON chunk and the binary chunk header.
+
+    Args:
+        gltf (dict): glTF JSON document
+        body_length (int): Size of the binary chunk in bytes (a multiple of 4)
+
+    Returns:
+        tuple: (list of bytes parts to write before the binary chunk, total GLB size in bytes)
+    """
+    if body_length:
+        gltf['buffers'] = [{'byteLength': body_length}]
+
+    # glTF does not allow empty top-level arrays
+    gltf = {key: value for key, value in gltf.items() if value != []}
+
+    # JSON is padded with spaces and the binary chunk with zeros to 4 bytes
+    content = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    content += b' ' * (-len(content) % 4)
+
+    total = 12 + 8 + len(content) + (8 + body_length if body_length else 0)
+    parts = [struct.pack('<III', GLB_MAGIC, GLB_VERSION, total), struct.pack('<II', len(content), CHUNK_JSON), content]
+    if body_length:
+        parts.append(struct.pack('<II', body_length, CHUNK_BIN))
+    return parts, total
+
+def write_parts(out, parts, total):
+    """
+    Copy buffer parts one after another into a writable buffer.
+
+    Args:
+        out (writable buffer): Destination buffer
+        parts (list): Bytes-like objects or contiguous NumPy arrays
+        total (int): Total size of the parts in bytes
+
+    Returns:
+        int: Number of bytes written
+    """
+    view = memoryview(out).cast('B')
+    if view.readonly:
+        raise ValueError('Output buffer is read-only')
+    if len(view) < total:
+        raise ValueError(f'Output buffer holds {len(view)} bytes but {total} are needed')
+
+    position = 0
+    for part in parts:
+        data = memoryview(part).cast('B')
+        view[position:position + len(data)] = data
+        position += len(data)
+    return position
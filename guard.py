@@ -0,0 +1,260 @@
+"""
+Tail-latency guard for pathological footprints.
+This module detects footprints that may stall or crash the triangulation, triangulates them in an isolated process with a time budget and falls back to a simplified ring or the convex hull when the budget runs out.
+"""
+
+import multiprocessing
+import time
+import numpy as np
+import shapely
+from createTriangle import ring_to_triangle_normal, rings_to_triangle_hole
+from ingest import make_footprints, feature_rings
+
+# Footprints beyond these limits are triangulated in an isolated process
+MAX_RING_VERTICES = 2000
+MAX_HOLES = 50
+
+# Seconds a single footprint may spend in triangulation
+TIME_BUDGET = 5.0
+
+# Simplification tolerance of the first fallback, relative to the footprint's bounding box
+SIMPLIFY_RATIO = 1e-3
+
+def find_pathological(footprints, max_vertices=MAX_RING_VERTICES, max_holes=MAX_HOLES):
+    """
+    Find footprints that are too large, have too many holes or are invalid.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        max_vertices (int): Largest number of ring vertices handled inline (default: 2000)
+        max_holes (int): Largest number of holes handled inline (default: 50)
+
+    Returns:
+        tuple: (polygon indices, list of reason strings per index)
+    """
+    num_polygons = len(footprints['feature_ids'])
+    if num_polygons == 0:
+        return np.arange(0), []
+
+    # Ring vertices (without closing points) and holes of every polygon
+    ring_counts = np.diff(footprints['ring_offsets']) - 1
+    polygon_offsets = footprints['polygon_offsets']
+    vertices = np.add.reduceat(ring_counts, polygon_offsets[:-1])
+    holes = np.diff(polygon_offsets) - 1
+
+    polygons = shapely.from_ragged_array(shapely.GeometryType.POLYGON, footprints['coords'],
+                                         (footprints['ring_offsets'], polygon_offsets))
+    invalid = ~shapely.is_valid(polygons)
+
+    flagged = np.flatnonzero((vertices > max_vertices) | (holes > max_holes) | invalid)
+    reasons = []
+    for idx in flagged.tolist():
+        reason = []
+        if vertices[idx] > max_vertices:
+            reason.append(f'{vertices[idx]} vertices')
+        if holes[idx] > max_holes:
+            reason.append(f'{holes[idx]} holes')
+        if invalid[idx]:
+            reason.append('invalid')
+        reasons.append(', '.join(reason))
+    return flagged, reasons
+
+def triangulate(rings):
+    """
+    Triangulate open rings (exterior first) the way ``build_mesh`` does.
+
+    Args:
+        rings (list): Ring coordinate arrays without the closing point
+
+    Returns:
+        dict: Triangulation with 'vertices' and 'triangles'
+    """
+    if len(rings) > 1:
+        triangulation = rings_to_triangle_hole(rings[0], rings[1:])
+    else:
+        triangulation = ring_to_triangle_normal(rings[0])
+    return {'vertices': triangulation['vertices'], 'triangles': triangulation['triangles']}
+
+def triangulate_worker(rings, connection):
+    """
+    Triangulate in a child process and send the result through a pipe.
+
+    Args:
+        rings (list): Ring coordinate arrays without the closing point
+        connection (multiprocessing.connection.Connection): Sending end of the pipe
+    """
+    connection.send(triangulate(rings))
+    connection.close()
+
+def triangulate_isolated(rings, time_budget=TIME_BUDGET):
+    """
+    Triangulate in a separate process that is killed when it exceeds the budget.
+
+    A crash of the triangulation library only ends the child process.
+
+    Args:
+        rings (list): Ring coordinate arrays without the closing point
+        time_budget (float): Seconds allowed (default: 5)
+
+    Returns:
+        dict or None: Triangulation, or None on timeout or crash
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=triangulate_worker, args=(rings, sender), daemon=True)
+    process.start()
+    sender.close()
+
+    result = None
+    try:
+        if receiver.poll(time_budget):
+            result = receiver.recv()
+    except EOFError:
+        # The child died before sending anything
+        result = None
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
+    return result
+
+def convex_hull_triangulation(rings):
+    """
+    Triangulate the convex hull of a footprint as a fan, without the triangulation library.
+
+    Args:
+        rings (list): Ring coordinate arrays without the closing point
+
+    Returns:
+        tuple: (open hull ring, triangulation with 'vertices' and 'triangles')
+    """
+    points = np.concatenate(rings)
+    hull = shapely.convex_hull(shapely.multipoints(points))
+    if shapely.get_type_id(hull) == shapely.GeometryType.POLYGON:
+        ring = shapely.get_coordinates(shapely.get_exterior_ring(hull))[:-1]
+    else:
+        # Collinear footprints have no area; their triangles are dropped as degenerate
+        ring = points[:3]
+    fan = np.column_stack([np.zeros(len(ring) - 2, dtype=np.int64), np.arange(1, len(ring) - 1),
+                           np.arange(2, len(ring))])
+    return ring, {'vertices': ring, 'triangles': fan}
+
+def guard_footprints(footprints, time_budget=TIME_BUDGET, max_vertices=MAX_RING_VERTICES, max_holes=MAX_HOLES):
+    """
+    Triangulate pathological footprints in isolation and replace the ones that fail.
+
+    Every flagged footprint is first triangulated as it is. When that times
+    out or crashes, its exterior is simplified (holes dropped) and tried once
+    more within the budget; the last resort is the convex hull, which needs no
+    triangulation library. Fallback footprints replace their geometry in the
+    buffers, and all successful triangulations are stored under
+    ``footprints['triangulations']`` for ``build_mesh`` to reuse. Polygon
+    indices, feature IDs and heights do not change.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        time_budget (float): Seconds allowed per footprint and attempt (default: 5)
+        max_vertices (int): Largest number of ring vertices handled inline (default: 2000)
+        max_holes (int): Largest number of holes handled inline (default: 50)
+
+    Returns:
+        tuple: (footprint buffers, report with 'pathological' (count) and
+               'fallbacks' (list of dicts with 'feature_id', 'reason', 'strategy', 'seconds'))
+    """
+    flagged, reasons = find_pathological(footprints, max_vertices, max_holes)
+    report = {'pathological': len(flagged), 'fallbacks': []}
+    if len(flagged) == 0:
+        return footprints, report
+
+    triangulations = {}
+    replaced = {}
+    for idx, reason in zip(flagged.tolist(), reasons):
+        start = time.perf_counter()
+        rings = feature_rings(footprints, idx)
+        triangulation = triangulate_isolated(rings, time_budget)
+        if triangulation is not None:
+            triangulations[idx] = triangulation
+            continue
+
+        # Simplified exterior without holes
+        strategy = 'simplified'
+        exterior = shapely.polygons(rings[0])
+        extent = np.ptp(rings[0], axis=0).max()
+        simplified = shapely.simplify(exterior, extent * SIMPLIFY_RATIO, preserve_topology=True)
+        if shapely.is_valid(simplified) and not shapely.is_empty(simplified):
+            ring = shapely.get_coordinates(shapely.get_exterior_ring(simplified))[:-1]
+            triangulation = triangulate_isolated([ring], time_budget)
+
+        # Convex hull as the last resort
+        if triangulation is None:
+            strategy = 'convex_hull'
+            ring, triangulation = convex_hull_triangulation(rings)
+
+        triangulations[idx] = triangulation
+        replaced[idx] = ring
+        report['fallbacks'].append({
+            'feature_id': int(footprints['feature_ids'][idx]),
+            'reason': reason,
+            'strategy': strategy,
+            'seconds': time.perf_counter() - start,
+        })
+
+    if replaced:
+        footprints = replace_rings(footprints, replaced)
+    footprints['triangulations'] = triangulations
+    return footprints, report
+
+def replace_rings(footprints, replaced):
+    """
+    Replace the geometry of some polygons by a single exterior ring each.
+
+    Args:
+        footprints (dict): Footprint buffers
+        replaced (dict): Open exterior ring per polygon index
+
+    Returns:
+        dict: New footprint buffers with the same polygons, feature IDs, heights and bounds
+    """
+    coords = footprints['coords']
+    ring_offsets = footprints['ring_offsets']
+    polygon_offsets = footprints['polygon_offsets']
+    ring_counts = np.diff(ring_offsets)
+    polygon_ring_counts = np.diff(polygon_offsets)
+
+    # Copy the untouched runs of polygons between the replaced ones in whole slices
+    coord_parts, ring_count_parts, polygon_parts = [], [], []
+    previous = 0
+    for idx in sorted(replaced) + [len(polygon_ring_counts)]:
+        first, last = polygon_offsets[previous], polygon_offsets[idx]
+        coord_parts.append(coords[ring_offsets[first]:ring_offsets[last]])
+        ring_count_parts.append(ring_counts[first:last])
+        polygon_parts.append(polygon_ring_counts[previous:idx])
+        if idx < len(polygon_ring_counts):
+            ring = np.vstack([replaced[idx], replaced[idx][:1]])
+            coord_parts.append(ring)
+            ring_count_parts.append([len(ring)])
+            polygon_parts.append([1])
+        previous = idx + 1
+
+    result = make_footprints(np.concatenate(coord_parts),
+                             np.concatenate([[0], np.cumsum(np.concatenate(ring_count_parts))]),
+                             np.concatenate([[0], np.cumsum(np.concatenate(polygon_parts))]),
+                             np.arange(len(polygon_ring_counts)))
+    result['feature_ids'] = footprints['feature_ids']
+    result['heights'] = footprints['heights']
+    result['bounds'] = footprints['bounds']
+    return result
+
+def print_guard_report(report):
+    """
+    Print the pathological footprints and their fallbacks.
+
+    Args:
+        report (dict): Report returned by ``guard_footprints``
+    """
+    if not report['pathological']:
+        return
+    print(f"Guard: {report['pathological']} pathological footprints, {len(report['fallbacks'])} fallbacks")
+    for fallback in report['fallbacks']:
+        print(f"  feature {fallback['feature_id']}: {fallback['strategy']} ({fallback['reason']}) "
+              f"after {fallback['seconds']:.2f} s")
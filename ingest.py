@@ -0,0 +1,437 @@
+"""
+Ingestion utilities for reading building footprints into flat coordinate buffers.
+This module reads GeoParquet, FlatGeobuf and (zipped) Shapefiles through the Arrow columnar path without creating per-row geometry objects.
+"""
+
+import json
+import struct
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pyogrio
+import pyogrio.raw
+
+# WKB geometry type codes handled by the decoder
+WKB_POLYGON = 3
+WKB_MULTIPOLYGON = 6
+
+def read_footprints(path, field=None):
+    """
+    Read building footprints from a GeoParquet, FlatGeobuf or (zipped) Shapefile.
+
+    Plain polygon Shapefiles are decoded by the memory-mapped reader in
+    ``shpreader``. Other sources are read as an Arrow geometry column and
+    decoded directly into flat coordinate and offset buffers, so no Shapely
+    object is ever created.
+    Multipolygon features are split into their polygon parts, which keep the
+    index of the source row in ``feature_ids``.
+
+    Args:
+        path (str): Path to a .parquet/.geoparquet, .fgb, .shp or .zip/.shp.zip file
+        field (str, optional): Field name containing building height data
+
+    Returns:
+        dict: Footprint buffers (see ``make_footprints``)
+    """
+    lower = str(path).lower()
+
+    if lower.endswith('.parquet') or lower.endswith('.geoparquet'):
+        return read_geoparquet(path, field)
+
+    if lower.endswith('.shp'):
+        # Plain polygon Shapefiles take the memory-mapped fast path
+        # (imported here because shpreader builds on make_footprints)
+        from shpreader import read_shapefile
+        try:
+            return read_shapefile(path, field)
+        except (ValueError, FileNotFoundError):
+            pass
+
+    # FlatGeobuf, Shapefile and zipped Shapefile are read by GDAL through pyogrio,
+    # which opens .zip archives in place via /vsizip/ without extracting them
+    meta, table = pyogrio.read_arrow(path, columns=[field] if field else [])
+    geometry = table.column(arrow_geometry_name(table, meta.get('geometry_name'))).combine_chunks()
+
+    return geometry_to_footprints(geometry, 'WKB', column_heights(table, field))
+
+def read_geoparquet(path, field=None):
+    """
+    Read building footprints from a GeoParquet file.
+
+    Both the WKB encoding and the native GeoArrow ``polygon``/``multipolygon``
+    encodings are supported. Native encodings are used zero-copy.
+
+    Args:
+        path (str): Path to the GeoParquet file
+        field (str, optional): Field name containing building height data
+
+    Returns:
+        dict: Footprint buffers (see ``make_footprints``)
+    """
+    geometry_name, encoding, _ = geoparquet_metadata(path)
+
+    # Read only the geometry and height columns from a memory-mapped file
+    columns = [geometry_name] + ([field] if field else [])
+    table = pq.read_table(path, columns=columns, memory_map=True)
+    geometry = table.column(geometry_name).combine_chunks()
+
+    return geometry_to_footprints(geometry, encoding, column_heights(table, field))
+
+def geoparquet_metadata(path):
+    """
+    Read the primary geometry column, its encoding and bounding box from GeoParquet metadata.
+
+    Args:
+        path (str): Path to the GeoParquet file
+
+    Returns:
+        tuple: (geometry column name, encoding, bbox list or None)
+    """
+    schema = pq.read_schema(path)
+    geo = {}
+    if schema.metadata and b'geo' in schema.metadata:
+        geo = json.loads(schema.metadata[b'geo'])
+    geometry_name = geo.get('primary_column', 'geometry')
+    column = geo.get('columns', {}).get(geometry_name, {})
+    return geometry_name, column.get('encoding', 'WKB'), column.get('bbox')
+
+def iter_footprints(path, field=None, batch_size=65536):
+    """
+    Read building footprints batch by batch instead of all at once.
+
+    GeoParquet is read row batch by row batch from a memory-mapped file, all
+    other formats through a GDAL Arrow stream. ``feature_ids`` stay global
+    source row indices across batches.
+
+    Args:
+        path (str): Path to a .parquet/.geoparquet, .fgb, .shp or .zip/.shp.zip file
+        field (str, optional): Field name containing building height data
+        batch_size (int): Number of source rows per batch (default: 65536)
+
+    Yields:
+        dict: Footprint buffers of one batch (see ``make_footprints``)
+    """
+    lower = str(path).lower()
+
+    if lower.endswith('.parquet') or lower.endswith('.geoparquet'):
+        geometry_name, encoding, _ = geoparquet_metadata(path)
+        columns = [geometry_name] + ([field] if field else [])
+        batches = pq.ParquetFile(path, memory_map=True).iter_batches(batch_size, columns=columns)
+        yield from batch_footprints(batches, geometry_name, encoding, field)
+        return
+
+    with pyogrio.raw.open_arrow(path, columns=[field] if field else [], batch_size=batch_size,
+                                use_pyarrow=True) as (meta, reader):
+        yield from batch_footprints(reader, meta.get('geometry_name'), 'WKB', field)
+
+def batch_footprints(batches, geometry_name, encoding, field):
+    """
+    Convert Arrow record batches into footprint buffers with global feature IDs.
+
+    Args:
+        batches (iterable): Arrow record batches
+        geometry_name (str): Name of the geometry column
+        encoding (str): Geometry encoding ('WKB', 'polygon' or 'multipolygon')
+        field (str, optional): Field name containing building height data
+
+    Yields:
+        dict: Footprint buffers of every non-empty batch
+    """
+    row_offset = 0
+    for batch in batches:
+        table = pa.Table.from_batches([batch])
+        geometry = table.column(arrow_geometry_name(table, geometry_name)).combine_chunks()
+        footprints = geometry_to_footprints(geometry, encoding, column_heights(table, field))
+        footprints['feature_ids'] = footprints['feature_ids'] + row_offset
+        row_offset += batch.num_rows
+        if len(footprints['feature_ids']) > 0:
+            yield footprints
+
+def footprint_bounds(path):
+    """
+    Get the total bounds of a footprint file without decoding its geometries where possible.
+
+    Args:
+        path (str): Path to a .parquet/.geoparquet, .fgb, .shp or .zip/.shp.zip file
+
+    Returns:
+        numpy.ndarray: Bounds [minx, miny, maxx, maxy]
+    """
+    lower = str(path).lower()
+
+    if lower.endswith('.parquet') or lower.endswith('.geoparquet'):
+        # The bbox of the GeoParquet metadata is optional and may be 3D (minx, miny, minz, maxx, ...)
+        bbox = geoparquet_metadata(path)[2]
+        if bbox:
+            half = len(bbox) // 2
+            return np.array([bbox[0], bbox[1], bbox[half], bbox[half + 1]], dtype=np.float64)
+        return read_geoparquet(path)['bounds']
+
+    return np.array(pyogrio.read_info(path, force_total_bounds=True)['total_bounds'], dtype=np.float64)
+
+def arrow_geometry_name(table, geometry_name=None):
+    """
+    Find the WKB geometry column of an Arrow table returned by pyogrio.
+
+    Args:
+        table (pyarrow.Table): Table read by ``pyogrio.read_arrow``
+        geometry_name (str, optional): Geometry column name reported by the driver
+
+    Returns:
+        str: Name of the geometry column
+    """
+    if geometry_name and geometry_name in table.column_names:
+        return geometry_name
+
+    # GDAL tags the geometry column with the GeoArrow WKB extension type
+    for field in table.schema:
+        if field.metadata and field.metadata.get(b'ARROW:extension:name') == b'geoarrow.wkb':
+            return field.name
+
+    return 'wkb_geometry' if 'wkb_geometry' in table.column_names else 'wkb'
+
+def column_heights(table, field):
+    """
+    Extract the height column of an Arrow table as a float array.
+
+    Args:
+        table (pyarrow.Table): Table holding the attribute columns
+        field (str, optional): Field name containing building height data
+
+    Returns:
+        numpy.ndarray or None: Heights per row with missing values set to 0
+    """
+    if not field:
+        return None
+
+    column = pc.cast(table.column(field), pa.float64())
+    return np.nan_to_num(column.to_numpy(zero_copy_only=False).astype(np.float64))
+
+def geometry_to_footprints(geometry, encoding, heights=None):
+    """
+    Convert an Arrow geometry array into footprint buffers.
+
+    Args:
+        geometry (pyarrow.Array): Geometry column (WKB binary or GeoArrow native)
+        encoding (str): GeoParquet encoding name ('WKB', 'polygon' or 'multipolygon')
+        heights (numpy.ndarray, optional): Height value per row
+
+    Returns:
+        dict: Footprint buffers (see ``make_footprints``)
+    """
+    encoding = encoding.lower()
+
+    if encoding == 'polygon':
+        # list<rings: list<points>>
+        polygon_offsets = geometry.offsets.to_numpy()
+        rings = geometry.values
+        feature_ids = np.arange(len(geometry))
+    elif encoding == 'multipolygon':
+        # list<polygons: list<rings: list<points>>>
+        part_offsets = geometry.offsets.to_numpy()
+        polygons = geometry.values
+        polygon_offsets = polygons.offsets.to_numpy()[part_offsets[0]:part_offsets[-1] + 1]
+        rings = polygons.values
+        feature_ids = np.repeat(np.arange(len(geometry)), np.diff(part_offsets))
+    else:
+        coords, ring_offsets, polygon_offsets, feature_ids = decode_wkb_polygons(geometry)
+        return make_footprints(coords, ring_offsets, polygon_offsets, feature_ids, heights)
+
+    ring_offsets = rings.offsets.to_numpy()
+    points = rings.values
+
+    # GeoArrow points are either separated (struct<x, y>) or interleaved (fixed_size_list)
+    if pa.types.is_struct(points.type):
+        coords = np.column_stack([points.field('x').to_numpy(), points.field('y').to_numpy()])
+    else:
+        dims = points.type.list_size
+        coords = points.values.to_numpy().reshape(-1, dims)[:, :2]
+
+    return make_footprints(coords, ring_offsets, polygon_offsets, feature_ids, heights)
+
+def decode_wkb_polygons(geometry):
+    """
+    Decode a WKB binary array of polygons and multipolygons into flat buffers.
+
+    Only the geometry headers are parsed per row; the coordinates of every ring
+    are copied from a strided view of the underlying Arrow data buffer.
+
+    Args:
+        geometry (pyarrow.Array): Binary or large binary array holding WKB
+
+    Returns:
+        tuple: (coords, ring_offsets, polygon_offsets, feature_ids)
+    """
+    # Access the Arrow offsets and data buffers without copying
+    buffers = geometry.buffers()
+    offset_type = np.int64 if pa.types.is_large_binary(geometry.type) else np.int32
+    offsets = np.frombuffer(buffers[1], dtype=offset_type)[geometry.offset:geometry.offset + len(geometry) + 1]
+    data = np.frombuffer(buffers[2], dtype=np.uint8) if buffers[2] is not None else np.empty(0, np.uint8)
+    valid = ~geometry.is_null().to_numpy(zero_copy_only=False)
+    raw = memoryview(data)
+
+    # Ring byte positions, point counts, point strides and byte orders
+    ring_starts = []
+    ring_counts = []
+    ring_strides = []
+    ring_big_endian = []
+    polygon_ring_counts = []
+    feature_ids = []
+
+    def read_polygon(position, feature_id):
+        # Parse a single WKB polygon header and record its rings
+        order = '<' if raw[position] == 1 else '>'
+        geometry_type, = struct.unpack_from(order + 'I', raw, position + 1)
+        dims = wkb_dimensions(geometry_type)
+        position += 9 if not geometry_type & 0x20000000 else 13
+        num_rings, = struct.unpack_from(order + 'I', raw, position - 4)
+        for _ in range(num_rings):
+            num_points, = struct.unpack_from(order + 'I', raw, position)
+            ring_starts.append(position + 4)
+            ring_counts.append(num_points)
+            ring_strides.append(8 * dims)
+            ring_big_endian.append(order == '>')
+            position += 4 + 8 * dims * num_points
+        if num_rings > 0:
+            polygon_ring_counts.append(num_rings)
+            feature_ids.append(feature_id)
+        return position
+
+    # Walk the geometry headers; other geometry types are skipped
+    for feature_id in range(len(geometry)):
+        if not valid[feature_id]:
+            continue
+        position = int(offsets[feature_id])
+        order = '<' if raw[position] == 1 else '>'
+        geometry_type, = struct.unpack_from(order + 'I', raw, position + 1)
+        base_type = (geometry_type & 0x0FFFFFFF) % 1000
+
+        if base_type == WKB_POLYGON:
+            read_polygon(position, feature_id)
+        elif base_type == WKB_MULTIPOLYGON:
+            # EWKB geometries may carry an SRID between the type code and the part count
+            position += 9 if not geometry_type & 0x20000000 else 13
+            num_parts, = struct.unpack_from(order + 'I', raw, position - 4)
+            for _ in range(num_parts):
+                position = read_polygon(position, feature_id)
+
+    ring_counts = np.asarray(ring_counts, dtype=np.int64)
+    ring_offsets = np.concatenate([[0], np.cumsum(ring_counts)])
+    polygon_offsets = np.concatenate([[0], np.cumsum(polygon_ring_counts)]).astype(np.int64)
+
+    # Copy x/y of every ring through a strided view of the data buffer, so no
+    # per-byte index is built; big-endian rings are swapped by the dtype
+    coords = np.empty((ring_offsets[-1], 2), dtype=np.float64)
+    for ring, (start, count, stride, big_endian) in enumerate(zip(ring_starts, ring_counts.tolist(), ring_strides,
+                                                                   ring_big_endian)):
+        coords[ring_offsets[ring]:ring_offsets[ring + 1]] = np.ndarray(
+            (count, 2), dtype='>f8' if big_endian else '<f8', buffer=data, offset=start, strides=(stride, 8))
+
+    return coords, ring_offsets, polygon_offsets, np.asarray(feature_ids, dtype=np.int64)
+
+def wkb_dimensions(geometry_type):
+    """
+    Get the number of coordinate dimensions of a WKB geometry type code.
+
+    Both ISO (e.g. 1003 for Polygon Z) and EWKB (high bit flags) codes are supported.
+
+    Args:
+        geometry_type (int): WKB geometry type code
+
+    Returns:
+        int: Number of ordinates per point (2, 3 or 4)
+    """
+    dims = 2
+    if geometry_type & 0x80000000:
+        dims += 1
+    if geometry_type & 0x40000000:
+        dims += 1
+    iso = (geometry_type & 0x0FFFFFFF) // 1000
+    if iso in (1, 2):
+        dims += 1
+    elif iso == 3:
+        dims += 2
+    return dims
+
+def make_footprints(coords, ring_offsets, polygon_offsets, feature_ids, heights=None):
+    """
+    Assemble the footprint buffers handed to the geometry stage.
+
+    Rings are stored closed (first point repeated at the end) as in WKB and
+    GeoArrow. The first ring of every polygon is its exterior ring.
+
+    Args:
+        coords (numpy.ndarray): Ring vertex coordinates with shape (N, 2)
+        ring_offsets (numpy.ndarray): Start index of every ring in ``coords`` plus the end
+        polygon_offsets (numpy.ndarray): Start index of every polygon in the rings plus the end
+        feature_ids (numpy.ndarray): Source row index of every polygon
+        heights (numpy.ndarray, optional): Height value per source row
+
+    Returns:
+        dict: Footprint buffers with keys 'coords', 'ring_offsets', 'polygon_offsets',
+              'feature_ids', 'heights' and 'bounds'
+    """
+    ring_offsets = np.asarray(ring_offsets, dtype=np.int64)
+    polygon_offsets = np.asarray(polygon_offsets, dtype=np.int64)
+    feature_ids = np.asarray(feature_ids, dtype=np.int64)
+
+    # Drop empty polygons; their offsets collapse so the remaining ones stay contiguous
+    keep = np.diff(polygon_offsets) > 0
+    if not keep.all():
+        polygon_offsets = np.append(polygon_offsets[:-1][keep], polygon_offsets[-1])
+        feature_ids = feature_ids[keep]
+
+    # Compact the buffers so that they start at the first referenced ring and point
+    ring_offsets = ring_offsets[polygon_offsets[0]:polygon_offsets[-1] + 1]
+    polygon_offsets = polygon_offsets - polygon_offsets[0]
+    coords = np.asarray(coords, dtype=np.float64)[ring_offsets[0]:ring_offsets[-1]]
+    ring_offsets = ring_offsets - ring_offsets[0]
+
+    # Total bounds of all footprints [minx, miny, maxx, maxy]
+    if len(coords) > 0:
+        bounds = np.concatenate([coords.min(axis=0), coords.max(axis=0)])
+    else:
+        bounds = np.zeros(4)
+
+    return {
+        'coords': coords,
+        'ring_offsets': ring_offsets,
+        'polygon_offsets': polygon_offsets,
+        'feature_ids': feature_ids,
+        'heights': heights[feature_ids] if heights is not None else None,
+        'bounds': bounds,
+    }
+
+def feature_rings(footprints, index):
+    """
+    Get the open rings of a single footprint polygon.
+
+    Args:
+        footprints (dict): Footprint buffers
+        index (int): Polygon index
+
+    Returns:
+        list: Ring coordinate arrays without the closing point, exterior first
+    """
+    coords = footprints['coords']
+    ring_offsets = footprints['ring_offsets']
+    polygon_offsets = footprints['polygon_offsets']
+
+    rings = []
+    for ring in range(polygon_offsets[index], polygon_offsets[index + 1]):
+        rings.append(coords[ring_offsets[ring]:ring_offsets[ring + 1] - 1])
+    return rings
+
+def footprint_center(footprints):
+    """
+    Calculate the center point of all footprints from their total bounds.
+
+    Args:
+        footprints (dict): Footprint buffers
+
+    Returns:
+        numpy.ndarray: Center coordinates (longitude, latitude)
+    """
+    bounds = footprints['bounds']
+    return np.array([(bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2])
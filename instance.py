@@ -0,0 +1,203 @@
+"""
+Detection of repeated building footprints for GPU instancing.
+This module canonicalizes footprints independent of translation, rotation and start vertex, groups congruent ones and builds each group's mesh once.
+"""
+
+import numpy as np
+from coordinate import calculate_coordinate, polygon_centroid
+from ingest import feature_rings
+
+# WGS-84 ellipsoid parameters for the local metric approximation
+WGS84_A = 6378137.0
+WGS84_E2 = 6.69437999014e-3
+
+def find_instances(footprints, min_count=2, tolerance=0.01, candidates=None):
+    """
+    Group congruent footprints so that each group can be built once and instanced.
+
+    Every hole-free footprint is converted to local meters around its area
+    centroid (X north, Z east, as in ``calculate_coordinate``). Its exterior ring
+    is then rotated so that a start vertex lies on the +X axis, for every
+    possible start vertex, and the lexicographically smallest quantized ring is
+    its canonical form. Footprints with the same canonical form are congruent
+    up to ``tolerance``; all of them share the same extrusion height, so measured
+    heights (``footprints['extrusions']``) must match as well.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        min_count (int): Minimum number of congruent footprints to form a group (default: 2)
+        tolerance (float): Quantization step in meters for comparing shapes (default: 0.01)
+        candidates (numpy.ndarray, optional): Polygon indices allowed to be instanced (default: all)
+
+    Returns:
+        dict: Instancing plan with keys
+              'groups' - list of dicts with 'members' (polygon indices, prototype first)
+                         and 'angles' (rotation of every member from the canonical form)
+              'singles' - sorted polygon indices that are built individually
+    """
+    num_polygons = len(footprints['feature_ids'])
+    if candidates is None:
+        candidates = np.arange(num_polygons)
+
+    shapes = {}
+    for idx in candidates:
+        rings = feature_rings(footprints, idx)
+        if len(rings) != 1:
+            # Footprints with holes are always built individually
+            continue
+        key, angle = canonical_form(rings[0], polygon_centroid(rings), tolerance)
+        if key is not None and footprints.get('extrusions') is not None:
+            # Measured heights differ per building, so they are part of the shape
+            key = (key, round(footprints['extrusions'][idx] / tolerance))
+        if key is not None:
+            shapes.setdefault(key, []).append((idx, angle))
+
+    groups = []
+    instanced = np.zeros(num_polygons, dtype=bool)
+    for members in shapes.values():
+        if len(members) < min_count:
+            continue
+        indices = np.array([member[0] for member in members])
+        groups.append({'members': indices, 'angles': np.array([member[1] for member in members])})
+        instanced[indices] = True
+
+    return {'groups': groups, 'singles': np.flatnonzero(~instanced)}
+
+def canonical_form(ring, centroid, tolerance):
+    """
+    Calculate the canonical form of a footprint ring.
+
+    Args:
+        ring (numpy.ndarray): Exterior ring in longitude/latitude without the closing point
+        centroid (numpy.ndarray): Area centroid of the footprint (longitude, latitude)
+        tolerance (float): Quantization step in meters
+
+    Returns:
+        tuple: (hashable canonical key, rotation angle in radians from the canonical
+               form to the footprint), or (None, None) for degenerate rings
+    """
+    local = local_meters(ring, centroid)
+
+    # Start vertices at the centroid have no direction and cannot anchor the rotation
+    radius = np.hypot(local[:, 0], local[:, 1])
+    starts = np.flatnonzero(radius > tolerance)
+    if len(starts) == 0:
+        return None, None
+
+    # Rotate every candidate start vertex onto the +X axis
+    angles = np.arctan2(local[starts, 1], local[starts, 0])
+    cos, sin = np.cos(-angles)[:, None], np.sin(-angles)[:, None]
+    rolled = np.stack([np.roll(local, -start, axis=0) for start in starts])
+    rotated_x = rolled[:, :, 0] * cos - rolled[:, :, 1] * sin
+    rotated_z = rolled[:, :, 0] * sin + rolled[:, :, 1] * cos
+    quantized = np.round(np.stack([rotated_x, rotated_z], axis=2) / tolerance).astype(np.int64)
+
+    # The lexicographically smallest candidate is the canonical form
+    flat = quantized.reshape(len(starts), -1)
+    best = np.lexsort(flat.T[::-1])[0]
+
+    return (len(ring), flat[best].tobytes()), float(angles[best])
+
+def local_meters(points, origin):
+    """
+    Project longitude/latitude points to local meters around an origin.
+
+    This is an equirectangular approximation on the WGS-84 ellipsoid, accurate
+    to millimeters over the extent of a building.
+
+    Args:
+        points (numpy.ndarray): Coordinates (longitude, latitude) with shape (N, 2)
+        origin (numpy.ndarray): Origin (longitude, latitude)
+
+    Returns:
+        numpy.ndarray: Local coordinates [X north, Z east] in meters
+    """
+    latitude = np.radians(origin[1])
+    w = 1 - WGS84_E2 * np.sin(latitude) ** 2
+    meridian = WGS84_A * (1 - WGS84_E2) / w ** 1.5
+    prime_vertical = WGS84_A / np.sqrt(w)
+
+    north = np.radians(points[:, 1] - origin[1]) * meridian
+    east = np.radians(points[:, 0] - origin[0]) * prime_vertical * np.cos(latitude)
+    return np.column_stack([north, east])
+
+def rotate_xz(positions, angles):
+    """
+    Rotate positions in the horizontal X/Z plane, from +X towards +Z.
+
+    Args:
+        positions (numpy.ndarray): Positions with shape (N, 3)
+        angles (numpy.ndarray or float): Rotation angle in radians (one per position or shared)
+
+    Returns:
+        numpy.ndarray: Rotated positions
+    """
+    cos, sin = np.cos(angles), np.sin(angles)
+    rotated = positions.copy()
+    rotated[:, 0] = positions[:, 0] * cos - positions[:, 2] * sin
+    rotated[:, 2] = positions[:, 0] * sin + positions[:, 2] * cos
+    return rotated
+
+def instance_translations(footprints, shp_center, members):
+    """
+    Calculate where every group member is placed in the model.
+
+    Args:
+        footprints (dict): Footprint buffers
+        shp_center (numpy.ndarray): Global center used for coordinate normalization
+        members (numpy.ndarray): Polygon indices of the group
+
+    Returns:
+        numpy.ndarray: Translation [X, Y, Z] of every member (centroid offset and base height)
+    """
+    translations = np.zeros((len(members), 3))
+    for row, idx in enumerate(members):
+        center = calculate_coordinate(polygon_centroid(feature_rings(footprints, idx)), shp_center)
+        translations[row] = [center[0], footprints['heights'][idx] if footprints['heights'] is not None else 0, center[1]]
+    return translations
+
+def build_prototype(positions, translation, angle):
+    """
+    Move a group's first member mesh into the canonical instance frame.
+
+    Args:
+        positions (list): Vertex positions of the first member built by ``build_mesh``
+        translation (numpy.ndarray): Translation of the first member
+        angle (float): Rotation of the first member from the canonical form
+
+    Returns:
+        numpy.ndarray: Prototype vertex positions centered on the origin in canonical orientation
+    """
+    return rotate_xz(np.asarray(positions, dtype=np.float64) - translation, -angle)
+
+def expand_instances(prototype, translations, angles):
+    """
+    Place copies of a prototype mesh at every group member.
+
+    Args:
+        prototype (numpy.ndarray): Prototype vertex positions with shape (N, 3)
+        translations (numpy.ndarray): Translation of every member with shape (M, 3)
+        angles (numpy.ndarray): Rotation of every member from the canonical form
+
+    Returns:
+        numpy.ndarray: Vertex positions of all copies with shape (M * N, 3), member by member
+    """
+    copies = np.tile(prototype, (len(translations), 1))
+    copies = rotate_xz(copies, np.repeat(angles, len(prototype)))
+    return copies + np.repeat(translations, len(prototype), axis=0)
+
+def instance_rotations(angles):
+    """
+    Convert horizontal rotation angles into glTF rotation quaternions.
+
+    A rotation from +X towards +Z is a rotation by the negated angle about +Y.
+
+    Args:
+        angles (numpy.ndarray): Rotation angles in radians
+
+    Returns:
+        numpy.ndarray: Quaternions (x, y, z, w) with shape (M, 4)
+    """
+    half = -np.asarray(angles) / 2
+    zeros = np.zeros_like(half)
+    return np.column_stack([zeros, np.sin(half), zeros, np.cos(half)])
@@ -0,0 +1,350 @@
+"""
+Per-building heights from local LAS point clouds.
+This module streams the points of a LAS file through a memory map in chunks, assigns them to footprints with an STRtree and vectorized point-in-polygon tests, and derives a robust roof height per building that is cached per feature.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import struct
+import uuid
+import numpy as np
+import shapely
+from ingest import feature_rings
+
+# Points read and assigned at a time
+CHUNK_POINTS = 2_000_000
+
+# Roof level: this percentile of the points inside a footprint, robust to antennas and chimneys
+ROOF_PERCENTILE = 95
+
+# Ground level: this percentile of the points in a ring around the footprint
+GROUND_PERCENTILE = 10
+
+# Width of the ring around a footprint searched for ground points, in coordinate units (degrees, about 5 m)
+GROUND_BUFFER = 5e-5
+
+# Vertical resolution of the per-building height distributions in meters
+LEVEL_RESOLUTION = 0.1
+
+# Footprints with fewer roof or ground points keep the default building height
+MIN_POINTS = 10
+
+# ASPRS classes: ground and low/high noise
+CLASS_GROUND = 2
+NOISE_CLASSES = (7, 18)
+
+# Per-feature heights of every point cloud, reused by later runs
+CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'shp-transform-obj', 'lidar')
+
+# Number of part files of a cache directory above which a writer merges them
+MAX_CACHE_PARTS = 16
+
+def read_las_header(las_path):
+    """
+    Read the public header block of a LAS 1.0-1.4 file.
+
+    Args:
+        las_path (str): Path to the LAS file
+
+    Returns:
+        dict: Point data offset, format, record length and count, scale, offset and bounds
+    """
+    with open(las_path, 'rb') as f:
+        header = f.read(375)
+    if header[:4] != b'LASF':
+        raise ValueError(f'{las_path} is not a LAS file')
+
+    header_size, = struct.unpack_from('<H', header, 94)
+    point_offset, = struct.unpack_from('<I', header, 96)
+    point_format, record_length = struct.unpack_from('<BH', header, 104)
+    count, = struct.unpack_from('<I', header, 107)
+    scale = np.array(struct.unpack_from('<3d', header, 131))
+    offset = np.array(struct.unpack_from('<3d', header, 155))
+    max_x, min_x, max_y, min_y, max_z, min_z = struct.unpack_from('<6d', header, 179)
+
+    # LAZ marks its compressed point records with the two high bits of the format
+    if point_format & 0xC0 or str(las_path).lower().endswith('.laz'):
+        raise ValueError(f'Compressed LAZ point clouds are not supported; decompress {las_path} with laszip first')
+    if point_format > 10:
+        raise ValueError(f'Unsupported LAS point data format {point_format}')
+
+    # LAS 1.4 keeps the full 64-bit point count after the legacy header fields
+    if header_size >= 375:
+        count = max(count, struct.unpack_from('<Q', header, 247)[0])
+
+    return {
+        'point_offset': point_offset,
+        'point_format': point_format,
+        'record_length': record_length,
+        'count': count,
+        'scale': scale,
+        'offset': offset,
+        'bounds': (min_x, min_y, max_x, max_y),
+        'z_range': (min_z, max_z),
+    }
+
+def las_chunks(las_path, chunk_points=CHUNK_POINTS):
+    """
+    Stream the points of a LAS file in chunks through a memory map.
+
+    Only the current chunk is decoded, so point clouds larger than RAM can be read.
+
+    Args:
+        las_path (str): Path to the LAS file
+        chunk_points (int): Number of points per chunk (default: 2M)
+
+    Yields:
+        tuple: (x, y, z, classification) arrays of one chunk
+    """
+    header = read_las_header(las_path)
+    if header['count'] == 0:
+        return
+
+    # Formats 6-10 store the classification in a full byte after the return and flag bytes
+    extended = header['point_format'] >= 6
+    record = np.dtype({
+        'names': ['x', 'y', 'z', 'classification'],
+        'formats': ['<i4', '<i4', '<i4', 'u1'],
+        'offsets': [0, 4, 8, 16 if extended else 15],
+        'itemsize': header['record_length'],
+    })
+    points = np.memmap(las_path, dtype=record, mode='r', offset=header['point_offset'], shape=(header['count'],))
+    scale, offset = header['scale'], header['offset']
+
+    for start in range(0, header['count'], chunk_points):
+        chunk = np.array(points[start:start + chunk_points])
+        classification = chunk['classification'] if extended else chunk['classification'] & 0x1F
+        yield (chunk['x'] * scale[0] + offset[0], chunk['y'] * scale[1] + offset[1],
+               chunk['z'] * scale[2] + offset[2], classification)
+
+def footprint_keys(footprints, indices):
+    """
+    Identify footprints by their geometry, so cached heights survive reordering of the input.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        indices (numpy.ndarray): Polygon indices
+
+    Returns:
+        list: Hex digest per polygon
+    """
+    return [hashlib.sha1(np.concatenate(feature_rings(footprints, idx)).tobytes()).hexdigest() for idx in indices]
+
+def cache_path(las_path):
+    """
+    Get the cache directory of a point cloud and the height settings.
+
+    Args:
+        las_path (str): Path to the LAS file
+
+    Returns:
+        str: Path of the cache directory
+    """
+    stat = os.stat(las_path)
+    signature = json.dumps([os.path.abspath(las_path), stat.st_size, stat.st_mtime_ns, ROOF_PERCENTILE,
+                            GROUND_PERCENTILE, GROUND_BUFFER, LEVEL_RESOLUTION, MIN_POINTS])
+    return os.path.join(CACHE_DIRECTORY, hashlib.sha256(signature.encode()).hexdigest()[:32])
+
+def read_cache_parts(path):
+    """
+    Read every part file of a cache directory.
+
+    Args:
+        path (str): Path of the cache directory
+
+    Returns:
+        tuple: (height per footprint key, paths of the parts read)
+    """
+    cache = {}
+    parts = []
+    for part in sorted(glob.glob(os.path.join(glob.escape(path), '*.json'))):
+        # Another run may have merged the part away since it was listed
+        try:
+            with open(part) as f:
+                content = json.load(f)
+        except FileNotFoundError:
+            continue
+        cache.update({key: float('nan') if value is None else value for key, value in content.items()})
+        parts.append(part)
+    return cache, parts
+
+def load_cache(path):
+    """
+    Read cached heights.
+
+    Args:
+        path (str): Path of the cache directory
+
+    Returns:
+        dict: Height per footprint key (NaN for footprints without enough points)
+    """
+    return read_cache_parts(path)[0]
+
+def write_cache_part(path, heights):
+    """
+    Write heights to a new part file, replaced into place atomically.
+
+    Args:
+        path (str): Path of the cache directory
+        heights (dict): Height per footprint key
+    """
+    part = os.path.join(path, f'{os.getpid()}-{uuid.uuid4().hex}.json')
+    with open(part + '.tmp', 'w') as f:
+        json.dump({key: None if np.isnan(value) else value for key, value in heights.items()}, f)
+    os.replace(part + '.tmp', part)
+
+def save_cache(path, heights):
+    """
+    Add heights to the cache directory.
+
+    Concurrent runs (e.g. shards) share the directory without locks: every
+    run adds its heights as a new part file, so no update can overwrite
+    another, and readers merge all parts. Once there are more than
+    ``MAX_CACHE_PARTS`` parts, the writer merges the ones it read into a new
+    part before deleting them, so every height stays in some part.
+
+    Args:
+        path (str): Path of the cache directory
+        heights (dict): Height per footprint key
+    """
+    os.makedirs(path, exist_ok=True)
+    write_cache_part(path, heights)
+
+    cache, parts = read_cache_parts(path)
+    if len(parts) > MAX_CACHE_PARTS:
+        write_cache_part(path, cache)
+        for part in parts:
+            try:
+                os.remove(part)
+            except FileNotFoundError:
+                pass
+
+def count_levels(levels, owners, values, num_levels):
+    """
+    Add points to the per-footprint height distributions.
+
+    Every distribution is kept as counts per height level, so memory grows
+    with the number of distinct levels per building, not with the points.
+
+    Args:
+        levels (tuple): (keys, counts) of the distributions so far
+        owners (numpy.ndarray): Footprint of every new point
+        values (numpy.ndarray): Height level of every new point
+        num_levels (int): Number of height levels
+
+    Returns:
+        tuple: Updated (keys, counts) sorted by footprint and level
+    """
+    keys = np.concatenate([levels[0], owners.astype(np.int64) * num_levels + values])
+    counts = np.concatenate([levels[1], np.ones(len(owners), dtype=np.int64)])
+    keys, inverse = np.unique(keys, return_inverse=True)
+    return keys, np.bincount(inverse.reshape(-1), weights=counts, minlength=len(keys)).astype(np.int64)
+
+def level_percentiles(levels, num_owners, num_levels, percentile):
+    """
+    Read a percentile from every per-footprint height distribution.
+
+    Args:
+        levels (tuple): (keys, counts) sorted by footprint and level
+        num_owners (int): Number of footprints
+        num_levels (int): Number of height levels
+        percentile (float): Percentile between 0 and 100
+
+    Returns:
+        tuple: (level of the percentile, number of points) per footprint; the level is -1 without points
+    """
+    keys, counts = levels
+    owners = keys // num_levels
+    totals = np.bincount(owners, weights=counts, minlength=num_owners).astype(np.int64)
+    result = np.full(num_owners, -1, dtype=np.int64)
+    if len(keys) == 0:
+        return result, totals
+
+    # First level whose cumulative count within its footprint reaches the percentile
+    cumulative = np.cumsum(counts)
+    before = np.concatenate([[0], np.cumsum(totals)[:-1]])
+    present = np.flatnonzero(totals)
+    targets = before[present] + np.maximum(np.ceil(totals[present] * percentile / 100), 1)
+    result[present] = keys[np.searchsorted(cumulative, targets)] % num_levels
+    return result, totals
+
+def lidar_heights(footprints, las_path, indices=None, chunk_points=CHUNK_POINTS, use_cache=True):
+    """
+    Derive the height of every building from a LAS point cloud.
+
+    The roof level is a high percentile of the points inside a footprint and
+    the ground level a low percentile of the points in a ring around it;
+    noise points are ignored and ground-classified points never count as
+    roof. Points are assigned with an STRtree query of the chunk's points
+    against the footprints ('within' predicate), so only the chunk is ever
+    in memory. Heights are cached per footprint geometry, and the point cloud
+    is read only when some footprint is not cached yet. The point cloud must
+    use the same coordinate system as the footprints, with heights in meters.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        las_path (str): Path to the LAS file
+        indices (numpy.ndarray, optional): Polygon indices (default: all)
+        chunk_points (int): Number of points per chunk (default: 2M)
+        use_cache (bool): Whether to read and update the per-feature cache (default: True)
+
+    Returns:
+        tuple: (height above ground per polygon, NaN where the cloud has too few
+               points, statistics with 'points', 'cached' and 'missing')
+    """
+    if indices is None:
+        indices = np.arange(len(footprints['feature_ids']))
+    heights = np.full(len(footprints['feature_ids']), np.nan)
+    keys = footprint_keys(footprints, indices)
+    path = cache_path(las_path)
+    cache = load_cache(path) if use_cache else {}
+
+    cached = np.array([key in cache for key in keys], dtype=bool)
+    heights[indices[cached]] = [cache[key] for key, hit in zip(keys, cached) if hit]
+    stats = {'points': 0, 'cached': int(cached.sum()), 'missing': 0}
+
+    pending = indices[~cached]
+    if len(pending):
+        header = read_las_header(las_path)
+        z_min = header['z_range'][0]
+        num_levels = int(np.ceil((header['z_range'][1] - z_min) / LEVEL_RESOLUTION)) + 1
+
+        polygons = shapely.from_ragged_array(shapely.GeometryType.POLYGON, footprints['coords'],
+                                             (footprints['ring_offsets'], footprints['polygon_offsets']))[pending]
+        rings = shapely.difference(shapely.buffer(polygons, GROUND_BUFFER), polygons)
+        roof_tree, ground_tree = shapely.STRtree(polygons), shapely.STRtree(rings)
+        min_x, min_y, max_x, max_y = shapely.total_bounds(rings)
+
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        roof_levels, ground_levels = empty, empty
+        for x, y, z, classification in las_chunks(las_path, chunk_points):
+            stats['points'] += len(x)
+
+            # Only points near some footprint become geometries
+            near = (x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y) & ~np.isin(classification, NOISE_CLASSES)
+            if not near.any():
+                continue
+            x, y, classification = x[near], y[near], classification[near]
+            values = np.clip(np.round((z[near] - z_min) / LEVEL_RESOLUTION), 0, num_levels - 1).astype(np.int64)
+            points = shapely.points(x, y)
+
+            point_index, owners = roof_tree.query(points, predicate='within')
+            roof = classification[point_index] != CLASS_GROUND
+            roof_levels = count_levels(roof_levels, owners[roof], values[point_index[roof]], num_levels)
+
+            point_index, owners = ground_tree.query(points, predicate='within')
+            ground_levels = count_levels(ground_levels, owners, values[point_index], num_levels)
+
+        roof, roof_counts = level_percentiles(roof_levels, len(pending), num_levels, ROOF_PERCENTILE)
+        ground, ground_counts = level_percentiles(ground_levels, len(pending), num_levels, GROUND_PERCENTILE)
+        measured = np.where((roof_counts >= MIN_POINTS) & (ground_counts >= MIN_POINTS) & (roof > ground),
+                            (roof - ground) * LEVEL_RESOLUTION, np.nan)
+        heights[pending] = measured
+
+        if use_cache:
+            save_cache(path, {key: float(value) for key, value, hit in zip(keys, heights[indices], cached) if not hit})
+
+    stats['missing'] = int(np.isnan(heights[indices]).sum())
+    return heights, stats
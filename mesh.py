@@ -0,0 +1,298 @@
+"""
+In-memory mesh API for embedding the conversion without touching the file system.
+This module builds extruded buildings into a mesh object holding NumPy arrays and exports OBJ or GLB bytes, optionally straight into a caller-provided buffer.
+"""
+
+import numpy as np
+from glb import glb_bytes, write_parts, concatenate_ranges, MAX_CHUNK_VERTICES
+from ply import ply_chunks
+from shp2obj import load_footprints, build_mesh
+from weld import weld_mesh
+from optimize import optimize_mesh, CACHE_SIZE
+from rotation import apply_transform
+from clean import drop_degenerate_faces
+
+# Number of OBJ lines formatted and copied to the output at a time
+OBJ_BLOCK_LINES = 65536
+
+class Mesh:
+    """
+    Extruded building mesh held in NumPy arrays.
+
+    Attributes:
+        positions (numpy.ndarray): Vertex positions [x, y, z] with shape (N, 3)
+        indices (numpy.ndarray): 0-based triangle vertex indices with shape (M, 3)
+        ranges (numpy.ndarray): Per-feature [vertex_start, vertex_end, face_start, face_end] rows
+        feature_ids (numpy.ndarray): Source feature ID of every range row
+        center (numpy.ndarray): Global center (longitude, latitude) the positions are relative to
+    """
+
+    def __init__(self, positions, indices, ranges, feature_ids, center):
+        """
+        Args:
+            positions (numpy.ndarray): Vertex positions with shape (N, 3)
+            indices (numpy.ndarray): 0-based triangle vertex indices with shape (M, 3)
+            ranges (numpy.ndarray): Per-feature ranges with shape (F, 4)
+            feature_ids (numpy.ndarray): Source feature ID of every range row
+            center (numpy.ndarray): Global center (longitude, latitude)
+        """
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+        self.ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 4)
+        self.feature_ids = np.asarray(feature_ids, dtype=np.int64)
+        self.center = np.asarray(center, dtype=np.float64)
+        self._normals = None
+
+    @classmethod
+    def build(cls, shp_path, field=None, building_height=3, cull=False, dem_path=None, dem_mode='vertices',
+              lidar_path=None):
+        """
+        Read footprints and extrude them into a mesh, as ``shp2obj`` does.
+
+        Args:
+            shp_path (str): Path to the input Shapefile, GeoParquet, FlatGeobuf or zipped Shapefile
+            field (str, optional): Field name containing building height data
+            building_height (float): Default building height in meters (default: 3)
+            cull (bool): Whether to drop bottom caps and walls hidden between adjacent buildings (default: False)
+            dem_path (str, optional): GeoTIFF DEM used to place building bases on the terrain
+            dem_mode (str): Sample the DEM at footprint 'vertices' or 'centroid' (default: 'vertices')
+            lidar_path (str, optional): LAS point cloud to measure building heights from
+
+        Returns:
+            Mesh: The extruded buildings
+        """
+        footprints, shp_center, culling = load_footprints(shp_path, field, building_height, cull, dem_path, dem_mode,
+                                                          lidar_path=lidar_path)
+        return cls.from_footprints(footprints, shp_center, building_height, culling=culling)
+
+    @classmethod
+    def from_footprints(cls, footprints, shp_center, building_height=3, indices=None, culling=None):
+        """
+        Extrude footprint buffers into a mesh.
+
+        Zero-area triangles are dropped, as ``shp2obj`` does, so every face has a defined normal.
+
+        Args:
+            footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+            shp_center (numpy.ndarray): Global center used for coordinate normalization
+            building_height (float): Default building height in meters (default: 3)
+            indices (numpy.ndarray, optional): Polygon indices to extrude (default: all)
+            culling (dict, optional): Hidden walls from ``cull.find_hidden_walls``
+
+        Returns:
+            Mesh: The extruded buildings
+        """
+        if indices is None:
+            indices = np.arange(len(footprints['feature_ids']))
+        positions, faces, ranges = build_mesh(footprints, shp_center, building_height, indices, culling)
+        faces, ranges, _ = drop_degenerate_faces(positions, faces, ranges)
+        return cls(positions, np.asarray(faces, dtype=np.int64).reshape(-1, 3) - 1, ranges,
+                   footprints['feature_ids'][indices], shp_center)
+
+    @property
+    def normals(self):
+        """
+        Face normals, computed once on first use (same values as ``normal.obj_normals``).
+
+        Returns:
+            numpy.ndarray: Unit normal of every triangle rounded to 4 decimals with shape (M, 3)
+        """
+        if self._normals is None:
+            p1, p2, p3 = (self.positions[self.indices[:, k]] for k in range(3))
+            n = np.cross(p2 - p1, p3 - p1)
+            self._normals = np.around(n / np.linalg.norm(n, axis=1)[:, None], decimals=4)
+        return self._normals
+
+    def weld(self, tolerance=1e-3, keep_features=True):
+        """
+        Create a mesh with vertices closer than a tolerance merged (see ``weld.weld_mesh``).
+
+        Args:
+            tolerance (float): Merge distance in meters (default: 1e-3)
+            keep_features (bool): Never merge vertices of different features (default: True);
+                                  otherwise the result is a single feature with ID -1,
+                                  suited to position-only output
+
+        Returns:
+            Mesh: Welded mesh
+        """
+        positions, faces, ranges = weld_mesh(self.positions, self.indices + 1, self.ranges, tolerance, keep_features)
+        feature_ids = self.feature_ids if keep_features else np.array([-1])
+        return Mesh(positions, faces - 1, ranges, feature_ids, self.center)
+
+    def optimize(self, cache_size=CACHE_SIZE):
+        """
+        Create a mesh reordered for the GPU vertex cache (see ``optimize.optimize_mesh``).
+
+        Args:
+            cache_size (int): Number of vertices of the simulated cache (default: 32)
+
+        Returns:
+            tuple: (optimized Mesh, statistics with 'acmr_before' and 'acmr_after')
+        """
+        positions, faces, ranges, stats = optimize_mesh(self.positions, self.indices + 1, self.ranges, cache_size)
+        return Mesh(positions, faces - 1, ranges, self.feature_ids, self.center), stats
+
+    def transform(self, matrix):
+        """
+        Apply a 4x4 transform to the positions and cached normals in place (see ``rotation.apply_transform``).
+
+        Mirroring transforms reverse the triangles so that they keep facing outwards.
+
+        Args:
+            matrix (numpy.ndarray): Homogeneous matrix, e.g. ``rotation.axis_swap_matrix('y-up', 'z-up')``
+
+        Returns:
+            Mesh: This mesh
+        """
+        self.positions, self._normals = apply_transform(matrix, self.positions, self._normals)
+        if np.linalg.det(np.asarray(matrix, dtype=np.float64)[:3, :3]) < 0:
+            self.indices = self.indices[:, ::-1].copy()
+        return self
+
+    def select(self, rows):
+        """
+        Create a mesh holding only some of the features, e.g. for one tile.
+
+        Args:
+            rows (numpy.ndarray): Range row indices to keep
+
+        Returns:
+            Mesh: New mesh with compact vertex and index arrays
+        """
+        ranges = self.ranges[rows]
+        vertex_counts = ranges[:, 1] - ranges[:, 0]
+        face_counts = ranges[:, 3] - ranges[:, 2]
+        vertex_starts = np.concatenate([[0], np.cumsum(vertex_counts)[:-1]])
+        face_starts = np.concatenate([[0], np.cumsum(face_counts)[:-1]])
+
+        vertices = concatenate_ranges(ranges[:, 0], vertex_counts)
+        faces = concatenate_ranges(ranges[:, 2], face_counts)
+        shift = np.repeat(vertex_starts - ranges[:, 0], face_counts)
+
+        new_ranges = np.column_stack([vertex_starts, vertex_starts + vertex_counts,
+                                      face_starts, face_starts + face_counts])
+        return Mesh(self.positions[vertices], self.indices[faces] + shift[:, None], new_ranges,
+                    self.feature_ids[rows], self.center)
+
+    def to_obj(self, out=None, normals=False):
+        """
+        Export the mesh as OBJ text, in the same layout as ``save.write_obj_default``
+        and ``save.write_obj_normal``.
+
+        Lines are formatted block by block, and every block is encoded straight
+        into ``out`` when it is given, so the whole text never exists twice.
+
+        Args:
+            out (writable buffer, optional): bytearray, memoryview, mmap or NumPy array to write into
+            normals (bool): Whether to include face normals (default: False)
+
+        Returns:
+            bytes or int: OBJ content, or the number of bytes written into ``out``
+        """
+        blocks = self.obj_blocks(normals)
+        if out is None:
+            return b''.join(blocks)
+        return write_blocks(out, blocks)
+
+    def obj_blocks(self, normals=False):
+        """
+        Generate the OBJ content as encoded blocks of lines.
+
+        Args:
+            normals (bool): Whether to include face normals (default: False)
+
+        Yields:
+            bytes: Consecutive parts of the OBJ content
+        """
+        yield b'# Generated OBJ file\n'
+        positions = self.positions.tolist()
+        faces = (self.indices + 1).tolist()
+
+        if not normals:
+            for start in range(0, len(positions), OBJ_BLOCK_LINES):
+                yield ''.join(f'v {p[0]} {p[1]} {p[2]}\n' for p in positions[start:start + OBJ_BLOCK_LINES]).encode()
+            for start in range(0, len(faces), OBJ_BLOCK_LINES):
+                yield ''.join(f'f {f[0]} {f[1]} {f[2]}\n' for f in faces[start:start + OBJ_BLOCK_LINES]).encode()
+            return
+
+        # Face normals are referenced by face number, as in write_obj_normal
+        for start in range(0, len(positions), OBJ_BLOCK_LINES):
+            yield ''.join(f'\nv {p[0]} {p[1]} {p[2]}' for p in positions[start:start + OBJ_BLOCK_LINES]).encode()
+        yield b'\n'
+        face_normals = self.normals.tolist()
+        for start in range(0, len(face_normals), OBJ_BLOCK_LINES):
+            yield ''.join(f'\nvn {n[0]} {n[1]} {n[2]}' for n in face_normals[start:start + OBJ_BLOCK_LINES]).encode()
+        yield b'\n'
+        for start in range(0, len(faces), OBJ_BLOCK_LINES):
+            yield ''.join(f'\nf {f[0]}//{i} {f[1]}//{i} {f[2]}//{i}'
+                          for i, f in enumerate(faces[start:start + OBJ_BLOCK_LINES], start + 1)).encode()
+
+    def to_glb(self, out=None, max_vertices=MAX_CHUNK_VERTICES):
+        """
+        Export the mesh as GLB split into 16-bit indexed chunks (see ``glb.glb_bytes``).
+
+        Args:
+            out (writable buffer, optional): bytearray, memoryview, mmap or NumPy array to write into
+            max_vertices (int): Maximum vertex count of a chunk (default: 65535)
+
+        Returns:
+            bytes or int: GLB content, or the number of bytes written into ``out``
+        """
+        return glb_bytes(self.positions, self.indices + 1, self.ranges, self.feature_ids, max_vertices, out=out)
+
+    def to_ply(self, out=None, normals=False, feature_ids=True):
+        """
+        Export the mesh as binary little-endian PLY (see ``ply.ply_chunks``).
+
+        Args:
+            out (writable buffer, optional): bytearray, memoryview, mmap or NumPy array to write into
+            normals (bool): Whether to include face normals (default: False)
+            feature_ids (bool): Whether to include per-vertex and per-face feature IDs (default: True)
+
+        Returns:
+            bytes or int: PLY content, or the number of bytes written into ``out``
+        """
+        blocks = ply_chunks(self.positions, self.indices, self.normals if normals else None,
+                            self.ranges, self.feature_ids if feature_ids else None)
+        if out is None:
+            return b''.join(blocks)
+        return write_blocks(out, blocks)
+
+    def center_text(self, out=None):
+        """
+        Export the center in the format of the ``.txt`` file written by ``shp2obj``.
+
+        Args:
+            out (writable buffer, optional): Buffer to write into
+
+        Returns:
+            bytes or int: Center text, or the number of bytes written into ``out``
+        """
+        data = str(self.center).encode()
+        if out is None:
+            return data
+        return write_parts(out, [data], len(data))
+
+def write_blocks(out, blocks):
+    """
+    Copy a stream of encoded blocks one after another into a writable buffer.
+
+    Args:
+        out (writable buffer): bytearray, memoryview, mmap or NumPy array
+        blocks (iterable): Bytes-like objects or contiguous NumPy arrays
+
+    Returns:
+        int: Number of bytes written
+    """
+    view = memoryview(out).cast('B')
+    if view.readonly:
+        raise ValueError('Output buffer is read-only')
+    position = 0
+    for block in blocks:
+        data = memoryview(block).cast('B')
+        if position + len(data) > len(view):
+            raise ValueError(f'Output buffer holds {len(view)} bytes, which is too small for the mesh')
+        view[position:position + len(data)] = data
+        position += len(data)
+    return position
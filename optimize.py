@@ -0,0 +1,200 @@
+"""
+Index buffer optimization for the GPU post-transform vertex cache.
+This module reorders triangles with Tom Forsyth's linear-speed vertex cache algorithm, then reorders vertices for fetch locality and measures the average cache miss ratio (ACMR).
+"""
+
+from collections import deque
+import numpy as np
+
+# Simulated post-transform cache size in vertices
+CACHE_SIZE = 32
+
+# Forsyth scoring parameters
+LAST_TRIANGLE_SCORE = 0.75
+CACHE_DECAY_POWER = 1.5
+VALENCE_BOOST_SCALE = 2.0
+VALENCE_BOOST_POWER = 0.5
+
+def acmr(indices, cache_size=CACHE_SIZE):
+    """
+    Calculate the average cache miss ratio of an index buffer.
+
+    The post-transform cache is simulated as a FIFO of ``cache_size`` vertices,
+    as on most GPUs. An ACMR of 3 means no vertex is ever reused from the
+    cache; well-ordered meshes approach 0.5 to 0.7.
+
+    Args:
+        indices (numpy.ndarray): Triangle vertex indices with shape (M, 3)
+        cache_size (int): Number of cached vertices (default: 32)
+
+    Returns:
+        float: Transformed vertices per triangle
+    """
+    indices = np.asarray(indices).reshape(-1, 3)
+    if len(indices) == 0:
+        return 0.0
+
+    cache = deque()
+    cached = set()
+    misses = 0
+    for vertex in indices.ravel().tolist():
+        if vertex not in cached:
+            misses += 1
+            cache.append(vertex)
+            cached.add(vertex)
+            if len(cache) > cache_size:
+                cached.discard(cache.popleft())
+    return misses / len(indices)
+
+def vertex_score(position, remaining, cache_size=CACHE_SIZE):
+    """
+    Score a vertex by its position in the LRU cache and its remaining triangles.
+
+    Args:
+        position (int): Position in the cache, or -1 when not cached
+        remaining (int): Number of triangles still to be emitted that use the vertex
+        cache_size (int): Number of cached vertices
+
+    Returns:
+        float: Vertex score (higher is emitted sooner)
+    """
+    if remaining == 0:
+        return -1.0
+
+    score = 0.0
+    if position >= 0:
+        if position < 3:
+            # The vertices of the last triangle get a fixed score so that
+            # strips do not simply continue from the newest edge
+            score = LAST_TRIANGLE_SCORE
+        else:
+            score = (1.0 - (position - 3) / (cache_size - 3)) ** CACHE_DECAY_POWER
+
+    # Vertices with few remaining triangles are finished off first
+    return score + VALENCE_BOOST_SCALE * remaining ** -VALENCE_BOOST_POWER
+
+def forsyth_order(indices, num_vertices, cache_size=CACHE_SIZE):
+    """
+    Order triangles for the vertex cache with Forsyth's greedy algorithm.
+
+    Args:
+        indices (numpy.ndarray): Triangle vertex indices (0..num_vertices-1) with shape (M, 3)
+        num_vertices (int): Number of vertices referenced by the indices
+        cache_size (int): Number of vertices of the simulated LRU cache (default: 32)
+
+    Returns:
+        numpy.ndarray: New triangle order
+    """
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    num_triangles = len(indices)
+    if num_triangles == 0:
+        return np.arange(0)
+
+    # Triangles of every vertex in compressed rows
+    flat = indices.ravel()
+    vertex_triangles = (np.argsort(flat, kind='stable') // 3).tolist()
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(flat, minlength=num_vertices))]).tolist()
+    triangles = indices.tolist()
+
+    remaining = np.bincount(flat, minlength=num_vertices).tolist()
+    cache_position = [-1] * num_vertices
+    scores = [vertex_score(-1, count, cache_size) for count in remaining]
+    triangle_scores = [scores[a] + scores[b] + scores[c] for a, b, c in triangles]
+    added = [False] * num_triangles
+
+    cache = []
+    order = []
+    best = max(range(num_triangles), key=triangle_scores.__getitem__)
+    while True:
+        order.append(best)
+        added[best] = True
+        if len(order) == num_triangles:
+            break
+
+        # Move the emitted triangle's vertices to the front of the LRU cache
+        triangle = triangles[best]
+        for vertex in triangle:
+            remaining[vertex] -= 1
+        new_cache = list(triangle) + [vertex for vertex in cache if vertex not in triangle]
+        evicted = new_cache[cache_size:]
+        cache = new_cache[:cache_size]
+        for vertex in evicted:
+            cache_position[vertex] = -1
+
+        # Rescore the touched vertices and their pending triangles
+        touched = set()
+        for position, vertex in enumerate(cache):
+            cache_position[vertex] = position
+        for vertex in cache + evicted:
+            scores[vertex] = vertex_score(cache_position[vertex], remaining[vertex], cache_size)
+        for vertex in cache + evicted:
+            for k in range(offsets[vertex], offsets[vertex + 1]):
+                touched.add(vertex_triangles[k])
+
+        best = -1
+        best_score = -1.0
+        for t in touched:
+            if added[t]:
+                continue
+            a, b, c = triangles[t]
+            triangle_scores[t] = scores[a] + scores[b] + scores[c]
+            if triangle_scores[t] > best_score:
+                best, best_score = t, triangle_scores[t]
+
+        # No cached triangle left: continue with the best one anywhere
+        if best < 0:
+            best = max((t for t in range(num_triangles) if not added[t]), key=triangle_scores.__getitem__)
+
+    return np.array(order)
+
+def fetch_order(indices, num_vertices):
+    """
+    Order vertices by their first use in the index buffer.
+
+    Args:
+        indices (numpy.ndarray): Triangle vertex indices with shape (M, 3)
+        num_vertices (int): Number of vertices
+
+    Returns:
+        numpy.ndarray: New vertex order; unreferenced vertices come last
+    """
+    values, first = np.unique(np.asarray(indices).ravel(), return_index=True)
+    used = values[np.argsort(first)]
+    return np.concatenate([used, np.setdiff1d(np.arange(num_vertices), used)]).astype(np.int64)
+
+def optimize_mesh(positions, faces, ranges, cache_size=CACHE_SIZE):
+    """
+    Reorder the triangles and vertices of every feature for the vertex cache.
+
+    Every feature owns its vertices, so features are optimized one by one and
+    their ranges stay valid.
+
+    Args:
+        positions (list): Vertex positions from ``build_mesh``
+        faces (list): 1-based faces from ``build_mesh``
+        ranges (numpy.ndarray): Per-feature [vertex_start, vertex_end, face_start, face_end] rows
+        cache_size (int): Number of vertices of the simulated cache (default: 32)
+
+    Returns:
+        tuple: (positions, 1-based faces, ranges, statistics with 'acmr_before' and 'acmr_after')
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    indices = np.asarray(faces, dtype=np.int64).reshape(-1, 3) - 1
+    ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 4)
+
+    new_positions = positions.copy()
+    new_indices = indices.copy()
+    for vertex_start, vertex_end, face_start, face_end in ranges.tolist():
+        num_vertices = vertex_end - vertex_start
+        local = indices[face_start:face_end] - vertex_start
+        local = local[forsyth_order(local, num_vertices, cache_size)]
+
+        # Store vertices in the order the triangles first use them
+        order = fetch_order(local, num_vertices)
+        inverse = np.empty(num_vertices, dtype=np.int64)
+        inverse[order] = np.arange(num_vertices)
+        new_positions[vertex_start:vertex_end] = positions[vertex_start + order]
+        new_indices[face_start:face_end] = inverse[local] + vertex_start
+
+    stats = {'acmr_before': acmr(indices, cache_size), 'acmr_after': acmr(new_indices, cache_size)}
+    return new_positions, new_indices + 1, ranges, stats
@@ -0,0 +1,229 @@
+"""
+Output writing with a content-hash manifest.
+This module hashes every output artifact as it is produced and compares the hash with the manifest of the previous run, so files whose bytes would not change are neither rewritten nor uploaded.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from upload import Uploader, is_upload_target, print_upload_report
+
+class OutputWriter:
+    """
+    Write outputs below a local directory or an object storage URL, skipping unchanged ones.
+
+    The manifest maps every output name to the SHA-256 of its content and is
+    stored next to the outputs under ``manifest_name``. An output is written
+    (or uploaded) only when its hash differs from the manifest or, for local
+    outputs, when the file is missing. Untouched files keep their modification
+    time and cached copies stay valid.
+    """
+
+    def __init__(self, target, manifest_name, force=False):
+        """
+        Args:
+            target (str): Output directory or 'http(s)://host/bucket[/prefix]' URL
+            manifest_name (str): Name of the manifest below the target
+            force (bool): Whether to write every output regardless of the manifest (default: False)
+        """
+        self.target = target
+        self.manifest_name = manifest_name
+        self.uploader = Uploader(target) if is_upload_target(target) else None
+        self.previous = {} if force else self.load_manifest()
+        self.manifest = {}
+        self.written = []
+        self.unchanged = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close(save=exc_type is None)
+
+    def load_manifest(self):
+        """
+        Read the manifest of the previous run.
+
+        Returns:
+            dict: Content hash per output name (empty when there is no manifest)
+        """
+        if self.uploader is not None:
+            data = self.uploader.download(self.manifest_name)
+        else:
+            path = os.path.join(self.target, self.manifest_name)
+            if not os.path.exists(path):
+                return {}
+            with open(path, 'rb') as f:
+                data = f.read()
+        return json.loads(data)['outputs'] if data else {}
+
+    def put(self, name, data):
+        """
+        Write or upload an output unless its content is unchanged.
+
+        Bytes-like content is hashed before it is stored. An iterable of blocks
+        is hashed while it streams into a temporary file next to the output
+        (moved into place only when the content changed) or into a multipart
+        upload (completed only when the content changed), so it is never held
+        in memory as a whole.
+
+        Args:
+            name (str): Output name relative to the target, using '/' separators
+            data (bytes-like or iterable): Content, or an iterable of bytes-like blocks
+
+        Returns:
+            str: Hex SHA-256 of the content
+        """
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            return self.put_stream(name, data)
+
+        digest = hashlib.sha256(memoryview(data).cast('B')).hexdigest()
+        self.manifest[name] = digest
+        if self.is_unchanged(name, digest):
+            self.unchanged.append(name)
+            return digest
+
+        if self.uploader is not None:
+            self.uploader.upload(name, data)
+        else:
+            replace_file(self.path(name), data)
+        self.written.append(name)
+        return digest
+
+    def put_stream(self, name, blocks):
+        """
+        Write or upload an output given as blocks, hashing them as they stream.
+
+        Args:
+            name (str): Output name relative to the target, using '/' separators
+            blocks (iterable): Bytes-like blocks
+
+        Returns:
+            str: Hex SHA-256 of the content
+        """
+        digest = hashlib.sha256()
+
+        def hashed():
+            for block in blocks:
+                digest.update(memoryview(block).cast('B'))
+                yield block
+
+        def changed():
+            self.manifest[name] = digest.hexdigest()
+            return not self.is_unchanged(name, self.manifest[name])
+
+        if self.uploader is not None:
+            # Parts go out while later blocks are produced; the upload completes only for new content
+            # (waited for here, since the hash is known only once the stream is consumed)
+            stored = self.uploader.upload(name, hashed(), commit=changed).result() is not None
+        else:
+            path = self.path(name)
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            temporary = tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.',
+                                                    prefix=f'.{os.path.basename(path)}.', suffix='.tmp',
+                                                    delete=False)
+            try:
+                with temporary:
+                    for block in hashed():
+                        temporary.write(block)
+                stored = changed()
+                if stored:
+                    os.replace(temporary.name, path)
+            finally:
+                if os.path.exists(temporary.name):
+                    os.remove(temporary.name)
+
+        (self.written if stored else self.unchanged).append(name)
+        return self.manifest[name]
+
+    def path(self, name):
+        """
+        Get the local path of an output.
+
+        Args:
+            name (str): Output name relative to the target, using '/' separators
+
+        Returns:
+            str: Path below the target directory
+        """
+        return os.path.join(self.target, *name.split('/'))
+
+    def is_unchanged(self, name, digest):
+        """
+        Check whether an output already holds this content.
+
+        Args:
+            name (str): Output name relative to the target
+            digest (str): Hex SHA-256 of the new content
+
+        Returns:
+            bool: Whether the manifest lists the same hash and, for local outputs, the file exists
+        """
+        if self.previous.get(name) != digest:
+            return False
+        return self.uploader is not None or os.path.exists(self.path(name))
+
+    def close(self, save=True):
+        """
+        Wait for pending uploads and store the manifest.
+
+        Outputs of the previous run that were not produced again stay in the
+        manifest, so a partial run does not forget them.
+
+        Args:
+            save (bool): Whether to wait for uploads and store the manifest (default: True)
+        """
+        try:
+            if save and self.written:
+                manifest = json.dumps({'outputs': dict(self.previous, **self.manifest)}, indent=1,
+                                      sort_keys=True).encode('utf-8')
+                if self.uploader is not None:
+                    # The manifest goes last, once every output it lists is stored
+                    self.uploader.wait()
+                    self.uploader.upload(self.manifest_name, manifest)
+                else:
+                    # Replaced atomically, so an interrupted write never leaves a truncated manifest
+                    replace_file(os.path.join(self.target, self.manifest_name), manifest)
+        finally:
+            if self.uploader is not None:
+                self.uploader.close(wait=save)
+
+    def report(self):
+        """
+        Print how many outputs were written and how many were unchanged.
+        """
+        print(f'Outputs: {len(self.written)} written, {len(self.unchanged)} unchanged')
+        if self.uploader is not None:
+            print_upload_report(self.uploader.stats())
+
+def replace_file(path, data):
+    """
+    Write a file through a temporary file next to it, so readers see the old or the new content.
+
+    Args:
+        path (str): File to write
+        data (bytes-like): Content
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.', prefix=f'.{os.path.basename(path)}.',
+                                            suffix='.tmp', delete=False)
+    try:
+        with temporary:
+            temporary.write(data)
+        os.replace(temporary.name, path)
+    finally:
+        if os.path.exists(temporary.name):
+            os.remove(temporary.name)
+
+def etag(digest):
+    """
+    Format a content hash as a strong HTTP entity tag.
+
+    Args:
+        digest (str): Hex content hash
+
+    Returns:
+        str: Quoted entity tag
+    """
+    return f'"{digest}"'
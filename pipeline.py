@@ -0,0 +1,333 @@
+"""
+Pipelined conversion with overlapping read, compute and write stages.
+This module connects a batch reader, geometry/triangulation worker processes and the OBJ/GLB writer with bounded queues so that disk I/O overlaps with triangulation.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from dem import open_dem, terrain_heights
+from glb import GlbWriter
+from ingest import iter_footprints, footprint_bounds
+from normal import obj_normals
+from save import write_obj_block
+from shp2obj import build_mesh
+from weld import weld_mesh
+from optimize import optimize_mesh
+from rotation import axis_swap_matrix, apply_transform
+from clean import clean_footprints, drop_degenerate_faces
+from guard import guard_footprints, print_guard_report, TIME_BUDGET
+
+# Marker sent downstream when a stage has no more batches
+DONE = None
+
+class PipelineAborted(Exception):
+    """
+    Raised in a stage when another stage has failed.
+    """
+
+class StageQueue(queue.Queue):
+    """
+    Bounded queue between two pipeline stages that records its depth and stalls.
+
+    A full queue blocks the producer (backpressure: the downstream stage is
+    slower), an empty queue blocks the consumer (the upstream stage is slower).
+    """
+
+    def __init__(self, name, maxsize, abort):
+        """
+        Args:
+            name (str): Name shown in the report
+            maxsize (int): Maximum number of batches in flight
+            abort (threading.Event): Set when any stage fails
+        """
+        super().__init__(maxsize)
+        self.name = name
+        self.abort = abort
+        self.stats_lock = threading.Lock()
+        self.put_stall = 0.0
+        self.get_stall = 0.0
+        self.depth_sum = 0
+        self.samples = 0
+        self.max_depth = 0
+
+    def put(self, item):
+        start = time.perf_counter()
+        while True:
+            if self.abort.is_set():
+                raise PipelineAborted()
+            try:
+                super().put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self.record('put_stall', time.perf_counter() - start)
+
+    def get(self):
+        start = time.perf_counter()
+        while True:
+            if self.abort.is_set():
+                raise PipelineAborted()
+            try:
+                item = super().get(timeout=0.1)
+                break
+            except queue.Empty:
+                pass
+        self.record('get_stall', time.perf_counter() - start)
+        return item
+
+    def record(self, counter, stall):
+        """
+        Add a stall time and sample the current queue depth.
+
+        Args:
+            counter (str): 'put_stall' or 'get_stall'
+            stall (float): Time spent blocked in seconds
+        """
+        depth = self.qsize()
+        with self.stats_lock:
+            setattr(self, counter, getattr(self, counter) + stall)
+            self.depth_sum += depth
+            self.samples += 1
+            self.max_depth = max(self.max_depth, depth)
+
+    def stats(self):
+        """
+        Get the queue statistics.
+
+        Returns:
+            dict: Capacity, mean and maximum depth, producer and consumer stall seconds
+        """
+        with self.stats_lock:
+            return {
+                'capacity': self.maxsize,
+                'mean_depth': self.depth_sum / self.samples if self.samples else 0.0,
+                'max_depth': self.max_depth,
+                'producer_stall_seconds': self.put_stall,
+                'consumer_stall_seconds': self.get_stall,
+            }
+
+def compute_batch(footprints, shp_center, building_height, is_normal, weld, optimize, up):
+    """
+    Triangulate and extrude one batch in a worker process.
+
+    Args:
+        footprints (dict): Footprint buffers of the batch
+        shp_center (numpy.ndarray): Center of the total input bounds
+        building_height (float): Default building height in meters
+        is_normal (bool): Whether to compute face normals
+        weld (float, optional): Merge vertices of a building closer than this distance in meters
+        optimize (bool): Whether to reorder triangles and vertices for the GPU vertex cache
+        up (str): Axis convention of the OBJ, 'y-up' or 'z-up'
+
+    Returns:
+        tuple: ((positions, faces, ranges, normals, obj_positions), degenerate triangles dropped, busy seconds)
+    """
+    start = time.perf_counter()
+    positions, faces, ranges = build_mesh(footprints, shp_center, building_height)
+    faces, ranges, dropped = drop_degenerate_faces(positions, faces, ranges)
+    if weld is not None:
+        positions, faces, ranges = weld_mesh(positions, faces, ranges, weld)
+    if optimize:
+        positions, faces, ranges, _ = optimize_mesh(positions, faces, ranges)
+    normals = obj_normals(positions, faces) if is_normal else None
+    obj_positions = positions
+    if up != 'y-up':
+        obj_positions, normals = apply_transform(axis_swap_matrix('y-up', up), np.array(positions, dtype=np.float64),
+                                                 normals)
+    return (positions, faces, ranges, normals, obj_positions), dropped, time.perf_counter() - start
+
+def run_pipeline(shp_path, obj_path, field=None, building_height=3, is_normal=False,
+                 dem_path=None, dem_mode='vertices', batch_size=1024, workers=2, queue_size=4, weld=None,
+                 optimize=False, up='y-up', time_budget=TIME_BUDGET):
+    """
+    Convert footprints to OBJ and GLB with overlapping read, compute and write stages.
+
+    The reader thread decodes the input batch by batch, worker processes
+    triangulate and extrude batches, and the writer streams every finished
+    batch to the OBJ and the GLB (see ``glb.GlbWriter``) in input order while
+    the next ones are computed, so memory stays bounded by the batches in
+    flight. Every building is built against the center of the total input
+    bounds, as in ``shp2obj``.
+
+    Args:
+        shp_path (str): Path to the input Shapefile, GeoParquet, FlatGeobuf or zipped Shapefile
+        obj_path (str): Path for the output OBJ file
+        field (str, optional): Field name containing building height data
+        building_height (float): Default building height in meters (default: 3)
+        is_normal (bool): Whether to generate normal vectors for enhanced lighting (default: False)
+        dem_path (str, optional): GeoTIFF DEM used to place building bases on the terrain
+        dem_mode (str): Sample the DEM at footprint 'vertices' or 'centroid' (default: 'vertices')
+        batch_size (int): Number of source rows per batch (default: 1024)
+        workers (int): Number of geometry/triangulation worker processes (default: 2)
+        queue_size (int): Maximum number of batches waiting between two stages (default: 4)
+        weld (float, optional): Merge vertices of a building closer than this distance in meters
+        optimize (bool): Whether to reorder triangles and vertices for the GPU vertex cache (default: False)
+        up (str): Axis convention of the OBJ, 'y-up' or 'z-up'; the GLB is always Y-up (default: 'y-up')
+        time_budget (float, optional): Seconds a pathological footprint may spend in isolated
+                                       triangulation before falling back (default: 5; None disables)
+
+    Returns:
+        dict: Stage busy times, queue statistics, the stage limiting throughput, cleanup counts
+              and guard fallbacks
+    """
+    bounds = footprint_bounds(shp_path)
+    shp_center = np.array([(bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2])
+    dem = open_dem(dem_path) if dem_path else None
+
+    abort = threading.Event()
+    read_queue = StageQueue('read -> compute', queue_size, abort)
+    write_queue = StageQueue('compute -> write', queue_size, abort)
+    busy = {'read': 0.0, 'compute': 0.0, 'write': 0.0}
+    cleanup = {'vertices_removed': 0, 'polygons_repaired': 0, 'degenerate_triangles': 0}
+    guard = {'pathological': 0, 'fallbacks': []}
+    busy_lock = threading.Lock()
+    errors = []
+
+    def add_busy(stage, seconds):
+        with busy_lock:
+            busy[stage] += seconds
+
+    def reader():
+        try:
+            batches = iter_footprints(shp_path, field, batch_size)
+            sequence = 0
+            while True:
+                start = time.perf_counter()
+                footprints = next(batches, DONE)
+                if footprints is not DONE:
+                    footprints, stats = clean_footprints(footprints)
+                    cleanup['vertices_removed'] += stats['vertices_removed']
+                    cleanup['polygons_repaired'] += stats['polygons_repaired']
+                    if time_budget is not None:
+                        footprints, report = guard_footprints(footprints, time_budget)
+                        guard['pathological'] += report['pathological']
+                        guard['fallbacks'].extend(report['fallbacks'])
+                if footprints is not DONE and dem is not None:
+                    terrain = terrain_heights(footprints, dem, dem_mode)
+                    base = footprints['heights'] if footprints['heights'] is not None else 0
+                    footprints['heights'] = base + terrain
+                add_busy('read', time.perf_counter() - start)
+                if footprints is DONE:
+                    break
+                read_queue.put((sequence, footprints))
+                sequence += 1
+            # One marker per worker so that every worker stops
+            for _ in range(workers):
+                read_queue.put(DONE)
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            errors.append(e)
+            abort.set()
+
+    def worker():
+        try:
+            while True:
+                item = read_queue.get()
+                if item is DONE:
+                    write_queue.put(DONE)
+                    break
+                sequence, footprints = item
+                mesh, dropped, seconds = pool.submit(compute_batch, footprints, shp_center, building_height,
+                                                     is_normal, weld, optimize, up).result()
+                with busy_lock:
+                    cleanup['degenerate_triangles'] += dropped
+                add_busy('compute', seconds)
+                write_queue.put((sequence, footprints['feature_ids']) + mesh)
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            errors.append(e)
+            abort.set()
+
+    # Worker threads hand their batches to processes, so triangulation runs in parallel despite the GIL;
+    # the processes are started before any stage thread so that none inherits a lock held by one
+    pool = ProcessPoolExecutor(workers)
+    pool.submit(int).result()
+    threads = [threading.Thread(target=reader, daemon=True)]
+    threads += [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # The writer runs in the calling thread, restores the input order and streams both outputs
+    glb = GlbWriter(obj_path.replace('.obj', '.glb'))
+    pending = {}
+    next_sequence = 0
+    vertex_offset = 0
+    face_offset = 0
+    finished_workers = 0
+    try:
+        with open(obj_path, 'w') as f:
+            f.write('# Generated OBJ file\n')
+            while finished_workers < workers:
+                item = write_queue.get()
+                if item is DONE:
+                    finished_workers += 1
+                    continue
+                pending[item[0]] = item[1:]
+
+                start = time.perf_counter()
+                while next_sequence in pending:
+                    feature_ids, positions, faces, ranges, normals, obj_positions = pending.pop(next_sequence)
+                    write_obj_block(f, obj_positions, faces, vertex_offset, normals, face_offset)
+                    glb.add(positions, faces, ranges, feature_ids)
+                    vertex_offset += len(positions)
+                    face_offset += len(faces)
+                    next_sequence += 1
+                add_busy('write', time.perf_counter() - start)
+    except PipelineAborted:
+        pass
+    finally:
+        # Release stages still blocked on a queue if the writer stopped early
+        abort.set()
+        for thread in threads:
+            thread.join()
+        pool.shutdown(cancel_futures=True)
+    if errors:
+        glb.spool.close()
+        raise errors[0]
+
+    start = time.perf_counter()
+    with open(obj_path.replace('.obj', '.txt'), 'w') as f:
+        f.writelines(str(shp_center))
+    glb.close()
+    add_busy('write', time.perf_counter() - start)
+
+    # The stage with the most busy time per thread limits throughput
+    threads_per_stage = {'read': 1, 'compute': workers, 'write': 1}
+    report = {
+        'seconds': time.perf_counter() - start_time,
+        'batches': next_sequence,
+        'busy_seconds': dict(busy),
+        'queues': {q.name: q.stats() for q in (read_queue, write_queue)},
+        'bottleneck': max(busy, key=lambda stage: busy[stage] / threads_per_stage[stage]),
+        'cleanup': cleanup,
+        'guard': guard,
+    }
+    print_report(report)
+    return report
+
+def print_report(report):
+    """
+    Print the stage and queue statistics of a pipelined run.
+
+    Args:
+        report (dict): Report returned by ``run_pipeline``
+    """
+    print(f"Pipeline: {report['batches']} batches in {report['seconds']:.2f} s, "
+          f"limited by the {report['bottleneck']} stage")
+    for stage, seconds in report['busy_seconds'].items():
+        print(f'  {stage:<8} busy {seconds:8.3f} s')
+    cleanup = report['cleanup']
+    if any(cleanup.values()):
+        print(f"  cleanup  removed {cleanup['vertices_removed']} vertices, repaired {cleanup['polygons_repaired']} "
+              f"polygons, dropped {cleanup['degenerate_triangles']} degenerate triangles")
+    print_guard_report(report['guard'])
+    for name, stats in report['queues'].items():
+        print(f"  {name:<17} depth mean {stats['mean_depth']:.1f} / max {stats['max_depth']} of {stats['capacity']}, "
+              f"producer stalled {stats['producer_stall_seconds']:.3f} s, "
+              f"consumer stalled {stats['consumer_stall_seconds']:.3f} s")
@@ -0,0 +1,119 @@
+"""
+Binary PLY export for downstream mesh-processing tools.
+This module writes positions, faces, face normals and per-feature IDs as binary little-endian PLY in large chunks behind a header computed up front.
+"""
+
+import numpy as np
+
+# Number of vertex or face rows encoded per write
+PLY_CHUNK_ROWS = 1 << 20
+
+def ply_header(num_vertices, num_faces, normals=False, feature_ids=False):
+    """
+    Build the PLY header for the given element counts.
+
+    Args:
+        num_vertices (int): Number of vertices
+        num_faces (int): Number of triangles
+        normals (bool): Whether faces carry nx/ny/nz properties
+        feature_ids (bool): Whether vertices and faces carry a feature_id property
+
+    Returns:
+        bytes: ASCII header ending with ``end_header``
+    """
+    lines = [
+        'ply',
+        'format binary_little_endian 1.0',
+        'comment Generated by shp-transform-obj',
+        f'element vertex {num_vertices}',
+        'property float x',
+        'property float y',
+        'property float z',
+    ]
+    if feature_ids:
+        lines.append('property int feature_id')
+    lines += [f'element face {num_faces}', 'property list uchar int vertex_indices']
+    if normals:
+        lines += ['property float nx', 'property float ny', 'property float nz']
+    if feature_ids:
+        lines.append('property int feature_id')
+    lines.append('end_header')
+    return ('\n'.join(lines) + '\n').encode('ascii')
+
+def ply_chunks(positions, indices, normals=None, ranges=None, feature_ids=None, chunk_rows=PLY_CHUNK_ROWS):
+    """
+    Encode a mesh as binary little-endian PLY, header first, then chunk by chunk.
+
+    Args:
+        positions (numpy.ndarray): Vertex positions with shape (N, 3)
+        indices (numpy.ndarray): 0-based triangle vertex indices with shape (M, 3)
+        normals (numpy.ndarray, optional): Face normals with shape (M, 3)
+        ranges (numpy.ndarray, optional): Per-feature [vertex_start, vertex_end, face_start, face_end] rows;
+                                          required for feature IDs
+        feature_ids (numpy.ndarray, optional): Source feature ID of every range row
+        chunk_rows (int): Number of vertex or face rows per chunk (default: 1M)
+
+    Yields:
+        bytes or numpy.ndarray: The header, then contiguous record arrays of vertices and faces
+    """
+    positions = np.asarray(positions).reshape(-1, 3)
+    indices = np.asarray(indices).reshape(-1, 3)
+    with_ids = feature_ids is not None
+
+    # Expand the per-feature IDs to every vertex and face
+    if with_ids:
+        ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 4)
+        vertex_ids = np.repeat(np.asarray(feature_ids, dtype=np.int32), ranges[:, 1] - ranges[:, 0])
+        face_ids = np.repeat(np.asarray(feature_ids, dtype=np.int32), ranges[:, 3] - ranges[:, 2])
+
+    yield ply_header(len(positions), len(indices), normals is not None, with_ids)
+
+    # Packed little-endian records matching the header
+    vertex_fields = [('x', '<f4'), ('y', '<f4'), ('z', '<f4')]
+    face_fields = [('count', 'u1'), ('vertex_indices', '<i4', (3,))]
+    if normals is not None:
+        face_fields += [('nx', '<f4'), ('ny', '<f4'), ('nz', '<f4')]
+    if with_ids:
+        vertex_fields.append(('feature_id', '<i4'))
+        face_fields.append(('feature_id', '<i4'))
+    vertex_dtype = np.dtype(vertex_fields)
+    face_dtype = np.dtype(face_fields)
+
+    for start in range(0, len(positions), chunk_rows):
+        rows = slice(start, start + chunk_rows)
+        records = np.empty(len(positions[rows]), dtype=vertex_dtype)
+        records['x'], records['y'], records['z'] = positions[rows].T
+        if with_ids:
+            records['feature_id'] = vertex_ids[rows]
+        yield records
+
+    for start in range(0, len(indices), chunk_rows):
+        rows = slice(start, start + chunk_rows)
+        records = np.empty(len(indices[rows]), dtype=face_dtype)
+        records['count'] = 3
+        records['vertex_indices'] = indices[rows]
+        if normals is not None:
+            records['nx'], records['ny'], records['nz'] = np.asarray(normals)[rows].T
+        if with_ids:
+            records['feature_id'] = face_ids[rows]
+        yield records
+
+def write_ply(filepath, positions, indices, normals=None, ranges=None, feature_ids=None, chunk_rows=PLY_CHUNK_ROWS):
+    """
+    Write a mesh to a binary little-endian PLY file in large buffered writes.
+
+    Args:
+        filepath (str): Output file path for the PLY file
+        positions (numpy.ndarray): Vertex positions with shape (N, 3)
+        indices (numpy.ndarray): 0-based triangle vertex indices with shape (M, 3)
+        normals (numpy.ndarray, optional): Face normals with shape (M, 3)
+        ranges (numpy.ndarray, optional): Per-feature ranges; required for feature IDs
+        feature_ids (numpy.ndarray, optional): Source feature ID of every range row
+        chunk_rows (int): Number of vertex or face rows per write (default: 1M)
+
+    Returns:
+        None: Writes the PLY file to disk
+    """
+    with open(filepath, 'wb') as f:
+        for chunk in ply_chunks(positions, indices, normals, ranges, feature_ids, chunk_rows):
+            f.write(chunk)
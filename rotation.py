@@ -1,10 +1,21 @@
 """
 Coordinate rotation transformation utilities for 2D and 3D coordinate systems.
-This module provides functions for rotating points around different axes in 3D space and 2D plane.
+This module provides functions for rotating points around different axes in 3D space and 2D plane, and composes rotations, scales, translations and axis swaps into 4x4 matrices applied to whole position and normal arrays at once.
 """
 
 import numpy as np
 
+# Axes of every model convention in local east/north/up meters (one row per model axis)
+FRAMES = {
+    # Model frame built by shp2obj and required by glTF: X north, Y up, Z east
+    'y-up': np.array([[0.0, 1.0, 0.0], [0.0, 0.0, 1.0], [1.0, 0.0, 0.0]]),
+    # GIS and CAD frame: X east, Y north, Z up
+    'z-up': np.eye(3),
+}
+
+# Number of rows transformed at a time when updating arrays in place
+TRANSFORM_BLOCK_ROWS = 65536
+
 def rotate_z(x, y, z, gamma):
     """
     Rotate a 3D point around the Z-axis by a specified angle.
@@ -31,8 +42,6 @@ def rotate_z(x, y, z, gamma):
     y_r = np.sin(gamma)*x + np.cos(gamma)*y
     z_r = z
     
-    # Print rotation result for debugging
-    print(f"{(x, y, z)} rotate {gamma*(180/np.pi)} degrees around the Z-axis,result {(x_r, y_r, z_r)}")
     return x_r, y_r, z_r
 
 def rotate_y(x, y, z, beta):
@@ -61,8 +70,6 @@ def rotate_y(x, y, z, beta):
     y_r = y
     z_r = -np.sin(beta)*x + np.cos(beta)*z
     
-    # Print rotation result for debugging
-    print(f"{(x, y, z)} rotate {beta*(180/np.pi)} degrees around the Y-axis,result {(x_r, y_r, z_r)}")
     return x_r, y_r, z_r
 
 def rotate_x(x, y, z, alpha):
@@ -91,8 +98,6 @@ def rotate_x(x, y, z, alpha):
     y_r = np.cos(alpha)*y - np.sin(alpha)*z
     z_r = np.sin(alpha)*y + np.cos(alpha)*z
     
-    # Print rotation result for debugging
-    print(f"{(x, y, z)} rotate {alpha*(180/np.pi)} degrees around the X-axis,result {(x_r, y_r, z_r)}")
     return x_r, y_r, z_r
 
 def rotate_2d(point, angle):
@@ -122,4 +127,145 @@ def rotate_2d(point, angle):
     
     # Apply rotation transformation
     result = np.dot(point, matrix)
-    return result
\ No newline at end of file
+    return result
+
+def rotation_matrix(axis, angle):
+    """
+    Build a 4x4 rotation about a coordinate axis.
+
+    The rotation matches ``rotate_x``, ``rotate_y`` and ``rotate_z``.
+
+    Args:
+        axis (str): 'x', 'y' or 'z'
+        angle (float): Rotation angle in degrees (positive for counterclockwise)
+
+    Returns:
+        numpy.ndarray: Homogeneous matrix with shape (4, 4)
+    """
+    theta = np.radians(angle)
+    cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+    first, second = {'x': (1, 2), 'y': (2, 0), 'z': (0, 1)}[axis]
+
+    matrix = np.eye(4)
+    matrix[first, first] = matrix[second, second] = cos_theta
+    matrix[first, second] = -sin_theta
+    matrix[second, first] = sin_theta
+    return matrix
+
+def scale_matrix(sx, sy=None, sz=None):
+    """
+    Build a 4x4 scale.
+
+    Args:
+        sx (float): Scale along X, also used for Y and Z when they are omitted
+        sy (float, optional): Scale along Y
+        sz (float, optional): Scale along Z
+
+    Returns:
+        numpy.ndarray: Homogeneous matrix with shape (4, 4)
+    """
+    return np.diag([sx, sx if sy is None else sy, sx if sz is None else sz, 1.0])
+
+def translation_matrix(tx, ty, tz):
+    """
+    Build a 4x4 translation.
+
+    Args:
+        tx (float): Offset along X
+        ty (float): Offset along Y
+        tz (float): Offset along Z
+
+    Returns:
+        numpy.ndarray: Homogeneous matrix with shape (4, 4)
+    """
+    matrix = np.eye(4)
+    matrix[:3, 3] = [tx, ty, tz]
+    return matrix
+
+def axis_swap_matrix(source='y-up', target='z-up'):
+    """
+    Build the 4x4 matrix converting coordinates between model conventions.
+
+    Both conventions in ``FRAMES`` are right-handed, so the swap is a proper
+    rotation and keeps the triangle winding.
+
+    Args:
+        source (str): Convention of the input coordinates (default: 'y-up')
+        target (str): Convention of the output coordinates (default: 'z-up')
+
+    Returns:
+        numpy.ndarray: Homogeneous matrix with shape (4, 4)
+    """
+    for name in (source, target):
+        if name not in FRAMES:
+            raise ValueError(f'Unknown axis convention "{name}", expected one of {sorted(FRAMES)}')
+    matrix = np.eye(4)
+    matrix[:3, :3] = FRAMES[target] @ FRAMES[source].T
+    return matrix
+
+def compose(*matrices):
+    """
+    Compose 4x4 transforms into one matrix.
+
+    Args:
+        *matrices (numpy.ndarray): Transforms in the order they are applied
+
+    Returns:
+        numpy.ndarray: Matrix applying all transforms at once
+    """
+    result = np.eye(4)
+    for matrix in matrices:
+        result = np.asarray(matrix, dtype=np.float64) @ result
+    return result
+
+def apply_transform(matrix, positions, normals=None):
+    """
+    Apply a 4x4 transform to whole position and normal arrays.
+
+    Float64 arrays are updated in place block by block, so no second copy of
+    the mesh is made; other inputs are converted to new arrays first. Normals
+    are transformed by the inverse transpose of the linear part, and
+    renormalized when that part is not a rotation, so they stay perpendicular
+    under non-uniform scales.
+
+    Args:
+        matrix (numpy.ndarray): Homogeneous matrix with shape (4, 4)
+        positions (numpy.ndarray): Positions with shape (N, 3)
+        normals (numpy.ndarray, optional): Normals with shape (M, 3)
+
+    Returns:
+        tuple: (transformed positions, transformed normals or None)
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    linear = matrix[:3, :3]
+    positions = as_rows(positions)
+    for start in range(0, len(positions), TRANSFORM_BLOCK_ROWS):
+        block = positions[start:start + TRANSFORM_BLOCK_ROWS]
+        block[...] = block @ linear.T + matrix[:3, 3]
+
+    if normals is not None:
+        normal_matrix = np.linalg.inv(linear).T
+        rescale = not np.allclose(normal_matrix @ normal_matrix.T, np.eye(3))
+        normals = as_rows(normals)
+        for start in range(0, len(normals), TRANSFORM_BLOCK_ROWS):
+            block = normals[start:start + TRANSFORM_BLOCK_ROWS]
+            block[...] = block @ normal_matrix.T
+            if rescale:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    block /= np.linalg.norm(block, axis=1)[:, None]
+
+    return positions, normals
+
+def as_rows(values):
+    """
+    View values as a writable float64 array of 3D rows, copying only when needed.
+
+    Args:
+        values (array_like): Values with shape (N, 3)
+
+    Returns:
+        numpy.ndarray: Array with shape (N, 3)
+    """
+    if isinstance(values, np.ndarray) and values.dtype == np.float64 and values.flags.writeable:
+        return values.reshape(-1, 3)
+    return np.array(values, dtype=np.float64).reshape(-1, 3)
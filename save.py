@@ -19,6 +19,22 @@ def write_obj_normal(filepath, positions, faces, normals):
     Returns:
         None: Writes the OBJ file to disk
     """
+    # Write to file
+    with open(filepath, 'w') as f:
+        f.write(obj_normal_text(positions, faces, normals))
+
+def obj_normal_text(positions, faces, normals):
+    """
+    Format the content of an OBJ file with vertex positions, faces, and vertex normals.
+
+    Args:
+        positions (list): List of vertex positions as [x, y, z] coordinates
+        faces (list): List of face definitions with vertex indices
+        normals (list): List of vertex normal vectors as [nx, ny, nz]
+
+    Returns:
+        str: OBJ content as written by ``write_obj_normal``
+    """
     # Initialize strings for different OBJ components
     v_line = ''    # Vertex positions
     vn_line = ''   # Vertex normals
@@ -40,11 +56,7 @@ def write_obj_normal(filepath, positions, faces, normals):
         f_line = f'{f_line}\nf {f[0]}//{i} {f[1]}//{i} {f[2]}//{i}'
 
     # Combine all components into final OBJ content
-    out = f'# Generated OBJ file\n{v_line}\n{vn_line}\n{f_line}'
-
-    # Write to file
-    with open(filepath, 'w') as f:
-        f.write(out)
+    return f'# Generated OBJ file\n{v_line}\n{vn_line}\n{f_line}'
 
 def write_obj_default(filepath, positions, faces):
     """
@@ -61,6 +73,21 @@ def write_obj_default(filepath, positions, faces):
     Returns:
         None: Writes the OBJ file to disk
     """
+    # Save the generated OBJ file
+    with open(filepath, 'w') as f:
+        f.writelines(obj_default_lines(positions, faces))
+
+def obj_default_lines(positions, faces):
+    """
+    Format the lines of a basic OBJ file with vertex positions and faces only.
+
+    Args:
+        positions (list): List of vertex positions as [x, y, z] coordinates
+        faces (list): List of face definitions with vertex indices
+
+    Returns:
+        list: OBJ lines as written by ``write_obj_default``
+    """
     # Initialize OBJ content with header
     obj_content = ["# Generated OBJ file\n"]
 
@@ -72,6 +99,42 @@ def write_obj_default(filepath, positions, faces):
     for face in faces:
         obj_content.append(f"f {face[0]} {face[1]} {face[2]}\n")
 
-    # Save the generated OBJ file
-    with open(filepath, 'w') as f:
-        f.writelines(obj_content)
\ No newline at end of file
+    return obj_content
+
+def write_obj_block(file, positions, faces, vertex_offset=0, normals=None, normal_offset=0):
+    """
+    Append one block of vertices and faces to an open OBJ file.
+
+    OBJ allows vertex and face lines to alternate as long as faces only refer
+    to vertices written before them, so a model can be streamed block by block.
+
+    Args:
+        file (file): OBJ file opened for writing text
+        positions (list): List of vertex positions of the block as [x, y, z] coordinates
+        faces (list): List of face definitions with 1-based vertex indices within the block
+        vertex_offset (int): Number of vertices written by previous blocks (default: 0)
+        normals (list, optional): Face normal vectors of the block as [nx, ny, nz]
+        normal_offset (int): Number of normals written by previous blocks (default: 0)
+
+    Returns:
+        None: Writes the block to the file
+    """
+    obj_content = []
+
+    # Add vertex positions
+    for point in positions:
+        obj_content.append(f"v {point[0]} {point[1]} {point[2]}\n")
+
+    if normals is None:
+        # Add face definitions shifted past the vertices of previous blocks
+        for face in faces:
+            obj_content.append(f"f {face[0] + vertex_offset} {face[1] + vertex_offset} {face[2] + vertex_offset}\n")
+    else:
+        # Add one normal per face and refer to it from every corner of the face
+        for n in normals:
+            obj_content.append(f"vn {n[0]} {n[1]} {n[2]}\n")
+        for i, face in enumerate(faces, normal_offset + 1):
+            a, b, c = (v + vertex_offset for v in face)
+            obj_content.append(f"f {a}//{i} {b}//{i} {c}//{i}\n")
+
+    file.writelines(obj_content)
@@ -0,0 +1,358 @@
+"""
+Local tile server that extrudes building footprints into GLB on demand.
+This module loads footprints once into an STRtree spatial index and answers bbox or XYZ tile requests through a size-bounded LRU tile cache.
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import shapely
+from glb import glb_bytes
+from ingest import read_footprints, footprint_center
+from clean import clean_footprints, drop_degenerate_faces
+from shp2obj import build_mesh
+
+class TileCache:
+    """
+    Thread-safe LRU cache of generated tiles bounded by their total size in bytes.
+
+    Concurrent requests for the same missing key wait for a single computation,
+    while requests for different keys are computed in parallel.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Args:
+            max_bytes (int): Maximum total size of the cached tiles in bytes
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(self, key, create):
+        """
+        Get a cached tile or create it with the given function.
+
+        Args:
+            key (tuple): Cache key of the tile
+            create (callable): Function returning the tile bytes
+
+        Returns:
+            tuple: (tile bytes, whether the tile came from the cache)
+        """
+        while True:
+            with self.lock:
+                if key in self.entries:
+                    # Mark the entry as most recently used
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return self.entries[key], True
+                event = self.pending.get(key)
+                if event is None:
+                    # This request computes the tile; later ones wait for it
+                    event = self.pending[key] = threading.Event()
+                    self.misses += 1
+                    break
+            event.wait()
+
+        # Compute outside the lock so other tiles are not blocked
+        try:
+            data = create()
+            self.put(key, data)
+        finally:
+            with self.lock:
+                del self.pending[key]
+            event.set()
+        return data, False
+
+    def put(self, key, data):
+        """
+        Store a tile and evict least recently used tiles beyond the size limit.
+
+        Args:
+            key (tuple): Cache key of the tile
+            data (bytes): Tile content
+        """
+        with self.lock:
+            # Tiles larger than the whole cache are served but not stored
+            if len(data) > self.max_bytes:
+                return
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+            dict: Entry count, size, hits, misses, hit ratio and evictions
+        """
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests if requests else 0.0,
+                'evictions': self.evictions,
+            }
+
+def load_index(shp_path, field=None):
+    """
+    Load footprints once and build the spatial index used to answer requests.
+
+    Args:
+        shp_path (str): Path to the input footprints (any format supported by ``ingest``)
+        field (str, optional): Field name containing building height data
+
+    Returns:
+        dict: Footprint buffers, global center, STRtree and representative points
+    """
+    footprints, _ = clean_footprints(read_footprints(shp_path, field))
+
+    # Build all polygons in one vectorized call from the flat buffers
+    polygons = shapely.from_ragged_array(
+        shapely.GeometryType.POLYGON,
+        footprints['coords'],
+        (footprints['ring_offsets'], footprints['polygon_offsets']),
+    )
+
+    return {
+        'footprints': footprints,
+        'center': footprint_center(footprints),
+        'tree': shapely.STRtree(polygons),
+        # A point inside every footprint decides which tile owns it
+        'points': shapely.get_coordinates(shapely.point_on_surface(polygons)),
+    }
+
+def tile_bounds(z, x, y):
+    """
+    Calculate the geographic bounds of an XYZ (Web Mercator) tile.
+
+    Args:
+        z (int): Zoom level
+        x (int): Tile column
+        y (int): Tile row, counted from the north
+
+    Returns:
+        tuple: (min_lon, min_lat, max_lon, max_lat)
+    """
+    n = 2 ** z
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, latitude(y + 1), (x + 1) / n * 360 - 180, latitude(y)
+
+def query_features(index, bounds, owned_only=False):
+    """
+    Find the footprints intersecting a bounding box.
+
+    Args:
+        index (dict): Spatial index from ``load_index``
+        bounds (tuple): (min_lon, min_lat, max_lon, max_lat)
+        owned_only (bool): Keep only footprints whose representative point lies in
+                           the half-open box, so that adjacent tiles never repeat a building
+
+    Returns:
+        numpy.ndarray: Sorted polygon indices
+    """
+    indices = index['tree'].query(shapely.box(*bounds), predicate='intersects')
+
+    if owned_only:
+        points = index['points'][indices]
+        inside = (points[:, 0] >= bounds[0]) & (points[:, 0] < bounds[2]) \
+            & (points[:, 1] >= bounds[1]) & (points[:, 1] < bounds[3])
+        indices = indices[inside]
+
+    return np.sort(indices)
+
+def extrude_glb(index, indices, building_height):
+    """
+    Extrude the selected footprints and encode them as GLB.
+
+    Args:
+        index (dict): Spatial index from ``load_index``
+        indices (numpy.ndarray): Polygon indices to extrude
+        building_height (float): Default building height in meters
+
+    Returns:
+        bytes: GLB content positioned relative to the global center
+    """
+    positions, faces, ranges = build_mesh(index['footprints'], index['center'], building_height, indices)
+    faces, ranges, _ = drop_degenerate_faces(positions, faces, ranges)
+    return glb_bytes(positions, faces, ranges, index['footprints']['feature_ids'][indices])
+
+class TileServer(ThreadingHTTPServer):
+    """
+    HTTP server answering bbox and tile requests from one spatial index.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, index, building_height=3, cache_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            address (tuple): (host, port) to listen on
+            index (dict): Spatial index from ``load_index``
+            building_height (float): Default building height in meters (default: 3)
+            cache_bytes (int): Maximum size of the tile cache in bytes (default: 64 MiB)
+        """
+        super().__init__(address, TileRequestHandler)
+        self.index = index
+        self.building_height = building_height
+        self.cache = TileCache(cache_bytes)
+        self.latencies = deque(maxlen=1000)
+        self.metrics_lock = threading.Lock()
+        self.requests = 0
+        self.features_extruded = 0
+
+    def record(self, latency, feature_count=0):
+        """
+        Record the latency of a served tile request.
+
+        Args:
+            latency (float): Request latency in seconds
+            feature_count (int): Number of footprints extruded for the request
+        """
+        with self.metrics_lock:
+            self.requests += 1
+            self.features_extruded += feature_count
+            self.latencies.append(latency)
+
+    def metrics(self):
+        """
+        Get the latency and cache metrics.
+
+        Returns:
+            dict: Request count, latency percentiles in milliseconds and cache statistics
+        """
+        with self.metrics_lock:
+            latencies = np.array(self.latencies) * 1000
+            metrics = {'requests': self.requests, 'features_extruded': self.features_extruded}
+        if len(latencies) > 0:
+            metrics['latency_ms'] = {
+                'p50': float(np.percentile(latencies, 50)),
+                'p95': float(np.percentile(latencies, 95)),
+                'p99': float(np.percentile(latencies, 99)),
+                'max': float(latencies.max()),
+            }
+        metrics['cache'] = self.cache.stats()
+        return metrics
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler for ``/bbox``, ``/tiles/{z}/{x}/{y}.glb`` and ``/metrics``.
+    """
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+
+        try:
+            if url.path == '/metrics':
+                self.send_json(self.server.metrics())
+                return
+            if url.path == '/bbox':
+                # /bbox?bbox=min_lon,min_lat,max_lon,max_lat returns every intersecting building
+                bounds = tuple(float(v) for v in parse_qs(url.query)['bbox'][0].split(','))
+                if len(bounds) != 4:
+                    raise ValueError('bbox needs four values')
+                key = ('bbox',) + bounds
+                owned_only = False
+            elif len(parts) == 4 and parts[0] == 'tiles' and parts[3].endswith('.glb'):
+                # Tiles only contain the buildings they own so neighbours do not overlap
+                z, x, y = int(parts[1]), int(parts[2]), int(parts[3][:-4])
+                bounds = tile_bounds(z, x, y)
+                key = ('tile', z, x, y)
+                owned_only = True
+            else:
+                self.send_error(404)
+                return
+        except (KeyError, ValueError) as e:
+            self.send_error(400, str(e))
+            return
+
+        server = self.server
+        feature_count = []
+
+        def create():
+            indices = query_features(server.index, bounds, owned_only)
+            feature_count.append(len(indices))
+            return extrude_glb(server.index, indices, server.building_height)
+
+        data, cached = server.cache.get_or_create(key, create)
+        server.record(time.perf_counter() - start, sum(feature_count))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'model/gltf-binary')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-Cache', 'HIT' if cached else 'MISS')
+        self.send_header('X-Model-Center', ','.join(str(v) for v in server.index['center']))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, content):
+        data = json.dumps(content).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def serve(shp_path, field=None, building_height=3, host='127.0.0.1', port=8000, cache_mb=64):
+    """
+    Load footprints and serve GLB tiles until interrupted.
+
+    Args:
+        shp_path (str): Path to the input footprints
+        field (str, optional): Field name containing building height data
+        building_height (float): Default building height in meters (default: 3)
+        host (str): Interface to listen on (default: 127.0.0.1)
+        port (int): Port to listen on (default: 8000)
+        cache_mb (float): Maximum size of the tile cache in MiB (default: 64)
+
+    Returns:
+        None: Runs until interrupted
+    """
+    index = load_index(shp_path, field)
+    server = TileServer((host, port), index, building_height, int(cache_mb * 1024 * 1024))
+    print(f'Serving {len(index["footprints"]["feature_ids"])} footprints on http://{host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve building footprints as GLB tiles on demand')
+    parser.add_argument('shp_path', help='Input Shapefile, GeoParquet, FlatGeobuf or zipped Shapefile')
+    parser.add_argument('--field', default=None, help='Field name containing building height data')
+    parser.add_argument('--height', type=float, default=3, help='Default building height in meters')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--cache-mb', type=float, default=64, help='Maximum tile cache size in MiB')
+    args = parser.parse_args()
+
+    serve(args.shp_path, args.field, args.height, args.host, args.port, args.cache_mb)
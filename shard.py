@@ -0,0 +1,248 @@
+"""
+Shard-and-merge mode for distributing one conversion across processes or machines.
+This module partitions footprints deterministically along a Morton curve, stores each shard's mesh with a JSON manifest and merges the shards into the final outputs.
+"""
+
+import argparse
+import glob
+import json
+import os
+import numpy as np
+import shapely
+from curve import morton_keys, footprint_centers
+from normal import obj_normals
+from rotation import axis_swap_matrix, apply_transform
+
+def parse_shard(text):
+    """
+    Parse a shard specification such as ``3/8``.
+
+    Args:
+        text (str): Shard index and shard count separated by a slash
+
+    Returns:
+        tuple: (shard index, shard count)
+    """
+    try:
+        shard, count = (int(v) for v in text.split('/'))
+    except ValueError:
+        raise ValueError(f'Invalid shard "{text}", expected i/N') from None
+    if count < 1 or not 0 <= shard < count:
+        raise ValueError(f'Invalid shard "{text}", index must be in 0..N-1')
+    return shard, count
+
+def shard_indices(footprints, shard, count):
+    """
+    Select the footprints of one shard.
+
+    Footprints are ordered by the Morton key of their exterior bounding box
+    center over the bounds of the whole input and split into ``count`` runs of
+    equal size. Every process computes the same order from the same input, so
+    shards never overlap and neighbouring buildings mostly share a shard.
+
+    Args:
+        footprints (dict): Footprint buffers of the whole input (see ``ingest.make_footprints``)
+        shard (int): Shard index in 0..count-1
+        count (int): Number of shards
+
+    Returns:
+        numpy.ndarray: Sorted polygon indices of the shard
+    """
+    num_polygons = len(footprints['feature_ids'])
+    if num_polygons == 0:
+        return np.arange(0)
+
+    order = np.argsort(morton_keys(footprint_centers(footprints)), kind='stable')
+    bounds = np.linspace(0, num_polygons, count + 1).round().astype(np.int64)
+    return np.sort(order[bounds[shard]:bounds[shard + 1]])
+
+def shard_neighbours(footprints, indices, tolerance=1e-7):
+    """
+    Add the footprints of other shards that touch the footprints of a shard.
+
+    Culling a shard's walls depends on the heights of its neighbours, so
+    anything measured per footprint must cover them as well.
+
+    Args:
+        footprints (dict): Footprint buffers of the whole input (see ``ingest.make_footprints``)
+        indices (numpy.ndarray): Polygon indices of the shard
+        tolerance (float): Distance in source coordinate units under which footprints
+                           touch, as in ``cull.find_hidden_walls`` (default: 1e-7 degrees)
+
+    Returns:
+        numpy.ndarray: Sorted polygon indices of the shard and its neighbours
+    """
+    polygons = shapely.from_ragged_array(shapely.GeometryType.POLYGON, footprints['coords'],
+                                         (footprints['ring_offsets'], footprints['polygon_offsets']))
+    _, neighbours = shapely.STRtree(polygons).query(polygons[indices], predicate='dwithin', distance=tolerance)
+    return np.union1d(indices, neighbours)
+
+def shard_paths(obj_path, shard, count):
+    """
+    Get the mesh and manifest paths of one shard.
+
+    Args:
+        obj_path (str): Final OBJ path shared by all shards
+        shard (int): Shard index
+        count (int): Number of shards
+
+    Returns:
+        tuple: (mesh .npz path, manifest .json path)
+    """
+    base = f'{obj_path[:-4] if obj_path.endswith(".obj") else obj_path}.shard-{shard:04d}-of-{count:04d}'
+    return base + '.npz', base + '.json'
+
+def write_shard(obj_path, shard, count, positions, faces, ranges, feature_ids, shp_center, stats, ply=False,
+                up='y-up', upload=None, normal=False):
+    """
+    Store the mesh of one shard and its manifest next to the final OBJ path.
+
+    Args:
+        obj_path (str): Final OBJ path shared by all shards
+        shard (int): Shard index
+        count (int): Number of shards
+        positions (list): Vertex positions of the shard
+        faces (list): 1-based faces of the shard
+        ranges (numpy.ndarray): Per-feature [vertex_start, vertex_end, face_start, face_end] rows
+        feature_ids (numpy.ndarray): Source feature ID of every range row
+        shp_center (numpy.ndarray): Global center shared by all shards
+        stats (dict): Shard statistics recorded in the manifest
+        ply (bool): Whether the merge should also write a binary PLY file (default: False)
+        up (str): Axis convention the merge writes the OBJ and PLY in (default: 'y-up')
+        upload (str, optional): Object storage URL the merge uploads the outputs to
+        normal (bool): Whether the merge should include vertex normals in the OBJ (default: False)
+
+    Returns:
+        str: Path of the manifest
+    """
+    mesh_path, manifest_path = shard_paths(obj_path, shard, count)
+    np.savez(
+        mesh_path,
+        positions=np.asarray(positions, dtype=np.float64).reshape(-1, 3),
+        faces=np.asarray(faces, dtype=np.int64).reshape(-1, 3),
+        ranges=np.asarray(ranges, dtype=np.int64).reshape(-1, 4),
+        feature_ids=np.asarray(feature_ids, dtype=np.int64),
+    )
+
+    manifest = {
+        'shard': shard,
+        'count': count,
+        'center': [float(v) for v in shp_center],
+        'mesh': os.path.basename(mesh_path),
+        'features': len(feature_ids),
+        'vertices': len(positions),
+        'faces': len(faces),
+        'stats': stats,
+        'ply': bool(ply),
+        'up': up,
+        'upload': upload,
+        'normal': bool(normal),
+    }
+    # Write the manifest last so that its presence marks a complete shard
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+def merge_shards(obj_path, is_normal=None, ply=None, up=None, upload=None, force=False):
+    """
+    Merge all shards of a conversion into the final OBJ, center file and GLB.
+
+    The outputs are written (or uploaded) like those of a single-process run
+    (see ``shp2obj.write_outputs``), so unchanged ones are skipped.
+
+    Args:
+        obj_path (str): Final OBJ path passed to every shard
+        is_normal (bool, optional): Whether to include vertex normals in the OBJ (default: as requested by the shards)
+        ply (bool, optional): Whether to also write a binary PLY file (default: as requested by the shards)
+        up (str, optional): Axis convention of the OBJ and PLY, 'y-up' or 'z-up' (default: as requested by the shards)
+        upload (str, optional): Upload the outputs to 'http(s)://host/bucket[/prefix]' instead of
+                                writing them next to ``obj_path`` (default: as requested by the shards)
+        force (bool): Whether to write every output regardless of the manifest (default: False)
+
+    Returns:
+        dict: Merged statistics, also written to ``<name>.stats.json``
+    """
+    base = obj_path[:-4] if obj_path.endswith('.obj') else obj_path
+    manifests = []
+    for path in sorted(glob.glob(f'{glob.escape(base)}.shard-*-of-*.json')):
+        with open(path) as f:
+            manifests.append((os.path.dirname(path), json.load(f)))
+    if not manifests:
+        raise FileNotFoundError(f'No shard manifests found for {obj_path}')
+
+    # Every shard must be present exactly once and share the same global center
+    count = manifests[0][1]['count']
+    center = manifests[0][1]['center']
+    found = sorted(manifest['shard'] for _, manifest in manifests)
+    if found != list(range(count)) or any(m['count'] != count for _, m in manifests):
+        raise ValueError(f'Incomplete shard set for {obj_path}: found {found} of {count}')
+    if any(m['center'] != center for _, m in manifests):
+        raise ValueError('Shards were built against different centers')
+    if is_normal is None:
+        is_normal = any(m.get('normal', False) for _, m in manifests)
+    if ply is None:
+        ply = any(m.get('ply', False) for _, m in manifests)
+    if up is None:
+        ups = {m.get('up', 'y-up') for _, m in manifests}
+        if len(ups) > 1:
+            raise ValueError(f'Shards were built for different axis conventions: {sorted(ups)}')
+        up = ups.pop()
+    if upload is None:
+        targets = {m.get('upload') for _, m in manifests}
+        if len(targets) > 1:
+            raise ValueError(f'Shards were built for different upload targets: {sorted(map(str, targets))}')
+        upload = targets.pop()
+
+    positions, faces, ranges, feature_ids = [], [], [], []
+    vertex_offset = 0
+    face_offset = 0
+    for directory, manifest in sorted(manifests, key=lambda item: item[1]['shard']):
+        with np.load(os.path.join(directory, manifest['mesh'])) as mesh:
+            positions.append(mesh['positions'])
+            faces.append(mesh['faces'] + vertex_offset)
+            ranges.append(mesh['ranges'] + [vertex_offset, vertex_offset, face_offset, face_offset])
+            feature_ids.append(mesh['feature_ids'])
+        vertex_offset += manifest['vertices']
+        face_offset += manifest['faces']
+
+    positions = np.concatenate(positions)
+    faces = np.concatenate(faces)
+    ranges = np.concatenate(ranges)
+    feature_ids = np.concatenate(feature_ids)
+
+    # Write the merged outputs as a single-process run would
+    # (imported here because shp2obj builds on shard)
+    from shp2obj import write_outputs
+    normal = obj_normals(positions, faces) if bool(is_normal) else None
+
+    # Orient the OBJ and PLY like a single-process run; the GLB stays Y-up
+    obj_positions = positions
+    if up != 'y-up':
+        obj_positions, normal = apply_transform(axis_swap_matrix('y-up', up), positions.copy(), normal)
+
+    write_outputs(upload if upload is not None else os.path.dirname(obj_path) or '.', obj_path, positions,
+                  obj_positions, faces, normal, ranges, feature_ids, len(ranges), np.array(center), ply=ply,
+                  force=force)
+
+    # Sum the numeric statistics of all shards
+    stats = {'shards': count, 'features': len(ranges), 'vertices': len(positions), 'faces': len(faces)}
+    for _, manifest in manifests:
+        for key, value in manifest['stats'].items():
+            if isinstance(value, (int, float)):
+                stats[key] = stats.get(key, 0) + value
+    with open(f'{base}.stats.json', 'w') as f:
+        json.dump(stats, f, indent=2)
+    return stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Merge shards written by shp2obj --shard i/N')
+    parser.add_argument('obj_path', help='Final OBJ path passed to every shard')
+    parser.add_argument('--normal', action='store_true', default=None, help='Include vertex normals in the OBJ')
+    parser.add_argument('--ply', action='store_true', default=None, help='Also write a binary PLY file with feature IDs')
+    parser.add_argument('--up', default=None, choices=['y-up', 'z-up'], help='Axis convention of the OBJ and PLY')
+    parser.add_argument('--upload', default=None, metavar='URL',
+                        help='Upload outputs to S3-compatible storage at http(s)://host/bucket[/prefix]')
+    parser.add_argument('--force', action='store_true', help='Rewrite outputs even when their content is unchanged')
+    args = parser.parse_args()
+
+    print(merge_shards(args.obj_path, args.normal, args.ply, args.up, args.upload, args.force))
@@ -3,35 +3,408 @@ Core module for converting Shapefile (.shp) files to 3D OBJ format.
 This module handles the main conversion process from geospatial data to 3D models.
 """
 
-import geopandas as gpd
+import argparse
+import io
+import os
+import time
 import numpy as np
-from shapely.geometry import Polygon, LinearRing
-import aspose.threed as a3d
-from createTriangle import  polygon_to_triangle_normal, polygon_to_triangle_hole
-from coordinate  import calculate_coordinate
+from createTriangle import  ring_to_triangle_normal, rings_to_triangle_hole
+from coordinate  import calculate_coordinate, polygon_centroid
+from ingest import read_footprints, feature_rings, footprint_center
 from normal import obj_normals
-from save import  write_obj_default, write_obj_normal
+from save import  obj_default_lines, obj_normal_text
+from cull import find_hidden_walls
+from glb import glb_bytes
+from ply import ply_chunks
+from weld import weld_mesh
+from optimize import optimize_mesh
+from dem import open_dem, terrain_heights
+from instance import find_instances, instance_translations, build_prototype, expand_instances, instance_rotations
+from shard import parse_shard, shard_indices, shard_neighbours, write_shard
+from curve import curve_order
+from winding import signed_area, orient_triangles, check_winding
+from estimate import estimate_conversion, print_estimate
+from rotation import axis_swap_matrix, apply_transform
+from clean import clean_footprints, drop_degenerate_faces
+from guard import guard_footprints, print_guard_report, TIME_BUDGET
+from outputs import OutputWriter
+from lidar import lidar_heights
 
-def shp2obj(shp_path, obj_path, field=None, building_height=3, is_normal=False):
+# Visible interval of a wall that no neighbour hides
+FULL_WALL = [(0.0, 1.0)]
+
+def shp2obj(shp_path, obj_path, field=None, building_height=3, is_normal=False, cull=False,
+            dem_path=None, dem_mode='vertices', instance=False, shard=None,
+            pipelined=False, ply=False, weld=None, optimize=False, checkpoint_interval=None, resume=False,
+            order=None, dry_run=False, up='y-up', time_budget=TIME_BUDGET, upload=None, force=False,
+            lidar_path=None):
     """
     Convert Shapefile to OBJ format with 3D building models.
     
     Args:
-        shp_path (str): Path to the input Shapefile
+        shp_path (str): Path to the input Shapefile, GeoParquet, FlatGeobuf or zipped Shapefile
         obj_path (str): Path for the output OBJ file
         field (str, optional): Field name containing building height data
         building_height (float): Default building height in meters (default: 3)
         is_normal (bool): Whether to generate normal vectors for enhanced lighting (default: False)
-    
+        cull (bool): Whether to drop bottom caps and walls hidden between adjacent buildings (default: False)
+        dem_path (str, optional): GeoTIFF DEM used to place building bases on the terrain
+        dem_mode (str): Sample the DEM at footprint 'vertices' (lowest one wins) or 'centroid' (default: 'vertices')
+        instance (bool): Whether to build congruent footprints once and write them as GPU instances (default: False)
+        shard (str or tuple, optional): Build only shard 'i/N' of the input and store it for ``shard.merge_shards``,
+                                        which writes (or uploads) the outputs
+        pipelined (bool): Whether to overlap reading, triangulation and writing batch by batch (default: False)
+        ply (bool): Whether to also write a binary PLY file with per-feature IDs (default: False)
+        weld (float, optional): Merge vertices of a building closer than this distance in meters
+        optimize (bool): Whether to reorder triangles and vertices for the GPU vertex cache (default: False)
+        checkpoint_interval (float, optional): Persist the finished part of the mesh at most every
+                                               this many seconds, next to the output
+        resume (bool): Whether to continue from the checkpoint of an interrupted run (default: False)
+        order (str, optional): Process footprints along a 'hilbert' or 'morton' curve of their centers
+                               and save the source row of every output feature to ``<name>.order.npy``
+        dry_run (bool): Only predict mesh size, output sizes, runtime and peak memory
+                        from the input structure and return the estimate (default: False)
+        up (str): Axis convention of the OBJ and PLY outputs, 'y-up' (X north, Y up, Z east)
+                  or 'z-up' (X east, Y north, Z up); the GLB is always Y-up (default: 'y-up')
+        time_budget (float, optional): Seconds a pathological footprint may spend in isolated
+                                       triangulation before a cheaper fallback (default: 5; None disables)
+        upload (str, optional): Upload the outputs straight from memory to S3-compatible object storage
+                                at 'http(s)://host/bucket[/prefix]' instead of writing local files
+        force (bool): Whether to write every output even when its content hash matches the
+                      manifest of the previous run (default: False)
+        lidar_path (str, optional): LAS point cloud to measure every building's height from
+                                    (roof percentile above the surrounding ground); buildings it
+                                    does not cover keep ``building_height``
+
     Returns:
         None: Saves OBJ file and generates GLB format for Cesium
     """
-    # Read Shapefile using GeoPandas
-    gdf = gpd.read_file(shp_path)
+    # A dry run reads only the geometry structure and writes nothing
+    if dry_run:
+        estimate = estimate_conversion(shp_path, is_normal, cull, ply, instance=instance, weld=weld,
+                                       time_budget=time_budget)
+        print_estimate(estimate)
+        return estimate
+
+    # Pipelined mode streams batches through bounded read, compute and write stages
+    # (imported here because pipeline builds on build_mesh)
+    if pipelined:
+        if cull or instance or shard is not None or ply or order is not None or lidar_path:
+            raise ValueError('Culling, instancing, sharding, spatial ordering, LiDAR heights and PLY output '
+                             'need all footprints at once and are not supported in pipelined mode')
+        if upload is not None:
+            raise ValueError('Uploading is not supported in pipelined mode; the pipeline streams its outputs '
+                             'to local files, so run without --pipeline to upload them')
+        if checkpoint_interval is not None or resume:
+            raise ValueError('Checkpoints are not supported in pipelined mode; the pipeline writes its '
+                             'outputs as it goes, so run without --pipeline to checkpoint a long conversion')
+        from pipeline import run_pipeline
+        run_pipeline(shp_path, obj_path, field, building_height, is_normal, dem_path, dem_mode,
+                     weld=weld, optimize=optimize, up=up, time_budget=time_budget)
+        return
+
+    start_time = time.perf_counter()
+    if shard is not None:
+        if instance:
+            raise ValueError('Instancing is not supported in shard mode')
+        shard = parse_shard(shard) if isinstance(shard, str) else shard
+
+    # Read footprints, place them on the terrain and find hidden walls
+    footprints, shp_center, culling = load_footprints(shp_path, field, building_height, cull, dem_path, dem_mode,
+                                                      time_budget=time_budget, lidar_path=lidar_path, shard=shard)
+
+    # In shard mode, build only this shard's footprints against the global center;
+    # culling above still sees the neighbours in other shards
+    if shard is not None:
+        shard, count = shard
+        indices = shard_indices(footprints, shard, count)
+        if order is not None:
+            indices = curve_order(footprints, order, indices)
+        positions, faces, ranges = build_mesh(footprints, shp_center, building_height, indices, culling)
+        faces, ranges, dropped = drop_degenerate_faces(positions, faces, ranges)
+        if weld is not None:
+            positions, faces, ranges = weld_mesh(positions, faces, ranges, weld)
+        if optimize:
+            positions, faces, ranges, _ = optimize_mesh(positions, faces, ranges)
+        stats = {'input_features': len(indices), 'degenerate_triangles': dropped,
+                 'seconds': time.perf_counter() - start_time}
+        write_shard(obj_path, shard, count, positions, faces, ranges, footprints['feature_ids'][indices], shp_center, stats,
+                    ply, up, upload, is_normal)
+        print(f'Shard {shard}/{count}: {len(indices)} footprints, {len(positions)} vertices, {len(faces)} faces')
+        return
+
+    # Optionally group congruent footprints; walls trimmed by culling make a footprint unique
+    instancing = None
+    indices = np.arange(len(footprints['feature_ids']))
+    if instance:
+        candidates = indices
+        if culling is not None:
+            culled_points = np.array(sorted(culling['visible']), dtype=np.int64)
+            point_rings = np.searchsorted(footprints['ring_offsets'], culled_points, side='right') - 1
+            ring_polygons = np.searchsorted(footprints['polygon_offsets'], point_rings, side='right') - 1
+            candidates = np.setdiff1d(indices, ring_polygons)
+        instancing = find_instances(footprints, candidates=candidates)
+        indices = instancing['singles']
+
+    # Optionally process footprints along a space-filling curve instead of file order
+    if order is not None:
+        indices = curve_order(footprints, order, indices)
+
+    # Extrude every remaining footprint into a 3D building mesh, optionally with checkpoints
+    # (imported here because checkpoint builds on build_mesh)
+    progress = None
+    if checkpoint_interval is not None or resume:
+        from checkpoint import Checkpoint, checkpoint_signature, build_mesh_checkpointed
+        signature = checkpoint_signature(shp_path, indices, inputs=(dem_path, lidar_path), field=field,
+                                         building_height=building_height, cull=cull, dem_mode=dem_mode,
+                                         time_budget=time_budget)
+        progress = Checkpoint(os.path.splitext(obj_path)[0] + '.checkpoint', signature,
+                              checkpoint_interval if checkpoint_interval is not None else 60.0)
+        # A fresh run must not mix its parts with those listed by an older state
+        if not resume:
+            progress.remove()
+        positions, faces, ranges = build_mesh_checkpointed(footprints, shp_center, building_height, indices,
+                                                           culling, progress, resume)
+    else:
+        positions, faces, ranges = build_mesh(footprints, shp_center, building_height, indices, culling)
+    feature_ids = footprints['feature_ids'][indices]
+
+    # Build every instanced group once and place copies of it in the OBJ mesh
+    instances = []
+    if instancing is not None:
+        instances = build_instances(footprints, shp_center, building_height, instancing, culling)
+        for group in instances:
+            copies = expand_instances(group['positions'], group['translations'], group['angles'])
+            num_vertices = len(group['positions'])
+            num_faces = len(group['faces'])
+            for copy in range(len(group['translations'])):
+                ranges = np.vstack([ranges, [[len(positions), len(positions) + num_vertices, len(faces), len(faces) + num_faces]]])
+                faces.extend((np.asarray(group['faces']) + len(positions)).tolist())
+                positions.extend(copies[copy * num_vertices:(copy + 1) * num_vertices].tolist())
+            feature_ids = np.concatenate([feature_ids, group['feature_ids']])
+        print(f"Instancing: {sum(len(group['translations']) for group in instances)} footprints "
+              f"in {len(instances)} groups")
+
+    # Drop zero-area triangles, which have no defined normal
+    faces, ranges, dropped = drop_degenerate_faces(positions, faces, ranges)
+    if dropped:
+        print(f'Cleanup: dropped {dropped} degenerate triangles')
+
+    if culling is not None:
+        print(f"Culling: dropped {len(ranges)} bottom caps, "
+              f"{culling['hidden_walls']} hidden walls and trimmed {culling['trimmed_walls']} walls")
+
+    # Optionally share duplicated vertices; features stay separate because the GLB keeps their IDs
+    if weld is not None:
+        num_vertices = len(positions)
+        positions, faces, ranges = weld_mesh(positions, faces, ranges, weld)
+        print(f'Welding: {num_vertices} -> {len(positions)} vertices')
+
+    # Optionally reorder every building's triangles and vertices for the GPU vertex cache
+    if optimize:
+        positions, faces, ranges, stats = optimize_mesh(positions, faces, ranges)
+        print(f"Vertex cache: ACMR {stats['acmr_before']:.3f} -> {stats['acmr_after']:.3f}")
+
+    # The GLB is single-sided, so report any face that would be culled from outside
+    winding = check_winding(positions, faces, ranges)
+    if len(winding['inconsistent_faces']) or len(winding['inward_features']):
+        print(f"Winding: {len(winding['inconsistent_faces'])} inconsistent faces, "
+              f"{len(winding['inward_features'])} inward-facing features")
+
+    # Calculate normal vectors for enhanced lighting and shading
+    normal = obj_normals(positions, faces) if bool(is_normal) else None
+
+    # Orient the OBJ and PLY outputs with one vectorized transform; the GLB stays Y-up as glTF requires
+    obj_positions = positions
+    if up != 'y-up':
+        obj_positions, normal = apply_transform(axis_swap_matrix('y-up', up), np.array(positions, dtype=np.float64),
+                                                normal)
+
+    # Write or upload every output, skipping the ones whose content did not change since the last run
+    write_outputs(upload if upload is not None else os.path.dirname(obj_path) or '.', obj_path, positions,
+                  obj_positions, faces, normal, ranges, feature_ids, len(indices), shp_center, instances, ply, order,
+                  force)
+
+    # All outputs are complete, so the checkpoint is no longer needed
+    if progress is not None:
+        progress.remove()
+
+def write_outputs(target, obj_path, positions, obj_positions, faces, normal, ranges, feature_ids, num_singles,
+                  shp_center, instances=None, ply=False, order=None, force=False):
+    """
+    Write the outputs of a conversion, skipping unchanged ones (see ``outputs.OutputWriter``).
+
+    Every output is produced in memory and hashed first; only outputs whose
+    content differs from ``<name>.manifest.json`` of the previous run are
+    written to the target directory or uploaded to object storage, byte for
+    byte the same either way. The GLB goes first, so with an upload target the
+    largest object is on the wire while the OBJ text is still being formatted.
+
+    Args:
+        target (str): Output directory or 'http(s)://host/bucket[/prefix]' URL
+        obj_path (str): OBJ path whose file name names the outputs
+        positions (list): Y-up vertex positions for the GLB
+        obj_positions (list): Vertex positions for the OBJ and PLY
+        faces (list): 1-based faces
+        normal (list, optional): Face normals for the OBJ and PLY
+        ranges (numpy.ndarray): Per-feature ranges
+        feature_ids (numpy.ndarray): Source feature ID of every range row
+        num_singles (int): Number of leading features that are not instanced copies
+        shp_center (numpy.ndarray): Global center
+        instances (list, optional): Instanced groups for the GLB
+        ply (bool): Whether to write a binary PLY as well (default: False)
+        order (str, optional): Save the source row of every output feature as ``<name>.order.npy``
+        force (bool): Whether to write every output regardless of the manifest (default: False)
+    """
+    name = os.path.splitext(os.path.basename(obj_path))[0]
+    with OutputWriter(target, f'{name}.manifest.json', force) as writer:
+        # GLB for Cesium, split into 16-bit indexed chunks of nearby buildings;
+        # instanced groups are written once with their instance transforms instead of copies
+        writer.put(f'{name}.glb', glb_bytes(positions, faces, ranges[:num_singles], feature_ids[:num_singles],
+                                            instances=instances))
+
+        # Choose output format based on normal vector requirement
+        if normal is not None:
+            obj = obj_normal_text(obj_positions, faces, normal).encode()
+        else:
+            obj = ''.join(obj_default_lines(obj_positions, faces)).encode()
+        writer.put(f'{name}.obj', obj)
+
+        # Center coordinates for reference
+        writer.put(f'{name}.txt', str(shp_center).encode())
+
+        # Optionally binary PLY for downstream mesh-processing tools
+        if ply:
+            writer.put(f'{name}.ply', ply_chunks(np.asarray(obj_positions), np.asarray(faces) - 1,
+                                                 np.asarray(normal) if normal is not None else None,
+                                                 ranges, feature_ids))
+
+        # Record the source row of every output feature, since the order no longer follows the file
+        if order is not None:
+            buffer = io.BytesIO()
+            np.save(buffer, feature_ids)
+            writer.put(f'{name}.order.npy', buffer.getvalue())
+    writer.report()
+
+def load_footprints(shp_path, field=None, building_height=3, cull=False, dem_path=None, dem_mode='vertices',
+                    clean=True, time_budget=TIME_BUDGET, lidar_path=None, shard=None):
+    """
+    Read footprints and prepare everything the geometry stage needs.
+
+    Args:
+        shp_path (str): Path to the input Shapefile, GeoParquet, FlatGeobuf or zipped Shapefile
+        field (str, optional): Field name containing building height data
+        building_height (float): Default building height in meters (default: 3)
+        cull (bool): Whether to find walls hidden between adjacent buildings (default: False)
+        dem_path (str, optional): GeoTIFF DEM used to place building bases on the terrain
+        dem_mode (str): Sample the DEM at footprint 'vertices' or 'centroid' (default: 'vertices')
+        clean (bool): Whether to remove duplicate, collinear and spike vertices and
+                      repair invalid rings before triangulation (default: True)
+        time_budget (float, optional): Seconds a pathological footprint may spend in isolated
+                                       triangulation before falling back (default: 5; None disables the guard)
+        lidar_path (str, optional): LAS point cloud to measure every building's height from;
+                                    buildings it does not cover keep ``building_height``
+        shard (tuple, optional): (shard index, shard count) whose footprints, and their
+                                 neighbours when culling, are the only ones measured by LiDAR
+
+    Returns:
+        tuple: (footprint buffers, global center, culling information or None)
+    """
+    # Read footprints as flat coordinate buffers through the Arrow columnar path
+    footprints = read_footprints(shp_path, field)
+
+    # Remove vertices that would only add Steiner points and degenerate triangles
+    if clean:
+        footprints, stats = clean_footprints(footprints)
+        if stats['vertices_removed'] or stats['polygons_repaired']:
+            print(f"Cleanup: removed {stats['vertices_removed']} vertices, repaired {stats['polygons_repaired']} "
+                  f"polygons, dropped {stats['polygons_dropped']}")
+
+    # Triangulate huge, hole-riddled or invalid footprints in isolation with a time budget
+    if time_budget is not None:
+        footprints, report = guard_footprints(footprints, time_budget)
+        print_guard_report(report)
 
     # Calculate the center point of the entire Shapefile for coordinate normalization
-    shp_center = np.array([(gdf.total_bounds[0] + gdf.total_bounds[2]) / 2,(gdf.total_bounds[1] + gdf.total_bounds[3])/2])
+    shp_center = footprint_center(footprints)
+
+    # Optionally raise every building base onto the terrain of a local DEM
+    if dem_path:
+        terrain = terrain_heights(footprints, open_dem(dem_path), dem_mode)
+        base = footprints['heights'] if footprints['heights'] is not None else 0
+        footprints['heights'] = base + terrain
+
+    # Optionally measure the height of every building from a LiDAR point cloud
+    if lidar_path:
+        indices = None
+        if shard is not None:
+            indices = shard_indices(footprints, *shard)
+            if cull:
+                indices = shard_neighbours(footprints, indices)
+        measured, stats = lidar_heights(footprints, lidar_path, indices)
+        footprints['extrusions'] = np.where(np.isnan(measured), building_height, measured)
+        print(f"LiDAR: {np.count_nonzero(~np.isnan(measured))} heights measured ({stats['cached']} cached, "
+              f"{stats['points']} points read), {stats['missing']} default")
+
+    # Optionally find the walls buried between adjacent buildings
+    culling = find_hidden_walls(footprints, building_height) if cull else None
+
+    return footprints, shp_center, culling
+
+def build_instances(footprints, shp_center, building_height, instancing, culling=None):
+    """
+    Build the prototype mesh and instance transforms of every congruent group.
+    
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        shp_center (numpy.ndarray): Global center used for coordinate normalization
+        building_height (float): Default building height in meters
+        instancing (dict): Instancing plan from ``instance.find_instances``
+        culling (dict, optional): Hidden walls from ``cull.find_hidden_walls``
+    
+    Returns:
+        list: Groups with prototype 'positions' and 1-based 'faces' plus member
+              'translations', 'angles', 'rotations' and 'feature_ids'
+    """
+    instances = []
+    for group in instancing['groups']:
+        members = group['members']
+
+        # Triangulate and extrude only the first member of the group
+        positions, faces, _ = build_mesh(footprints, shp_center, building_height, members[:1], culling)
+        translations = instance_translations(footprints, shp_center, members)
+
+        instances.append({
+            'positions': build_prototype(positions, translations[0], group['angles'][0]),
+            'faces': faces,
+            'translations': translations,
+            'angles': group['angles'],
+            'rotations': instance_rotations(group['angles']),
+            'feature_ids': footprints['feature_ids'][members],
+        })
+    return instances
+
+def build_mesh(footprints, shp_center, building_height=3, indices=None, culling=None):
+    """
+    Extrude footprints into 3D building meshes.
 
+    Caps and walls are wound counter-clockwise seen from outside the building,
+    including the walls of holes, so clients can cull back faces.
+    
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+        shp_center (numpy.ndarray): Global center used for coordinate normalization
+        building_height (float): Default building height in meters (default: 3)
+        indices (iterable, optional): Polygon indices to extrude (default: all)
+        culling (dict, optional): Hidden walls from ``cull.find_hidden_walls``; when given,
+                                  bottom caps and hidden walls are dropped
+    
+    Returns:
+        tuple: (positions, faces, ranges) with vertex positions as [x, y, z],
+               triangle faces as 1-based vertex indices and one row
+               [vertex_start, vertex_end, face_start, face_end] (0-based, end
+               exclusive) per extruded polygon
+    """
     # Vertex counter for tracking vertex indices in OBJ format
     vertex_counter = 1
 
@@ -41,100 +414,152 @@ def shp2obj(shp_path, obj_path, field=None, building_height=3, is_normal=False):
     # Store all face definitions for the entire model
     faces = []
 
-    # Process each polygon in the Shapefile
-    for idx, row in gdf.iterrows():
-        geom = row.geometry
-
-        if isinstance(geom, Polygon):
-            # Count total interior vertices
-            interior_vertices = 0
-
-            # Perform triangulation based on polygon complexity
-            triangulation = None
-            if len(geom.interiors) > 0:
-                # Handle polygons with holes using specialized triangulation
-                triangulation = polygon_to_triangle_hole(geom, geom.interiors)
-                for interior in geom.interiors:
-                    if isinstance(interior, LinearRing):
-                        interior_vertices += len(interior.coords[:-1])
-            else:
-                # Handle simple polygons without holes
-                triangulation = polygon_to_triangle_normal(geom)
-
-            # Get exterior coordinates of the polygon
-            coord_list = np.array(geom.exterior.coords[:-1])
-
-            # Get building height from field or use default
-            height = row[field] if field else 0
-
-            # Calculate the centroid of the current polygon
-            geo_center = np.array(geom.centroid.coords[0])
-
-            # Store processed points
-            points = []
-
-            # Calculate coordinate offset relative to Shapefile center
-            center = calculate_coordinate(geo_center, shp_center)
-
-            # Add bottom face vertices
-            for coord in triangulation['vertices']:
-                point = calculate_coordinate(coord, geo_center)
-                points.append(point)
-                # Store vertex position in global positions list
-                positions.append([point[0] + center[0], height, point[1] + center[1]])
-
-            # Add top face vertices
-            for point in points:
-                # Store top vertex position with building height offset
-                positions.append([point[0] + center[0], height + building_height, point[1] + center[1]])
-
-            # Calculate vertex count and offset for indexing
-            num_vertices = len(coord_list) + interior_vertices
-            offset = num_vertices
-
-            # Add bottom face triangles
-            for triangle_indices in triangulation['triangles']:
+    # Store the vertex and face range of every polygon
+    ranges = []
+
+    # Process each selected polygon in the footprint buffers
+    if indices is None:
+        indices = range(len(footprints['feature_ids']))
+    for idx in indices:
+        # Exterior ring first, followed by the interior rings (holes)
+        rings = feature_rings(footprints, idx)
+        coord_list = rings[0]
+        interiors = rings[1:]
+
+        # Perform triangulation based on polygon complexity, unless the guard already did
+        triangulation = footprints.get('triangulations', {}).get(idx)
+        if triangulation is None and len(interiors) > 0:
+            # Handle polygons with holes using specialized triangulation
+            triangulation = rings_to_triangle_hole(coord_list, interiors)
+        elif triangulation is None:
+            # Handle simple polygons without holes
+            triangulation = ring_to_triangle_normal(coord_list)
+
+        # Remember where this polygon's vertices and faces start
+        vertex_start = len(positions)
+        face_start = len(faces)
+
+        # Get building height from field or use default; heights are always floats,
+        # so every path (checkpoints, shards, Mesh) writes the same OBJ numbers
+        height = float(footprints['heights'][idx]) if footprints['heights'] is not None else 0.0
+
+        # Extrude by the height measured from a point cloud, if any, or by the default
+        extrusion = float(footprints['extrusions'][idx] if footprints.get('extrusions') is not None else building_height)
+
+        # Calculate the centroid of the current polygon
+        geo_center = polygon_centroid(rings)
+
+        # Store processed points
+        points = []
+
+        # Calculate coordinate offset relative to Shapefile center
+        center = calculate_coordinate(geo_center, shp_center)
+
+        # Add bottom face vertices
+        for coord in triangulation['vertices']:
+            point = calculate_coordinate(coord, geo_center)
+            points.append(point)
+            # Store vertex position in global positions list
+            positions.append([point[0] + center[0], height, point[1] + center[1]])
+
+        # Add top face vertices
+        for point in points:
+            # Store top vertex position with building height offset
+            positions.append([point[0] + center[0], height + extrusion, point[1] + center[1]])
+
+        # Top vertices follow all triangulation vertices, including any Steiner points
+        # that triangle appended after the ring vertices
+        offset = len(points)
+
+        # Orient the caps outwards: top triangles counter-clockwise seen from above,
+        # bottom triangles reversed
+        triangles = orient_triangles(points, triangulation['triangles'])
+
+        # Add bottom face triangles (never visible from above ground, so culling drops them)
+        if culling is None:
+            for triangle_indices in triangles[:, ::-1].tolist():
                 # Store bottom face triangle with adjusted vertex indices
                 faces.append([i + vertex_counter for i in triangle_indices])
 
-            # Add top face triangles
-            for triangle_indices in triangulation['triangles']:
-                # Store top face triangle with offset vertex indices
-                faces.append([i + vertex_counter + offset for i in triangle_indices])
-
-            # Add side face triangles to create 3D building walls
-            for triangle_indices in triangulation['triangles']:
-                base_triangle = [vertex_counter + i for i in triangle_indices]
-                top_triangle = [vertex_counter + i + offset for i in triangle_indices]
-                
-                # Create side faces by connecting bottom and top vertices
-                # Each edge of the triangle creates two triangular side faces
-                faces.append([base_triangle[0], base_triangle[1], top_triangle[1]])
-                faces.append([base_triangle[0], top_triangle[1], top_triangle[0]])
-                faces.append([base_triangle[1], base_triangle[2], top_triangle[2]])
-                faces.append([base_triangle[1], top_triangle[2], top_triangle[1]])
-                faces.append([base_triangle[2], base_triangle[0], top_triangle[0]])
-                faces.append([base_triangle[2], top_triangle[0], top_triangle[2]])
-
-            # Update vertex counter for next polygon
-            vertex_counter += num_vertices * 2
-
-    # Choose output format based on normal vector requirement
-    if bool(is_normal):
-        # Calculate normal vectors for enhanced lighting and shading
-        normal = obj_normals(positions, faces)
-
-        # Save the generated OBJ file with normal vectors
-        write_obj_normal(obj_path, positions, faces, normal)
-    else:
-        # Save the basic OBJ file without normal vectors
-        write_obj_default(obj_path, positions, faces)
+        # Add top face triangles
+        for triangle_indices in triangles.tolist():
+            # Store top face triangle with offset vertex indices
+            faces.append([i + vertex_counter + offset for i in triangle_indices])
+
+        # Build walls from ring segments only, so interior triangulation edges
+        # get no walls, and skip or trim walls hidden by a neighbour
+        visible = culling['visible'] if culling is not None else {}
+        local_start = 0
+        ring_index = footprints['polygon_offsets'][idx]
+        for ring_number, ring in enumerate(rings):
+            ring_start = footprints['ring_offsets'][ring_index]
+
+            # Walls face outwards when the exterior runs counter-clockwise seen
+            # from above and the holes run clockwise; other rings are walked backwards
+            area = signed_area(points[local_start:local_start + len(ring)])
+            backwards = (area < 0) if ring_number == 0 else (area > 0)
+            for k in range(len(ring)):
+                i = local_start + k
+                j = local_start + (k + 1) % len(ring)
+                for t0, t1 in visible.get(ring_start + k, FULL_WALL):
+                    if (t0, t1) == FULL_WALL[0]:
+                        # Whole wall between the existing bottom and top vertices
+                        b0, b1 = vertex_counter + i, vertex_counter + j
+                        u0, u1 = b0 + offset, b1 + offset
+                    else:
+                        # Visible piece of a partly hidden wall gets its own vertices
+                        b0 = len(positions) + 1
+                        b1, u0, u1 = b0 + 1, b0 + 2, b0 + 3
+                        piece = [points[i] + (points[j] - points[i]) * t for t in (t0, t1)]
+                        for level in (height, height + extrusion):
+                            for point in piece:
+                                positions.append([point[0] + center[0], level, point[1] + center[1]])
+                    if backwards:
+                        b0, b1, u0, u1 = b1, b0, u1, u0
+                    faces.append([b0, b1, u1])
+                    faces.append([b0, u1, u0])
+            local_start += len(ring)
+            ring_index += 1
+
+        # Record the ranges and update vertex counter for next polygon
+        ranges.append([vertex_start, len(positions), face_start, len(faces)])
+        vertex_counter = len(positions) + 1
+
+    return positions, faces, np.array(ranges, dtype=np.int64).reshape(-1, 4)
 
-    # Save center coordinates to a text file for reference
-    with open(obj_path.replace('.obj', '.txt'), 'w') as f:
-        f.writelines(str(shp_center))
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert building footprints to 3D OBJ and GLB')
+    parser.add_argument('shp_path', help='Input Shapefile, GeoParquet, FlatGeobuf or zipped Shapefile')
+    parser.add_argument('obj_path', help='Output OBJ path')
+    parser.add_argument('--field', default=None, help='Field name containing building height data')
+    parser.add_argument('--height', type=float, default=3, help='Default building height in meters')
+    parser.add_argument('--normal', action='store_true', help='Include vertex normals in the OBJ')
+    parser.add_argument('--cull', action='store_true', help='Drop bottom caps and hidden party walls')
+    parser.add_argument('--dem', default=None, help='GeoTIFF DEM to place building bases on the terrain')
+    parser.add_argument('--dem-mode', default='vertices', choices=['vertices', 'centroid'])
+    parser.add_argument('--instance', action='store_true', help='Write congruent footprints as GPU instances')
+    parser.add_argument('--shard', default=None, help='Build only shard i/N; merge with "python shard.py obj_path"')
+    parser.add_argument('--pipeline', action='store_true', help='Overlap reading, triangulation and writing')
+    parser.add_argument('--ply', action='store_true', help='Also write a binary PLY file with feature IDs')
+    parser.add_argument('--weld', type=float, default=None, help='Merge vertices of a building closer than this (m)')
+    parser.add_argument('--optimize', action='store_true', help='Reorder indices for the GPU vertex cache')
+    parser.add_argument('--checkpoint', type=float, default=None, metavar='SECONDS',
+                        help='Persist the finished part of the mesh at most every SECONDS')
+    parser.add_argument('--resume', action='store_true', help='Continue from the checkpoint of an interrupted run')
+    parser.add_argument('--order', default=None, choices=['hilbert', 'morton'],
+                        help='Process footprints along a space-filling curve')
+    parser.add_argument('--dry-run', action='store_true', help='Only estimate mesh size, output sizes, runtime and memory')
+    parser.add_argument('--up', default='y-up', choices=['y-up', 'z-up'], help='Axis convention of the OBJ and PLY')
+    parser.add_argument('--time-budget', type=float, default=TIME_BUDGET, metavar='SECONDS',
+                        help='Per-footprint triangulation budget for pathological footprints')
+    parser.add_argument('--upload', default=None, metavar='URL',
+                        help='Upload outputs to S3-compatible storage at http(s)://host/bucket[/prefix]')
+    parser.add_argument('--lidar', default=None, help='LAS point cloud to measure building heights from')
+    parser.add_argument('--force', action='store_true', help='Rewrite outputs even when their content is unchanged')
+    args = parser.parse_args()
 
-    # Convert OBJ to GLB format for Cesium compatibility
-    glb_path = obj_path.replace('.obj', '.glb')
-    scene = a3d.Scene.from_file(obj_path)
-    scene.save(glb_path)
\ No newline at end of file
+    shp2obj(args.shp_path, args.obj_path, args.field, args.height, args.normal, args.cull,
+            args.dem, args.dem_mode, args.instance, args.shard, args.pipeline,
+            args.ply, args.weld, args.optimize, args.checkpoint, args.resume,
+            args.order, args.dry_run, args.up, args.time_budget, args.upload,
+            args.force, args.lidar)
@@ -0,0 +1,226 @@
+"""
+Memory-mapped Shapefile reader for the extrusion fast path.
+This module decodes polygon records from .shp/.shx/.dbf files into flat NumPy buffers without GDAL, GeoPandas or Shapely.
+"""
+
+import os
+import numpy as np
+from ingest import make_footprints
+
+# Shapefile shape type codes sharing the polygon record layout
+POLYGON_TYPES = (5, 15, 25)
+
+# Size of the main file header and of a record header in bytes
+HEADER_SIZE = 100
+RECORD_HEADER_SIZE = 8
+
+def read_shapefile(shp_path, field=None):
+    """
+    Read polygon footprints from a Shapefile by memory-mapping its files.
+
+    The .shx index gives the byte offset of every record, so the shape type,
+    part and point counts of all records are gathered in vectorized reads.
+    Rings are grouped into polygons by their orientation: clockwise rings start
+    a new polygon and counter-clockwise rings are holes of the preceding one.
+
+    Args:
+        shp_path (str): Path to the input .shp file
+        field (str, optional): Field name containing building height data
+
+    Returns:
+        dict: Footprint buffers (see ``ingest.make_footprints``) whose bounds
+              are the bounding box stored in the .shp header
+    """
+    base = os.path.splitext(shp_path)[0]
+    shp = np.memmap(shp_path, dtype=np.uint8, mode='r')
+    header = read_header(shp)
+    if header['shape_type'] not in POLYGON_TYPES:
+        raise ValueError(f'{shp_path} does not contain polygons (shape type {header["shape_type"]})')
+
+    # The .shx index stores big-endian (offset, length) pairs in 16-bit words
+    shx = np.memmap(find_sidecar(base, '.shx'), dtype='>i4', mode='r', offset=HEADER_SIZE).reshape(-1, 2)
+    record_starts = shx[:, 0].astype(np.int64) * 2 + RECORD_HEADER_SIZE
+
+    # Skip null shapes, keeping the record number as feature id
+    shape_types = read_values(shp, record_starts, '<i4')
+    records = np.flatnonzero(np.isin(shape_types, POLYGON_TYPES))
+    record_starts = record_starts[records]
+
+    # Polygon record layout: type, box[4], NumParts, NumPoints, Parts[NumParts], Points[NumPoints]
+    num_parts = read_values(shp, record_starts + 36, '<i4').astype(np.int64)
+    num_points = read_values(shp, record_starts + 40, '<i4').astype(np.int64)
+
+    # Ring start offsets relative to the start of each record's points
+    part_positions = expand_ranges(record_starts + 44, num_parts, 4)
+    parts = read_values(shp, part_positions, '<i4').astype(np.int64)
+
+    # Turn record-relative part offsets into global ring offsets
+    point_offsets = np.concatenate([[0], np.cumsum(num_points)])
+    ring_offsets = np.append(np.repeat(point_offsets[:-1], num_parts) + parts, point_offsets[-1])
+
+    # Gather all x/y doubles of all records in one vectorized read
+    point_positions = expand_ranges(record_starts + 44 + 4 * num_parts, num_points, 16)
+    coords = np.column_stack([read_values(shp, point_positions, '<f8'),
+                              read_values(shp, point_positions + 8, '<f8')])
+
+    # Group rings into polygons by orientation
+    ring_records = np.repeat(np.arange(len(records)), num_parts)
+    first_ring = np.zeros(len(parts), dtype=bool)
+    first_ring[np.concatenate([[0], np.cumsum(num_parts)[:-1]])[num_parts > 0]] = True
+    polygon_starts = np.flatnonzero(first_ring | (ring_signed_areas(coords, ring_offsets) < 0))
+    polygon_offsets = np.append(polygon_starts, len(parts))
+    feature_ids = records[ring_records[polygon_starts]]
+
+    heights = read_dbf_column(find_sidecar(base, '.dbf'), field) if field else None
+    footprints = make_footprints(coords, ring_offsets, polygon_offsets, feature_ids, heights)
+
+    # Use the bounding box of the file header for the global center
+    footprints['bounds'] = header['bounds']
+
+    return footprints
+
+def read_header(shp):
+    """
+    Parse the 100-byte main file header of a Shapefile.
+
+    Args:
+        shp (numpy.ndarray): Memory-mapped bytes of the .shp file
+
+    Returns:
+        dict: Header values 'shape_type' and 'bounds' [minx, miny, maxx, maxy]
+    """
+    file_code = int(np.frombuffer(shp, dtype='>i4', count=1)[0])
+    if file_code != 9994:
+        raise ValueError('Not a Shapefile: invalid file code')
+
+    shape_type = int(np.frombuffer(shp, dtype='<i4', count=1, offset=32)[0])
+    bounds = np.frombuffer(shp, dtype='<f8', count=4, offset=36).copy()
+
+    return {'shape_type': shape_type, 'bounds': bounds}
+
+def find_sidecar(base, extension):
+    """
+    Find a Shapefile sidecar file, accepting upper and lower case extensions.
+
+    Args:
+        base (str): Shapefile path without extension
+        extension (str): Lower case extension including the dot
+
+    Returns:
+        str: Path to the sidecar file
+    """
+    for candidate in (base + extension, base + extension.upper()):
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f'Missing {extension} file for {base}.shp')
+
+def read_values(buffer, positions, dtype):
+    """
+    Read values of a fixed-size type at arbitrary byte positions of a buffer.
+
+    Positions need not be aligned: one strided view of the buffer is created per
+    byte phase, so the gather stays vectorized without copying the buffer.
+
+    Args:
+        buffer (numpy.ndarray): Byte buffer (e.g. a memory map)
+        positions (numpy.ndarray): Byte positions of the values
+        dtype (str): NumPy dtype of the values, including byte order
+
+    Returns:
+        numpy.ndarray: Values read at the given positions
+    """
+    dtype = np.dtype(dtype)
+    size = dtype.itemsize
+    positions = np.asarray(positions, dtype=np.int64)
+    values = np.empty(len(positions), dtype=dtype)
+
+    phases = positions % size
+    for phase in np.unique(phases):
+        mask = phases == phase
+        view = np.frombuffer(buffer, dtype=dtype, count=(len(buffer) - phase) // size, offset=phase)
+        values[mask] = view[(positions[mask] - phase) // size]
+
+    return values
+
+def expand_ranges(starts, counts, stride):
+    """
+    Expand per-record start positions into the positions of all their items.
+
+    Args:
+        starts (numpy.ndarray): Byte position of the first item of every record
+        counts (numpy.ndarray): Number of items in every record
+        stride (int): Size of one item in bytes
+
+    Returns:
+        numpy.ndarray: Byte position of every item, record by record
+    """
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    item_index = np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts)
+    return np.repeat(starts, counts) + item_index * stride
+
+def ring_signed_areas(coords, ring_offsets):
+    """
+    Calculate the signed shoelace area of every closed ring.
+
+    Counter-clockwise rings have a positive area and clockwise rings a negative one.
+
+    Args:
+        coords (numpy.ndarray): Ring vertex coordinates with shape (N, 2)
+        ring_offsets (numpy.ndarray): Start index of every ring plus the end
+
+    Returns:
+        numpy.ndarray: Signed area of every ring
+    """
+    counts = np.diff(ring_offsets)
+    ring_ids = np.repeat(np.arange(len(counts)), counts)
+
+    # Shift each ring to its first vertex to keep the sums precise
+    local = coords - np.repeat(coords[ring_offsets[:-1][counts > 0]], counts[counts > 0], axis=0)
+    following = np.roll(local, -1, axis=0)
+    cross = local[:, 0] * following[:, 1] - following[:, 0] * local[:, 1]
+
+    # The pair formed by a ring's last point and the next ring's first point is not an edge
+    cross[ring_offsets[1:][counts > 0] - 1] = 0
+
+    return np.bincount(ring_ids, weights=cross, minlength=len(counts)) / 2
+
+def read_dbf_column(dbf_path, field):
+    """
+    Read a numeric column of a dBASE (.dbf) file by memory-mapping it.
+
+    Args:
+        dbf_path (str): Path to the .dbf file
+        field (str): Field name to read
+
+    Returns:
+        numpy.ndarray: Column values as floats with missing values set to 0
+    """
+    dbf = np.memmap(dbf_path, dtype=np.uint8, mode='r')
+    num_records = int(np.frombuffer(dbf, dtype='<u4', count=1, offset=4)[0])
+    header_length = int(np.frombuffer(dbf, dtype='<u2', count=1, offset=8)[0])
+    record_length = int(np.frombuffer(dbf, dtype='<u2', count=1, offset=10)[0])
+
+    # Field descriptors are 32 bytes each and end with a 0x0D terminator
+    position = 32
+    field_offset = 1  # Every record starts with a deletion flag byte
+    while dbf[position] != 0x0D:
+        descriptor = bytes(dbf[position:position + 32])
+        name = descriptor[:11].split(b'\x00')[0].decode('ascii', errors='replace')
+        length = descriptor[16]
+        if name.lower() == field.lower():
+            break
+        field_offset += length
+        position += 32
+    else:
+        raise KeyError(f'Field "{field}" does not exist in {dbf_path}')
+
+    # Slice the field bytes of all records and parse them as ASCII numbers
+    records = dbf[header_length:header_length + num_records * record_length].reshape(num_records, record_length)
+    text = np.ascontiguousarray(records[:, field_offset:field_offset + length]).view(f'S{length}').ravel()
+    text = np.char.strip(text)
+
+    # Blank and overflowed ('*') values are treated as missing
+    missing = (text == b'') | np.char.startswith(text, b'*')
+    values = np.where(missing, b'nan', text).astype(np.float64)
+
+    return np.nan_to_num(values)
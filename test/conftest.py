@@ -0,0 +1,18 @@
+"""
+Shared pytest setup for the test modules.
+This module puts the repository root on the import path, where the converter modules live.
+"""
+
+import os
+import sys
+
+# Repository root with the converter modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pytest puts this directory first on the path for every test module, where the standalone
+# test/normal.py script would shadow the converter's normal module; load the converter's first
+import normal
+
+# Sample footprints shipped with the repository
+SAMPLE_SHP = os.path.join(ROOT, 'data', 'building.shp')
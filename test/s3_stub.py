@@ -0,0 +1,160 @@
+"""
+Local stand-in for an S3-compatible object storage such as MinIO, built on the standard library.
+This module serves path-style PUT, GET, multipart upload and abort requests from memory so uploads can be tested without a real endpoint.
+"""
+
+import hashlib
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+class S3Stub:
+    """
+    In-memory S3 endpoint on a free local port.
+
+    Objects are stored under '/bucket/key' paths. Every request must carry a
+    SigV4 Authorization header and a payload hash matching its body. The
+    first ``failures`` object and part uploads are answered with 503 SlowDown
+    to exercise retries.
+
+    Attributes:
+        objects (dict): Content per '/bucket/key' path
+        requests (dict): Number of requests per kind ('put', 'part', 'create', 'complete', 'abort', 'get')
+    """
+
+    def __init__(self, failures=0):
+        """
+        Args:
+            failures (int): Number of uploads answered with 503 before any succeeds (default: 0)
+        """
+        self.objects = {}
+        self.uploads = {}
+        self.requests = {'put': 0, 'part': 0, 'create': 0, 'complete': 0, 'abort': 0, 'get': 0}
+        self.failures = failures
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url(self, bucket='bucket', prefix=''):
+        """
+        Get the path-style target URL of a bucket and prefix.
+
+        Args:
+            bucket (str): Bucket name (default: 'bucket')
+            prefix (str): Key prefix (default: none)
+
+        Returns:
+            str: Target URL for ``upload.Uploader``
+        """
+        host, port = self.server.server_address
+        return f'http://{host}:{port}/{bucket}' + (f'/{prefix}' if prefix else '')
+
+    def handler(self):
+        """
+        Create the request handler class bound to this stub.
+
+        Returns:
+            type: ``BaseHTTPRequestHandler`` subclass
+        """
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body=b'', headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_request(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                url = urlsplit(self.path)
+                query = parse_qs(url.query, keep_blank_values=True)
+                signed = self.headers.get('Authorization', '').startswith('AWS4-HMAC-SHA256 Credential=')
+                if not signed or hashlib.sha256(body).hexdigest() != self.headers.get('x-amz-content-sha256'):
+                    self.reply(403, b'<Error><Code>SignatureDoesNotMatch</Code></Error>')
+                    return None
+                return unquote(url.path), query, body
+
+            def throttled(self):
+                with stub.lock:
+                    if stub.failures > 0:
+                        stub.failures -= 1
+                        self.reply(503, b'<Error><Code>SlowDown</Code></Error>')
+                        return True
+                return False
+
+            def do_PUT(self):
+                request = self.read_request()
+                if request is None or self.throttled():
+                    return
+                path, query, body = request
+                with stub.lock:
+                    if 'partNumber' in query:
+                        stub.uploads[query['uploadId'][0]][int(query['partNumber'][0])] = body
+                        stub.requests['part'] += 1
+                    else:
+                        stub.objects[path] = body
+                        stub.requests['put'] += 1
+                self.reply(200, headers={'ETag': f'"{hashlib.md5(body).hexdigest()}"'})
+
+            def do_POST(self):
+                request = self.read_request()
+                if request is None:
+                    return
+                path, query, body = request
+                with stub.lock:
+                    if 'uploads' in query:
+                        upload_id = uuid.uuid4().hex
+                        stub.uploads[upload_id] = {}
+                        stub.requests['create'] += 1
+                        response = f'<InitiateMultipartUploadResult><UploadId>{upload_id}</UploadId>' \
+                                   f'</InitiateMultipartUploadResult>'
+                    else:
+                        parts = stub.uploads.pop(query['uploadId'][0])
+                        numbers = [int(n) for n in re.findall(rb'<PartNumber>(\d+)</PartNumber>', body)]
+                        stub.objects[path] = b''.join(parts[n] for n in numbers)
+                        stub.requests['complete'] += 1
+                        response = f'<CompleteMultipartUploadResult><ETag>"{len(numbers)}-parts"</ETag>' \
+                                   f'</CompleteMultipartUploadResult>'
+                self.reply(200, response.encode())
+
+            def do_DELETE(self):
+                request = self.read_request()
+                if request is None:
+                    return
+                with stub.lock:
+                    stub.uploads.pop(request[1]['uploadId'][0], None)
+                    stub.requests['abort'] += 1
+                self.reply(204)
+
+            def do_GET(self):
+                request = self.read_request()
+                if request is None:
+                    return
+                with stub.lock:
+                    stub.requests['get'] += 1
+                    content = stub.objects.get(request[0])
+                if content is None:
+                    self.reply(404, b'<Error><Code>NoSuchKey</Code></Error>')
+                else:
+                    self.reply(200, content)
+
+        return Handler
@@ -0,0 +1,71 @@
+"""
+Test module for checkpoint and resume.
+This module interrupts conversions of the sample input and checks that resumed and checkpointed runs write the same OBJ as an uninterrupted one.
+"""
+
+import pytest
+import checkpoint
+from checkpoint import Checkpoint
+from conftest import SAMPLE_SHP
+from shp2obj import shp2obj
+
+class Interrupted(Exception):
+    """
+    Raised in place of a checkpoint to simulate a killed run.
+    """
+
+def interrupt_after(monkeypatch, saves):
+    """
+    Let a number of checkpoints be written, then interrupt the run at the next one.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): Fixture used to patch ``Checkpoint.save``
+        saves (int): Number of checkpoints written before the interruption
+    """
+    save = Checkpoint.save
+    count = [0]
+
+    def limited_save(self, *args):
+        if count[0] == saves:
+            raise Interrupted()
+        count[0] += 1
+        save(self, *args)
+
+    monkeypatch.setattr(Checkpoint, 'save', limited_save)
+
+def test_checkpointed_runs_write_the_same_obj(tmp_path, monkeypatch):
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'plain.obj'))
+    expected = (tmp_path / 'plain.obj').read_bytes()
+    monkeypatch.setattr(checkpoint, 'BLOCK_SIZE', 8)
+
+    # Uninterrupted with a checkpoint after every block
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'building.obj'), checkpoint_interval=0)
+    assert (tmp_path / 'building.obj').read_bytes() == expected
+    assert not (tmp_path / 'building.checkpoint').exists()
+
+    # Interrupted, then resumed from the parts written so far
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, 2)
+        with pytest.raises(Interrupted):
+            shp2obj(SAMPLE_SHP, str(tmp_path / 'building.obj'), checkpoint_interval=0)
+    assert len(list((tmp_path / 'building.checkpoint').glob('part-*.npz'))) == 2
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'building.obj'), checkpoint_interval=0, resume=True)
+    assert (tmp_path / 'building.obj').read_bytes() == expected
+
+def test_fresh_run_discards_older_checkpoint(tmp_path, monkeypatch):
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'plain.obj'))
+    monkeypatch.setattr(checkpoint, 'BLOCK_SIZE', 8)
+
+    # A run with other settings leaves its checkpoint behind, then a fresh run is killed before its first one
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, 2)
+        with pytest.raises(Interrupted):
+            shp2obj(SAMPLE_SHP, str(tmp_path / 'building.obj'), building_height=6, checkpoint_interval=0)
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, 0)
+        with pytest.raises(Interrupted):
+            shp2obj(SAMPLE_SHP, str(tmp_path / 'building.obj'), checkpoint_interval=0)
+
+    # Resuming the fresh run starts over instead of picking up the older parts
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'building.obj'), checkpoint_interval=0, resume=True)
+    assert (tmp_path / 'building.obj').read_bytes() == (tmp_path / 'plain.obj').read_bytes()
@@ -0,0 +1,72 @@
+"""
+Test module for geometry cleanup.
+This module feeds footprints with duplicate, collinear and spike vertices and self-intersections through the cleanup and checks the repaired rings, the sample input and the degenerate triangle filter.
+"""
+
+import numpy as np
+import shapely
+from conftest import SAMPLE_SHP
+from clean import clean_footprints, drop_degenerate_faces
+from ingest import make_footprints, read_footprints
+
+def to_polygons(footprints):
+    """
+    Convert footprint buffers to Shapely polygons.
+
+    Args:
+        footprints (dict): Footprint buffers (see ``ingest.make_footprints``)
+
+    Returns:
+        numpy.ndarray: One polygon per footprint
+    """
+    return shapely.from_ragged_array(shapely.GeometryType.POLYGON, footprints['coords'],
+                                     (footprints['ring_offsets'], footprints['polygon_offsets']))
+
+def test_broken_rings_are_repaired():
+    rings = [
+        # Square with a repeated vertex and a collinear midpoint
+        [(0, 0), (0, 1), (0, 1), (0, 2), (2, 2), (2, 0), (0, 0)],
+        # Bow tie crossing itself at (11, 1)
+        [(10, 0), (12, 2), (12, 0), (10, 2), (10, 0)],
+        # Square with a spike going out and straight back
+        [(20, 0), (20, 2), (21, 2), (21, 5), (21, 2), (22, 2), (22, 0), (20, 0)],
+        # Ring collapsed onto a line
+        [(30, 0), (31, 0), (32, 0), (30, 0)],
+    ]
+    offsets = np.cumsum([0] + [len(ring) for ring in rings])
+    footprints = make_footprints(np.array([p for ring in rings for p in ring], dtype=np.float64) * 1e-4, offsets,
+                                 np.arange(5), np.arange(4), np.array([1.0, 2.0, 3.0, 4.0]))
+
+    cleaned, stats = clean_footprints(footprints)
+    polygons = to_polygons(cleaned)
+    assert shapely.is_valid(polygons).all()
+    assert (stats['polygons_repaired'], stats['polygons_dropped']) == (3, 1)
+
+    # The bow tie becomes two triangles of the same feature; the square and spike keep only their corners
+    assert cleaned['feature_ids'].tolist() == [0, 1, 1, 2]
+    assert cleaned['heights'].tolist() == [1.0, 2.0, 2.0, 3.0]
+    assert np.diff(cleaned['ring_offsets']).tolist() == [5, 4, 4, 5]
+    assert np.allclose(shapely.area(polygons) / 1e-8, [4, 1, 1, 4])
+    assert np.array_equal(cleaned['bounds'], footprints['bounds'])
+
+def test_sample_cleanup_keeps_the_footprints():
+    footprints = read_footprints(SAMPLE_SHP)
+    cleaned, stats = clean_footprints(footprints)
+    assert shapely.is_valid(to_polygons(cleaned)).all()
+    assert stats['polygons_dropped'] == 0
+    assert np.isclose(shapely.area(to_polygons(cleaned)).sum(), shapely.area(to_polygons(footprints)).sum(), rtol=1e-6)
+    assert sorted(set(cleaned['feature_ids'].tolist())) == sorted(set(footprints['feature_ids'].tolist()))
+
+def test_degenerate_triangles_are_dropped():
+    positions = [[0, 0, 0], [1, 0, 0], [0, 1, 0], [2, 0, 0], [0, 0, 1], [0, 1, 1], [1, 0, 1]]
+    faces = [[1, 2, 3], [1, 2, 4], [5, 6, 7], [5, 5, 6]]
+    ranges = np.array([[0, 4, 0, 2], [4, 7, 2, 4]])
+    kept, new_ranges, dropped = drop_degenerate_faces(positions, faces, ranges)
+    assert dropped == 2
+    assert kept.tolist() == [[1, 2, 3], [5, 6, 7]]
+    assert new_ranges.tolist() == [[0, 4, 0, 1], [4, 7, 1, 2]]
+
+    # Clean meshes come back untouched
+    first_faces, first_ranges = faces[:1], ranges[:1]
+    kept, new_ranges, dropped = drop_degenerate_faces(positions, first_faces, first_ranges)
+    assert kept is first_faces and new_ranges is first_ranges and dropped == 0
@@ -0,0 +1,81 @@
+"""
+Test module for hidden-surface culling.
+This module extrudes a row of touching buildings and the sample input with and without culling and checks which surfaces disappear.
+"""
+
+import numpy as np
+from conftest import SAMPLE_SHP
+from cull import find_hidden_walls
+from ingest import make_footprints, footprint_center
+from shp2obj import build_mesh, shp2obj
+from test_shard import read_triangles
+
+# Side of the square test footprints in degrees (about 11 m)
+SIDE = 1e-4
+
+def face_areas(positions, faces):
+    """
+    Calculate the area and unit normal of every triangle.
+
+    Args:
+        positions (list): Vertex positions
+        faces (list): 1-based faces
+
+    Returns:
+        tuple: (areas with shape (M,), unit normals with shape (M, 3))
+    """
+    triangles = np.asarray(positions, dtype=np.float64)[np.asarray(faces) - 1]
+    cross = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    areas = np.linalg.norm(cross, axis=1) / 2
+    return areas, cross / (2 * areas[:, None])
+
+def row_of_buildings():
+    """
+    Build three footprints in a row: a low one, a tall one, and a low one shifted half a side north.
+
+    Returns:
+        dict: Footprint buffers with per-building extrusions
+    """
+    def square(west, south):
+        return [(west, south), (west, south + SIDE), (west + SIDE, south + SIDE), (west + SIDE, south), (west, south)]
+
+    rings = [square(0, 0), square(SIDE, 0), square(2 * SIDE, SIDE / 2)]
+    footprints = make_footprints(np.array([p for ring in rings for p in ring]), np.array([0, 5, 10, 15]),
+                                 np.array([0, 1, 2, 3]), np.array([0, 1, 2]))
+    footprints['extrusions'] = np.array([3.0, 6.0, 3.0])
+    return footprints
+
+def test_walls_against_taller_neighbours_are_hidden():
+    footprints = row_of_buildings()
+    culling = find_hidden_walls(footprints)
+
+    # The low building's east wall is covered by the tall one, half of the shifted one's west wall too;
+    # the tall building's walls stay visible above its low neighbours
+    assert (culling['hidden_walls'], culling['trimmed_walls']) == (1, 1)
+
+    center = footprint_center(footprints)
+    positions, faces, ranges = build_mesh(footprints, center, 3)
+    culled_positions, culled_faces, _ = build_mesh(footprints, center, 3, None, culling)
+    areas, normals = face_areas(positions, faces)
+    culled_areas, culled_normals = face_areas(culled_positions, culled_faces)
+    assert (culled_normals[:, 1] > -0.5).all()
+
+    # Model axes are [north, up, east]
+    owners = np.repeat(np.arange(3), ranges[:, 3] - ranges[:, 2])
+    bottoms = areas[normals[:, 1] < -0.5].sum()
+    east_wall = areas[(owners == 0) & (normals[:, 2] > 0.5)].sum()
+    west_wall = areas[(owners == 2) & (normals[:, 2] < -0.5)].sum()
+    assert np.isclose(culled_areas.sum(), areas.sum() - bottoms - east_wall - west_wall / 2)
+
+def test_sample_drops_bottom_caps(tmp_path):
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'full.obj'))
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'culled.obj'), cull=True)
+    full = read_triangles(tmp_path / 'full.obj').reshape(-1, 3, 3)
+    culled = read_triangles(tmp_path / 'culled.obj').reshape(-1, 3, 3)
+
+    def up(triangles):
+        return np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])[:, 1]
+
+    # Every downward-facing triangle is gone, every other one is kept unless it is a hidden wall
+    assert (up(full) < 0).any() and not (up(culled) < -1e-9).any()
+    assert len(culled) <= (up(full) >= 0).sum()
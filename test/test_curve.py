@@ -0,0 +1,90 @@
+"""
+Test module for space-filling curve keys.
+This module checks the vectorized Hilbert and Morton keys against the textbook definitions and the curve order of the sample buildings.
+"""
+
+import numpy as np
+import pytest
+from conftest import SAMPLE_SHP
+from curve import curve_order, footprint_centers, hilbert_keys, morton_keys
+from ingest import read_footprints
+from shp2obj import shp2obj
+from test_shard import read_triangles
+
+# Quantization bits of the test grids
+BITS = 5
+
+def hilbert_index(n, x, y):
+    """
+    Calculate the Hilbert index of one grid cell, following the classic iterative definition.
+
+    Args:
+        n (int): Side of the grid, a power of two
+        x (int): Cell column
+        y (int): Cell row
+
+    Returns:
+        int: Position of the cell along the curve
+    """
+    d = 0
+    s = n // 2
+    while s > 0:
+        rx = int(x & s > 0)
+        ry = int(y & s > 0)
+        d += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x, y = s - 1 - x, s - 1 - y
+            x, y = y, x
+        s //= 2
+    return d
+
+def grid_cells(bits):
+    """
+    List every cell of a square grid as points, with the bounds that quantize them onto themselves.
+
+    Args:
+        bits (int): Bits per axis
+
+    Returns:
+        tuple: (cells with shape (4 ** bits, 2), bounds [minx, miny, maxx, maxy])
+    """
+    n = 2 ** bits
+    cells = np.indices((n, n)).reshape(2, -1).T.astype(np.float64)
+    return cells, [0, 0, n - 1, n - 1]
+
+def test_hilbert_keys_walk_neighbouring_cells():
+    cells, bounds = grid_cells(BITS)
+    keys = hilbert_keys(cells, BITS, bounds)
+    assert keys.tolist() == [hilbert_index(2 ** BITS, int(x), int(y)) for x, y in cells]
+
+    # Every cell is visited once and each step moves to an edge neighbour
+    path = cells[np.argsort(keys)]
+    assert sorted(keys.tolist()) == list(range(len(cells)))
+    assert (np.abs(np.diff(path, axis=0)).sum(axis=1) == 1).all()
+
+def test_morton_keys_interleave_bits():
+    cells, bounds = grid_cells(BITS)
+    keys = morton_keys(cells, BITS, bounds)
+    expected = [sum((int(x) >> bit & 1) << 2 * bit | (int(y) >> bit & 1) << 2 * bit + 1 for bit in range(BITS))
+                for x, y in cells]
+    assert keys.tolist() == expected
+
+def test_sample_curve_order(tmp_path):
+    footprints = read_footprints(SAMPLE_SHP)
+    order = curve_order(footprints)
+    assert sorted(order.tolist()) == list(range(len(footprints['feature_ids'])))
+
+    # Neighbours along the curve are closer on average than neighbours in file order
+    centers = footprint_centers(footprints)
+    assert (np.linalg.norm(np.diff(centers[order], axis=0), axis=1).mean()
+            < np.linalg.norm(np.diff(centers, axis=0), axis=1).mean())
+
+    # The converter writes the same buildings and records the source row of every output feature
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'plain.obj'))
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'ordered.obj'), order='hilbert')
+    assert np.array_equal(read_triangles(tmp_path / 'ordered.obj'), read_triangles(tmp_path / 'plain.obj'))
+    assert np.load(tmp_path / 'ordered.order.npy').tolist() == footprints['feature_ids'][order].tolist()
+
+    with pytest.raises(ValueError, match='Unknown curve'):
+        curve_order(footprints, 'peano')
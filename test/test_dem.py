@@ -0,0 +1,214 @@
+"""
+Test module for the GeoTIFF DEM reader.
+This module writes small GeoTIFFs with every supported compression, predictor and block layout and checks that the decoded pixels match.
+"""
+
+import struct
+import zlib
+import numpy as np
+import pytest
+from dem import open_dem, sample_dem, sample_pixels
+
+# GeoTIFF keys of longitude/latitude on WGS 84 and of UTM zone 50N
+WGS84_KEYS = ((1024, 2), (2048, 4326))
+UTM_KEYS = ((1024, 1), (3072, 32650))
+
+# Upper-left corner and pixel size of the test rasters in degrees
+ORIGIN = (116.0, 40.0)
+PIXEL = 1e-4
+
+def lzw_encode(data):
+    """
+    Compress bytes with TIFF LZW (MSB-first codes with early change).
+
+    Args:
+        data (bytes): Uncompressed bytes
+
+    Returns:
+        bytes: LZW stream
+    """
+    value, bits, out = 0, 0, bytearray()
+    table, next_code, width = {}, 258, 9
+
+    def emit(code):
+        nonlocal value, bits
+        value = value << width | code
+        bits += width
+        while bits >= 8:
+            bits -= 8
+            out.append(value >> bits & 0xFF)
+        value &= (1 << bits) - 1
+
+    emit(256)
+    table = {bytes([i]): i for i in range(256)}
+    word = b''
+    for byte in data:
+        extended = word + bytes([byte])
+        if extended in table:
+            word = extended
+            continue
+        emit(table[word])
+        table[extended] = next_code
+        next_code += 1
+        word = bytes([byte])
+
+        # Widen the codes one entry early and start over before the 12-bit table is full
+        if next_code == 4094:
+            emit(256)
+            table, next_code, width = {bytes([i]): i for i in range(256)}, 258, 9
+        elif next_code == 1 << width:
+            width += 1
+    if word:
+        emit(table[word])
+    emit(257)
+    if bits:
+        out.append(value << (8 - bits) & 0xFF)
+    return bytes(out)
+
+def encode_block(block, compression, predictor):
+    """
+    Apply a TIFF predictor and compression to one raster block.
+
+    Args:
+        block (numpy.ndarray): Block pixels with shape (rows, cols)
+        compression (int): 1 (none), 5 (LZW) or 8 (Deflate)
+        predictor (int): 1 (none), 2 (horizontal differencing) or 3 (floating point)
+
+    Returns:
+        bytes: Encoded block
+    """
+    if predictor == 2:
+        raw = block.astype(block.dtype.newbyteorder('<'))
+        raw[:, 1:] = block[:, 1:] - block[:, :-1]
+        raw = raw.tobytes()
+    elif predictor == 3:
+        # Split the big-endian samples of every row into byte planes, then difference the bytes
+        samples = block.astype(block.dtype.newbyteorder('>')).view(np.uint8).reshape(*block.shape, -1)
+        planes = samples.transpose(0, 2, 1).reshape(block.shape[0], -1)
+        raw = planes.copy()
+        raw[:, 1:] = planes[:, 1:] - planes[:, :-1]
+        raw = raw.tobytes()
+    else:
+        raw = block.astype(block.dtype.newbyteorder('<')).tobytes()
+
+    if compression == 5:
+        return lzw_encode(raw)
+    if compression == 8:
+        return zlib.compress(raw)
+    return raw
+
+def write_geotiff(path, array, compression=1, predictor=1, tile=None, keys=WGS84_KEYS, nodata=None):
+    """
+    Write a single-band little-endian GeoTIFF.
+
+    Args:
+        path (str): Output path
+        array (numpy.ndarray): Pixels with shape (rows, cols)
+        compression (int): TIFF compression code (default: 1)
+        predictor (int): TIFF predictor code (default: 1)
+        tile (int): Tile size, or None for strips of a third of the rows (default: None)
+        keys (tuple): (key ID, value) pairs of the GeoKey directory (default: WGS 84)
+        nodata (float): GDAL nodata value (default: None)
+    """
+    height, width = array.shape
+    block_height, block_width = (tile, tile) if tile else (max(1, height // 3), width)
+    blocks = []
+    for row in range(0, height, block_height):
+        for col in range(0, width, block_width):
+            part = array[row:row + block_height, col:col + block_width]
+            block = np.zeros((block_height, block_width) if tile else part.shape, dtype=array.dtype)
+            block[:part.shape[0], :part.shape[1]] = part
+            blocks.append(encode_block(block, compression, predictor))
+
+    # Blocks follow the 8-byte header; out-of-line tag values follow the blocks
+    offsets = 8 + np.concatenate([[0], np.cumsum([len(block) for block in blocks])[:-1]])
+    counts = [len(block) for block in blocks]
+    sample_format = {'u': 1, 'i': 2, 'f': 3}[array.dtype.kind]
+    directory = [1, 1, 0, len(keys)] + [v for key, value in keys for v in (key, 0, 1, value)]
+    entries = [
+        (256, 4, [width]), (257, 4, [height]), (258, 3, [array.dtype.itemsize * 8]), (259, 3, [compression]),
+        (262, 3, [1]), (277, 3, [1]), (284, 3, [1]), (317, 3, [predictor]), (339, 3, [sample_format]),
+        (33550, 12, [PIXEL, PIXEL, 0.0]), (33922, 12, [0.0, 0.0, 0.0, ORIGIN[0], ORIGIN[1], 0.0]),
+        (34735, 3, directory),
+    ]
+    if tile:
+        entries += [(322, 3, [tile]), (323, 3, [tile]), (324, 4, offsets), (325, 4, counts)]
+    else:
+        entries += [(273, 4, offsets), (278, 4, [block_height]), (279, 4, counts)]
+    if nodata is not None:
+        entries.append((42113, 2, list(f'{nodata}\x00'.encode())))
+
+    formats = {2: 'B', 3: 'H', 4: 'I', 12: 'd'}
+    extra = bytearray()
+    extra_start = 8 + sum(counts)
+    ifd_offset = extra_start + sum(len(values) * struct.calcsize(formats[kind]) for _, kind, values in entries) + 1 & ~1
+    fields = []
+    for tag, kind, values in sorted(entries):
+        packed = struct.pack(f'<{len(values)}{formats[kind]}', *values)
+        if len(packed) <= 4:
+            fields.append(struct.pack('<HHI', tag, kind, len(values)) + packed.ljust(4, b'\x00'))
+        else:
+            fields.append(struct.pack('<HHII', tag, kind, len(values), extra_start + len(extra)))
+            extra += packed
+    extra = extra.ljust(ifd_offset - extra_start, b'\x00')
+
+    with open(path, 'wb') as f:
+        f.write(b'II' + struct.pack('<HI', 42, ifd_offset))
+        f.write(b''.join(blocks))
+        f.write(extra)
+        f.write(struct.pack('<H', len(fields)) + b''.join(fields) + struct.pack('<I', 0))
+
+def read_all(dem):
+    """
+    Read every pixel of a DEM through ``sample_pixels``.
+
+    Args:
+        dem (dict): DEM opened with ``open_dem``
+
+    Returns:
+        numpy.ndarray: Pixel values with shape (rows, cols)
+    """
+    rows, cols = np.indices((dem['height'], dem['width'])).reshape(2, -1)
+    return sample_pixels(dem, rows, cols).reshape(dem['height'], dem['width'])
+
+@pytest.mark.parametrize('dtype, predictor', [('int16', 1), ('int16', 2), ('uint16', 2), ('float32', 1), ('float32', 3)])
+@pytest.mark.parametrize('compression', [1, 5, 8])
+@pytest.mark.parametrize('tile', [None, 16])
+def test_decoded_pixels_match(tmp_path, dtype, predictor, compression, tile):
+    # Smooth terrain with noise, so the predictors have something to remove
+    rows, cols = np.indices((50, 70))
+    rng = np.random.default_rng(0)
+    array = (np.sin(rows / 7) * 300 + cols * 2 + rng.normal(0, 40, rows.shape)).astype(dtype)
+    if dtype == 'uint16':
+        array = (array.astype(np.int32) + 1000).astype(dtype)
+    path = str(tmp_path / 'dem.tif')
+    write_geotiff(path, array, compression, predictor, tile)
+
+    dem = open_dem(path)
+    assert np.array_equal(read_all(dem), array.astype(np.float64))
+
+def test_lzw_restarts_after_a_full_table(tmp_path):
+    # Random bytes add a table entry per code, so the 12-bit table fills several times
+    array = np.random.default_rng(1).integers(-32768, 32767, (128, 128)).astype(np.int16)
+    path = str(tmp_path / 'dem.tif')
+    write_geotiff(path, array, compression=5)
+    assert np.array_equal(read_all(open_dem(path)), array.astype(np.float64))
+
+def test_nodata_and_bilinear_sampling(tmp_path):
+    array = np.array([[10, 20, 30], [40, 50, 60], [70, 80, -9999]], dtype=np.float32)
+    path = str(tmp_path / 'dem.tif')
+    write_geotiff(path, array, compression=8, predictor=3, nodata=-9999)
+    dem = open_dem(path)
+
+    # Pixel centers sample exactly, a point between four centers averages them
+    x = ORIGIN[0] + PIXEL * np.array([0.5, 1.5, 1.0, 2.5, 5.0])
+    y = ORIGIN[1] - PIXEL * np.array([0.5, 1.5, 1.0, 2.5, 0.5])
+    values = sample_dem(dem, x, y)
+    assert np.allclose(values[:3], [10, 50, 30])
+    assert np.isnan(values[3:]).all()
+
+def test_projected_dem_is_rejected(tmp_path):
+    path = str(tmp_path / 'utm.tif')
+    write_geotiff(path, np.zeros((4, 4), dtype=np.float32), keys=UTM_KEYS)
+    with pytest.raises(ValueError, match='EPSG:32650'):
+        open_dem(path)
@@ -0,0 +1,39 @@
+"""
+Test module for the dry-run cost estimator.
+This module compares the predicted mesh of the sample input with a real conversion and checks how calibrations are cached.
+"""
+
+import estimate
+from conftest import SAMPLE_SHP
+from estimate import calibrate, calibration_key, calibration_path, estimate_conversion, load_calibration
+from shp2obj import shp2obj
+
+def test_estimate_matches_conversion(tmp_path):
+    result = estimate_conversion(SAMPLE_SHP, calibration=calibrate(output=None, repeat=1))
+    assert result['excluded'] == []
+
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'building.obj'))
+    lines = (tmp_path / 'building.obj').read_text().splitlines()
+    assert result['vertices'] == sum(line.startswith('v ') for line in lines)
+    assert result['faces'] == sum(line.startswith('f ') for line in lines)
+
+    requested = estimate_conversion(SAMPLE_SHP, calibration=calibrate(output=None, repeat=1), instance=True, weld=0.01,
+                                    time_budget=5.0)
+    assert len(requested['excluded']) == 3
+
+def test_calibration_is_keyed_on_code_libraries_and_machine(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(estimate, 'CALIBRATION_DIR', str(tmp_path))
+    key = calibration_key()
+
+    # The first load announces and stores the benchmark, the second reuses it
+    first = load_calibration()
+    assert 'Calibrating the estimator' in capsys.readouterr().out
+    assert load_calibration() == first
+    assert capsys.readouterr().out == ''
+
+    # Another library version, or a stale file without a key, gets its own benchmark
+    other = dict(key, packages=dict(key['packages'], numpy='0.0'))
+    assert calibration_path(other) != calibration_path(key)
+    monkeypatch.setattr(estimate, 'calibration_key', lambda: other)
+    assert load_calibration()['key'] == other
+    assert 'Calibrating the estimator' in capsys.readouterr().out
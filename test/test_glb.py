@@ -0,0 +1,151 @@
+"""
+Test module for GLB encoding.
+This module decodes the GLB written for the sample footprints and checks what clients read from it.
+"""
+
+import json
+import struct
+import numpy as np
+from conftest import SAMPLE_SHP
+from glb import glb_bytes
+from ingest import make_footprints, footprint_center
+from shp2obj import load_footprints, build_mesh
+
+# glTF component types as NumPy dtypes
+DTYPES = {5121: '<u1', 5123: '<u2', 5125: '<u4', 5126: '<f4'}
+COMPONENTS = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4}
+
+def read_glb(data):
+    """
+    Split GLB bytes into the glTF JSON document and the binary chunk.
+
+    Args:
+        data (bytes): GLB file content
+
+    Returns:
+        tuple: (glTF JSON document, binary chunk)
+    """
+    json_length, = struct.unpack_from('<I', data, 12)
+    gltf = json.loads(data[20:20 + json_length])
+    return gltf, data[20 + json_length + 8:]
+
+def read_accessor(gltf, binary, index):
+    """
+    Read the values of an accessor.
+
+    Args:
+        gltf (dict): glTF JSON document
+        binary (bytes): Binary chunk
+        index (int): Accessor index
+
+    Returns:
+        numpy.ndarray: Values with shape (count,) or (count, components)
+    """
+    accessor = gltf['accessors'][index]
+    view = gltf['bufferViews'][accessor['bufferView']]
+    components = COMPONENTS[accessor['type']]
+    values = np.frombuffer(binary, dtype=DTYPES[accessor['componentType']], count=accessor['count'] * components,
+                           offset=view['byteOffset'])
+    return values.reshape(-1, components) if components > 1 else values
+
+def read_source_ids(gltf, binary, feature_ids):
+    """
+    Resolve a feature ID set to the source IDs stored in its property table.
+
+    Args:
+        gltf (dict): glTF JSON document
+        binary (bytes): Binary chunk
+        feature_ids (dict): Feature ID set of EXT_mesh_features or EXT_instance_features
+
+    Returns:
+        numpy.ndarray: Source ID of every feature in the table
+    """
+    table = gltf['extensions']['EXT_structural_metadata']['propertyTables'][feature_ids['propertyTable']]
+    view = gltf['bufferViews'][table['properties']['source_id']['values']]
+    assert view['byteOffset'] % 8 == 0
+    return np.frombuffer(binary, dtype='<i8', count=table['count'], offset=view['byteOffset'])
+
+def sample_mesh():
+    footprints, center, _ = load_footprints(SAMPLE_SHP, time_budget=None)
+    positions, faces, ranges = build_mesh(footprints, center)
+    return positions, faces, ranges
+
+def test_feature_ids_above_float32_range_round_trip():
+    positions, faces, ranges = sample_mesh()
+    source_ids = 2 ** 40 + 3 + np.arange(len(ranges), dtype=np.int64) * (2 ** 24 + 1)
+
+    # A small vertex budget splits the buildings over several chunks
+    gltf, binary = read_glb(glb_bytes(positions, faces, ranges, source_ids, max_vertices=200))
+    primitives = gltf['meshes'][0]['primitives']
+    assert len(primitives) > 1
+
+    vertex_ids = []
+    for primitive in primitives:
+        feature_set = primitive['extensions']['EXT_mesh_features']['featureIds'][0]
+        index = read_accessor(gltf, binary, primitive['attributes']['_FEATURE_ID_0'])
+        table = read_source_ids(gltf, binary, feature_set)
+        assert index.max() < feature_set['featureCount'] == len(table)
+        vertex_ids.append(table[index.astype(np.int64)])
+
+    expected = np.repeat(source_ids, ranges[:, 1] - ranges[:, 0])
+    assert np.array_equal(np.sort(np.concatenate(vertex_ids)), np.sort(expected))
+
+def test_instance_feature_ids_round_trip():
+    group = {
+        'positions': [[0, 0, 0], [1, 0, 0], [0, 1, 0]],
+        'faces': [[1, 2, 3]],
+        'translations': [[0, 0, 0], [5, 0, 0]],
+        'rotations': [[0, 0, 0, 1], [0, 0, 0, 1]],
+        'feature_ids': np.array([2 ** 24 + 1, 2 ** 53 + 7]),
+    }
+    gltf, binary = read_glb(glb_bytes([], [], instances=[group]))
+    node = gltf['nodes'][0]['extensions']
+    index = read_accessor(gltf, binary, node['EXT_mesh_gpu_instancing']['attributes']['_FEATURE_ID_0'])
+    table = read_source_ids(gltf, binary, node['EXT_instance_features']['featureIds'][0])
+    assert table[index.astype(np.int64)].tolist() == [2 ** 24 + 1, 2 ** 53 + 7]
+    assert 'EXT_structural_metadata' in gltf['extensionsUsed']
+
+def read_outline_edges(gltf, binary):
+    """
+    Read the outline edges of every primitive as pairs of vertex positions.
+
+    Args:
+        gltf (dict): glTF JSON document
+        binary (bytes): Binary chunk
+
+    Returns:
+        numpy.ndarray: Edge end points with shape (E, 2, 3)
+    """
+    edges = []
+    for primitive in gltf['meshes'][0]['primitives']:
+        positions = read_accessor(gltf, binary, primitive['attributes']['POSITION'])
+        pairs = read_accessor(gltf, binary, primitive['extensions']['CESIUM_primitive_outline']['indices'])
+        edges.append(positions[pairs.astype(np.int64).reshape(-1, 2)])
+    return np.concatenate(edges)
+
+def test_outlines_trace_roof_base_and_corners():
+    # L-shaped building: six roof edges, six base edges and six wall corners, no triangulation diagonals
+    ring = np.array([(0, 0), (0, 2), (1, 2), (1, 1), (2, 1), (2, 0), (0, 0)]) * 1e-4 + (116, 40)
+    footprints = make_footprints(ring, [0, 7], [0, 1], [0])
+    positions, faces, ranges = build_mesh(footprints, footprint_center(footprints), 3)
+    edges = read_outline_edges(*read_glb(glb_bytes(positions, faces, ranges, np.array([0]))))
+    heights = edges[:, :, 1]
+    horizontal = np.linalg.norm(edges[:, 0, [0, 2]] - edges[:, 1, [0, 2]], axis=1) > 1e-6
+    assert len(edges) == 18
+    assert ((heights == 0).all(axis=1) & horizontal).sum() == 6
+    assert ((heights == 3).all(axis=1) & horizontal).sum() == 6
+    assert (~horizontal).sum() == 6 and (heights[~horizontal].min(axis=1) == 0).all()
+
+    gltf, _ = read_glb(glb_bytes(positions, faces, ranges, np.array([0]), outline=False))
+    assert 'CESIUM_primitive_outline' not in gltf.get('extensionsUsed', [])
+
+def test_sample_outlines():
+    footprints, center, _ = load_footprints(SAMPLE_SHP, time_budget=None)
+    positions, faces, ranges = build_mesh(footprints, center)
+    gltf, binary = read_glb(glb_bytes(positions, faces, ranges, footprints['feature_ids'], max_vertices=200))
+    assert 'CESIUM_primitive_outline' in gltf['extensionsUsed']
+
+    # Every ring vertex adds a roof edge, a base edge and a wall corner, unless its walls continue in one plane
+    ring_vertices = int((np.diff(footprints['ring_offsets']) - 1).sum())
+    edges = read_outline_edges(gltf, binary)
+    assert 0.95 * 3 * ring_vertices <= len(edges) <= 3 * ring_vertices
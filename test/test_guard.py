@@ -0,0 +1,87 @@
+"""
+Test module for the tail-latency guard.
+This module makes the isolated triangulation stall or crash on chosen footprints and checks that the guard keeps to its time budget and falls back step by step.
+"""
+
+import os
+import time
+import numpy as np
+import guard
+from conftest import SAMPLE_SHP
+from guard import guard_footprints, triangulate_worker
+from ingest import make_footprints, footprint_center, read_footprints
+from shp2obj import build_mesh
+
+# Seconds allowed per attempt in the tests
+BUDGET = 0.5
+
+# Ring sizes on which the triangulation stalls or crashes
+STALLING = (160, 48)
+CRASHING = (36,)
+
+def faulty_worker(rings, connection):
+    """
+    Triangulate like ``guard.triangulate_worker``, but stall or crash on the chosen ring sizes.
+
+    Args:
+        rings (list): Ring coordinate arrays without the closing point
+        connection (multiprocessing.connection.Connection): Sending end of the pipe
+    """
+    if len(rings[0]) in STALLING:
+        time.sleep(60)
+    if len(rings[0]) in CRASHING:
+        os._exit(1)
+    triangulate_worker(rings, connection)
+
+def circle(count, east):
+    """
+    Build an open ring of points on a circle with a radius of 1e-4 degrees.
+
+    Args:
+        count (int): Number of points
+        east (float): Center offset to the east in radii
+
+    Returns:
+        numpy.ndarray: Ring with shape (count, 2) in degrees
+    """
+    angles = np.linspace(0, 2 * np.pi, count, endpoint=False)
+    return np.column_stack([east + np.cos(angles), np.sin(angles)]) * 1e-4
+
+def test_stalls_and_crashes_fall_back_within_the_budget(monkeypatch):
+    monkeypatch.setattr(guard, 'triangulate_worker', faulty_worker)
+
+    # A square with 40 slightly noisy points per side simplifies to its corners; circles do not simplify
+    side = np.linspace(0, 1, 40, endpoint=False)
+    noise = np.random.default_rng(0).normal(0, 1e-5, 160)
+    square = np.concatenate([np.column_stack([side, noise[:40]]), np.column_stack([1 + noise[40:80], side]),
+                             np.column_stack([1 - side, 1 + noise[80:120]]), np.column_stack([noise[120:], 1 - side])])
+    rings = [square * 1e-4 + (116, 40), circle(48, 5) + (116, 40), circle(36, 10) + (116, 40),
+             circle(30, 15) + (116, 40)]
+    closed = [np.vstack([ring, ring[:1]]) for ring in rings]
+    footprints = make_footprints(np.concatenate(closed), np.cumsum([0] + [len(ring) for ring in closed]),
+                                 np.arange(5), np.arange(4))
+
+    start = time.perf_counter()
+    guarded, report = guard_footprints(footprints, BUDGET, max_vertices=20)
+    seconds = time.perf_counter() - start
+
+    # Each stalled attempt is cut off at the budget instead of running for a minute
+    assert seconds < 6 * BUDGET + 5
+    assert report['pathological'] == 4
+    assert [(fallback['feature_id'], fallback['strategy']) for fallback in report['fallbacks']] == \
+        [(0, 'simplified'), (1, 'convex_hull'), (2, 'convex_hull')]
+    assert report['fallbacks'][0]['seconds'] >= BUDGET and report['fallbacks'][1]['seconds'] >= 2 * BUDGET
+
+    # Replaced rings get their fallback geometry; every footprint keeps its index and ID
+    ring_sizes = np.diff(guarded['ring_offsets']) - 1
+    assert ring_sizes[0] <= 8 and ring_sizes[1:].tolist() == [48, 36, 30]
+    assert guarded['feature_ids'].tolist() == [0, 1, 2, 3]
+    assert sorted(guarded['triangulations']) == [0, 1, 2, 3]
+
+    _, faces, ranges = build_mesh(guarded, footprint_center(guarded), 3)
+    assert len(ranges) == 4 and len(faces) > 0
+
+def test_sample_needs_no_guard():
+    footprints = read_footprints(SAMPLE_SHP)
+    guarded, report = guard_footprints(footprints, BUDGET)
+    assert guarded is footprints and report == {'pathological': 0, 'fallbacks': []}
@@ -0,0 +1,83 @@
+"""
+Test module for GPU instancing of congruent footprints.
+This module groups rotated and shifted copies of a footprint and checks that the placed instances land where the buildings themselves would be built.
+"""
+
+import numpy as np
+from conftest import SAMPLE_SHP
+from ingest import make_footprints, footprint_center
+from instance import find_instances, expand_instances, local_meters
+from shp2obj import build_instances, build_mesh, shp2obj
+from test_shard import mesh_area, read_triangles
+
+# L-shaped footprint in local meters [east, north]
+L_SHAPE = np.array([(0, 0), (0, 12), (5, 12), (5, 4), (9, 4), (9, 0)], dtype=np.float64)
+
+# Longitude/latitude origin of the test footprints
+ORIGIN = np.array([116.0, 40.0])
+
+def place(shape, east, north, angle, start):
+    """
+    Rotate and shift a footprint and convert it to a closed longitude/latitude ring.
+
+    Args:
+        shape (numpy.ndarray): Footprint in local meters [east, north]
+        east (float): Eastward shift in meters
+        north (float): Northward shift in meters
+        angle (float): Counter-clockwise rotation in radians
+        start (int): Vertex the ring starts at
+
+    Returns:
+        numpy.ndarray: Closed ring (longitude, latitude)
+    """
+    cos, sin = np.cos(angle), np.sin(angle)
+    rotated = np.roll(shape @ np.array([[cos, sin], [-sin, cos]]), -start, axis=0) + (east, north)
+
+    # Use the meters per degree of the instancing module so that copies are congruent there
+    east_scale, north_scale = np.diag(local_meters(ORIGIN + np.eye(2), ORIGIN)[:, ::-1])
+    ring = ORIGIN + rotated / (east_scale, north_scale)
+    return np.vstack([ring, ring[:1]])
+
+def nearest_distance(points, others):
+    """
+    Calculate the distance from every point to the nearest of other points.
+
+    Args:
+        points (numpy.ndarray): Points with shape (N, 3)
+        others (numpy.ndarray): Points with shape (K, 3)
+
+    Returns:
+        numpy.ndarray: Distances with shape (N,)
+    """
+    return np.linalg.norm(points[:, None] - others[None], axis=2).min(axis=1)
+
+def test_copies_land_on_the_buildings():
+    # Four rotated copies of the L shape, one mirrored L and one narrower L
+    rings = [place(L_SHAPE, 0, 0, 0, 0), place(L_SHAPE, 40, 10, 0.7, 2), place(L_SHAPE, -30, 25, 2.5, 5),
+             place(L_SHAPE, 15, -35, -1.2, 3), place(L_SHAPE * (-1, 1), 60, -20, 0, 0),
+             place(L_SHAPE * (0.9, 1), -50, -40, 0, 0)]
+    footprints = make_footprints(np.vstack(rings), np.arange(len(rings) + 1) * 7, np.arange(len(rings) + 1),
+                                 np.arange(len(rings)))
+
+    instancing = find_instances(footprints)
+    assert len(instancing['groups']) == 1
+    assert sorted(instancing['groups'][0]['members'].tolist()) == [0, 1, 2, 3]
+    assert instancing['singles'].tolist() == [4, 5]
+
+    # Every placed copy matches the mesh built directly from its footprint to within a centimeter
+    center = footprint_center(footprints)
+    group, = build_instances(footprints, center, 3, instancing)
+    copies = expand_instances(group['positions'], group['translations'], group['angles'])
+    for copy, member in zip(np.split(copies, len(group['translations'])), instancing['groups'][0]['members']):
+        positions, _, _ = build_mesh(footprints, center, 3, [member])
+        direct = np.asarray(positions, dtype=np.float64)
+        assert nearest_distance(copy, direct).max() < 0.01
+        assert nearest_distance(direct, copy).max() < 0.01
+
+def test_sample_instancing_keeps_the_surface(tmp_path):
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'plain.obj'))
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'instanced.obj'), instance=True)
+    plain = read_triangles(tmp_path / 'plain.obj')
+    instanced = read_triangles(tmp_path / 'instanced.obj')
+    assert len(instanced) == len(plain)
+    assert np.isclose(mesh_area(instanced), mesh_area(plain), rtol=1e-4)
@@ -0,0 +1,31 @@
+"""
+Test module for the LiDAR height cache.
+This module saves heights from many concurrent writers into one cache directory and checks that none of them is lost.
+"""
+
+import threading
+import lidar
+from lidar import load_cache, save_cache
+
+def test_concurrent_saves_keep_every_height(tmp_path, monkeypatch):
+    monkeypatch.setattr(lidar, 'MAX_CACHE_PARTS', 3)
+    path = str(tmp_path / 'cache')
+
+    # Every writer saves its own keys several times while the others merge parts
+    def writer(shard):
+        for batch in range(10):
+            save_cache(path, {f'{shard}-{batch}': float(shard * 100 + batch)})
+
+    threads = [threading.Thread(target=writer, args=(shard,)) for shard in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    cache = load_cache(path)
+    assert cache == {f'{shard}-{batch}': float(shard * 100 + batch) for shard in range(8) for batch in range(10)}
+
+    # The next save merges the parts left by the writers
+    save_cache(path, {})
+    assert len(list((tmp_path / 'cache').glob('*.json'))) <= 3
+    assert load_cache(path) == cache
@@ -0,0 +1,47 @@
+"""
+Test module for the in-memory mesh API.
+This module checks that a mesh built from the sample input exports the same bytes as the file-based converter, straight into caller buffers as well.
+"""
+
+import mmap
+import numpy as np
+import pytest
+from conftest import SAMPLE_SHP
+from mesh import Mesh
+from shp2obj import shp2obj
+
+@pytest.mark.parametrize('normals', [False, True])
+def test_exports_match_the_converter(tmp_path, normals):
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'building.obj'), is_normal=normals)
+    mesh = Mesh.build(SAMPLE_SHP)
+
+    assert mesh.to_obj(normals=normals) == (tmp_path / 'building.obj').read_bytes()
+    assert mesh.to_glb() == (tmp_path / 'building.glb').read_bytes()
+    assert mesh.center_text() == (tmp_path / 'building.txt').read_bytes()
+
+def test_exports_into_buffers():
+    mesh = Mesh.build(SAMPLE_SHP)
+    for export in (mesh.to_obj, mesh.to_glb, mesh.to_ply):
+        data = export()
+
+        # Writes fill the front of larger buffers of any writable kind
+        for out in (bytearray(len(data) + 5), mmap.mmap(-1, len(data)), np.zeros(len(data) // 8 + 1, dtype=np.float64)):
+            assert export(out=out) == len(data)
+            assert bytes(memoryview(out).cast('B')[:len(data)]) == data
+
+        with pytest.raises(ValueError, match='Output buffer holds'):
+            export(out=bytearray(len(data) - 1))
+        with pytest.raises(ValueError, match='read-only'):
+            export(out=bytes(len(data)))
+
+def test_select_keeps_whole_features():
+    mesh = Mesh.build(SAMPLE_SHP)
+    rows = np.array([3, 0, 7])
+    part = mesh.select(rows)
+    assert part.feature_ids.tolist() == mesh.feature_ids[rows].tolist()
+
+    # Every selected feature keeps its triangles, with indices into the compact vertex array
+    for row, (v0, _, f0, f1) in zip(rows, part.ranges):
+        _, _, face_start, face_end = mesh.ranges[row]
+        assert np.array_equal(part.positions[part.indices[f0:f1]], mesh.positions[mesh.indices[face_start:face_end]])
+        assert part.indices[f0:f1].min() >= v0
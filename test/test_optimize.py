@@ -0,0 +1,65 @@
+"""
+Test module for the vertex cache optimization.
+This module checks that reordering a shuffled grid and the sample mesh lowers the average cache miss ratio without changing any triangle.
+"""
+
+import numpy as np
+from conftest import SAMPLE_SHP
+from optimize import acmr, optimize_mesh
+from shp2obj import shp2obj
+from test_shard import read_triangles
+
+def shuffled_grid(size, seed=0):
+    """
+    Triangulate a square grid of vertices and shuffle its triangles.
+
+    Args:
+        size (int): Number of vertices along a side
+        seed (int): Seed of the shuffle (default: 0)
+
+    Returns:
+        tuple: (positions with shape (size * size, 3), 0-based indices with shape (M, 3))
+    """
+    rows, cols = np.indices((size - 1, size - 1)).reshape(2, -1)
+    corner = rows * size + cols
+    indices = np.concatenate([np.column_stack([corner, corner + size, corner + 1]),
+                              np.column_stack([corner + 1, corner + size, corner + size + 1])])
+    positions = np.column_stack([np.arange(size * size) // size, np.zeros(size * size), np.arange(size * size) % size])
+    return positions.astype(np.float64), np.random.default_rng(seed).permutation(indices)
+
+def test_acmr_counts_cache_misses():
+    assert acmr([[0, 1, 2]]) == 3.0
+    assert acmr([[0, 1, 2], [2, 1, 3]]) == 2.0
+
+    # A FIFO of three vertices misses every time on four vertices used in turn; a fourth slot keeps them all
+    cycle = [[0, 1, 2], [3, 0, 1], [2, 3, 0]]
+    assert acmr(cycle, cache_size=3) == 3.0
+    assert acmr(cycle, cache_size=4) == 4 / 3
+
+def test_shuffled_grid_gets_close_to_optimal():
+    positions, indices = shuffled_grid(40)
+    new_positions, faces, _, stats = optimize_mesh(positions, indices + 1, [[0, len(positions), 0, len(indices)]])
+    assert stats['acmr_before'] > 2 and stats['acmr_after'] < 0.8
+    assert np.isclose(stats['acmr_after'], acmr(faces - 1))
+
+    # The same triangles with the same winding, stored with vertices in order of first use
+    def triangles(points, faces):
+        corners = points[faces]
+        start = np.argmin(corners @ [1e6, 0, 1], axis=1)
+        rolled = np.stack([np.roll(corner, -s, axis=0) for corner, s in zip(corners, start)]).reshape(-1, 9)
+        return rolled[np.lexsort(rolled.T[::-1])]
+
+    assert np.array_equal(triangles(new_positions, faces - 1), triangles(positions, indices))
+    first_use = np.unique((faces - 1).ravel(), return_index=True)[1]
+    assert (np.diff(first_use) > 0).all()
+
+def test_sample_keeps_triangles_and_does_not_regress(tmp_path):
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'plain.obj'))
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'optimized.obj'), optimize=True)
+    assert np.array_equal(read_triangles(tmp_path / 'optimized.obj'), read_triangles(tmp_path / 'plain.obj'))
+
+    plain = np.array([line.split()[1:] for line in (tmp_path / 'plain.obj').read_text().splitlines()
+                      if line.startswith('f ')], dtype=np.int64)
+    optimized = np.array([line.split()[1:] for line in (tmp_path / 'optimized.obj').read_text().splitlines()
+                          if line.startswith('f ')], dtype=np.int64)
+    assert acmr(optimized) <= acmr(plain)
@@ -0,0 +1,45 @@
+"""
+Test module for the pipelined conversion.
+This module checks that streaming small batches through worker processes gives the same OBJ and GLB meshes as a single-process run.
+"""
+
+import numpy as np
+from conftest import SAMPLE_SHP
+from pipeline import run_pipeline
+from shp2obj import shp2obj
+from test_glb import read_glb, read_accessor, read_source_ids
+from test_shard import read_triangles
+
+def read_feature_triangles(glb_path):
+    """
+    Read the triangles of every source feature of a GLB file.
+
+    Args:
+        glb_path (str): Path to the GLB file
+
+    Returns:
+        dict: Sorted triangles with shape (M, 9) per source feature ID, independent of chunking
+    """
+    with open(glb_path, 'rb') as f:
+        gltf, binary = read_glb(f.read())
+    triangles = {}
+    for primitive in gltf['meshes'][0]['primitives']:
+        positions = read_accessor(gltf, binary, primitive['attributes']['POSITION'])
+        indices = read_accessor(gltf, binary, primitive['indices']).reshape(-1, 3)
+        feature_index = read_accessor(gltf, binary, primitive['attributes']['_FEATURE_ID_0'])
+        source_ids = read_source_ids(gltf, binary, primitive['extensions']['EXT_mesh_features']['featureIds'][0])
+        for source_id, triangle in zip(source_ids[feature_index[indices[:, 0]].astype(np.int64)], indices):
+            triangles.setdefault(int(source_id), []).append(positions[triangle].reshape(-1))
+    return {key: np.array(sorted(map(tuple, value))) for key, value in triangles.items()}
+
+def test_pipeline_matches_single_process(tmp_path):
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'single.obj'))
+    report = run_pipeline(SAMPLE_SHP, str(tmp_path / 'pipelined.obj'), batch_size=16, workers=2)
+    assert report['batches'] > 1
+
+    assert np.array_equal(read_triangles(tmp_path / 'pipelined.obj'), read_triangles(tmp_path / 'single.obj'))
+    pipelined = read_feature_triangles(tmp_path / 'pipelined.glb')
+    single = read_feature_triangles(tmp_path / 'single.glb')
+    assert pipelined.keys() == single.keys()
+    for source_id, triangles in single.items():
+        assert np.array_equal(pipelined[source_id], triangles)
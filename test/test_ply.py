@@ -0,0 +1,97 @@
+"""
+Test module for the binary PLY export.
+This module parses the PLY written for the sample input from its own header and checks it against the OBJ of the same run.
+"""
+
+import numpy as np
+import trimesh
+from conftest import SAMPLE_SHP
+from mesh import Mesh
+from ply import ply_chunks
+from shp2obj import shp2obj
+
+# PLY scalar types as NumPy dtype codes
+PLY_TYPES = {'uchar': 'u1', 'int': '<i4', 'float': '<f4'}
+
+def read_ply(data):
+    """
+    Decode a binary little-endian PLY with triangle faces, driven only by its header.
+
+    Args:
+        data (bytes): PLY content
+
+    Returns:
+        dict: Record array of every element, by element name
+    """
+    header, body = data.split(b'end_header\n', 1)
+    lines = header.decode('ascii').splitlines()
+    assert lines[:2] == ['ply', 'format binary_little_endian 1.0']
+
+    elements = []
+    for line in lines[2:]:
+        words = line.split()
+        if words[0] == 'element':
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == 'property' and words[1] == 'list':
+            # Every face lists three vertices, so the list is a count and a fixed-size array
+            elements[-1][2].extend([('count', PLY_TYPES[words[2]]), (words[4], PLY_TYPES[words[3]], (3,))])
+        elif words[0] == 'property':
+            elements[-1][2].append((words[2], PLY_TYPES[words[1]]))
+
+    records, offset = {}, 0
+    for name, count, fields in elements:
+        records[name] = np.frombuffer(body, dtype=np.dtype(fields), count=count, offset=offset)
+        offset += records[name].nbytes
+    assert offset == len(body)
+    return records
+
+def read_obj(obj_path):
+    """
+    Read the positions, normals and faces of an OBJ file in file order.
+
+    Args:
+        obj_path (str): Path to the OBJ file
+
+    Returns:
+        tuple: (positions with shape (N, 3), normals with shape (M, 3), 1-based faces with shape (M, 3))
+    """
+    positions, normals, faces = [], [], []
+    with open(obj_path) as f:
+        for line in f:
+            words = line.split()
+            if words and words[0] in ('v', 'vn'):
+                (positions if words[0] == 'v' else normals).append([float(v) for v in words[1:4]])
+            elif words and words[0] == 'f':
+                faces.append([int(v.split('/')[0]) for v in words[1:4]])
+    return np.array(positions), np.array(normals), np.array(faces)
+
+def test_ply_matches_obj(tmp_path):
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'building.obj'), is_normal=True, ply=True)
+    records = read_ply((tmp_path / 'building.ply').read_bytes())
+    positions, normals, faces = read_obj(tmp_path / 'building.obj')
+    vertex, face = records['vertex'], records['face']
+
+    assert np.array_equal(np.column_stack([vertex['x'], vertex['y'], vertex['z']]), positions.astype(np.float32))
+    assert (face['count'] == 3).all()
+    assert np.array_equal(face['vertex_indices'], faces - 1)
+    assert np.array_equal(np.column_stack([face['nx'], face['ny'], face['nz']]), normals.astype(np.float32))
+
+    # Every face belongs to the same feature as its vertices
+    assert (vertex['feature_id'][face['vertex_indices']] == face['feature_id'][:, None]).all()
+
+    # Another reader agrees on the layout
+    loaded = trimesh.load(str(tmp_path / 'building.ply'), process=False)
+    assert np.array_equal(loaded.faces, faces - 1)
+    assert np.allclose(loaded.vertices, positions, atol=1e-3)
+
+def test_chunks_concatenate_to_one_file():
+    mesh = Mesh.build(SAMPLE_SHP)
+    args = (mesh.positions, mesh.indices, mesh.normals, mesh.ranges, mesh.feature_ids)
+    whole = b''.join(ply_chunks(*args))
+    chunks = list(ply_chunks(*args, chunk_rows=7))
+    assert len(chunks) > 3 and b''.join(chunks) == whole
+
+    # Without normals and IDs only the positions and indices remain
+    records = read_ply(b''.join(ply_chunks(mesh.positions, mesh.indices)))
+    assert records['vertex'].dtype.names == ('x', 'y', 'z')
+    assert records['face'].dtype.names == ('count', 'vertex_indices')
@@ -0,0 +1,89 @@
+"""
+Test module for the transform API.
+This module checks the 4x4 matrices against the point rotation functions, the in-place application to positions and normals, and Z-up output of the sample input.
+"""
+
+import numpy as np
+import pytest
+import rotation
+from conftest import SAMPLE_SHP
+from mesh import Mesh
+from rotation import (apply_transform, axis_swap_matrix, compose, rotate_x, rotate_y, rotate_z, rotation_matrix,
+                      scale_matrix, translation_matrix)
+from shp2obj import shp2obj
+from test_shard import read_triangles
+from winding import check_winding
+
+def transform_points(matrix, points):
+    """
+    Apply a 4x4 transform to points without touching them.
+
+    Args:
+        matrix (numpy.ndarray): Homogeneous matrix with shape (4, 4)
+        points (numpy.ndarray): Points with shape (N, 3)
+
+    Returns:
+        numpy.ndarray: Transformed points
+    """
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+def test_matrices_match_point_rotations():
+    points = np.random.default_rng(0).normal(size=(20, 3))
+    for axis, rotate in (('x', rotate_x), ('y', rotate_y), ('z', rotate_z)):
+        expected = np.column_stack(rotate(*points.T, 37.0))
+        assert np.allclose(transform_points(rotation_matrix(axis, 37.0), points), expected)
+
+    # Transforms are applied in argument order
+    matrix = compose(translation_matrix(1, 2, 3), rotation_matrix('z', 90), scale_matrix(2))
+    assert np.allclose(transform_points(matrix, np.array([[1.0, 0, 0]])), [[-4, 4, 6]])
+
+def test_apply_transform_in_place_and_normals(monkeypatch):
+    monkeypatch.setattr(rotation, 'TRANSFORM_BLOCK_ROWS', 7)
+    rng = np.random.default_rng(1)
+    triangles = rng.normal(size=(30, 3, 3))
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    normals /= np.linalg.norm(normals, axis=1)[:, None]
+    positions = triangles.reshape(-1, 3).copy()
+    original = positions.copy()
+
+    # Float64 arrays are updated in place, block by block
+    matrix = compose(scale_matrix(1, 3, 0.5), rotation_matrix('x', 30), translation_matrix(5, 0, -2))
+    moved, turned = apply_transform(matrix, positions, normals.copy())
+    assert np.shares_memory(moved, positions)
+    assert np.allclose(moved, transform_points(matrix, original))
+
+    # Under a non-uniform scale the normals stay unit length and perpendicular to the faces
+    moved = moved.reshape(-1, 3, 3)
+    assert np.allclose(np.linalg.norm(turned, axis=1), 1)
+    assert np.allclose(np.einsum('ij,ij->i', turned, moved[:, 1] - moved[:, 0]), 0)
+    assert np.allclose(np.einsum('ij,ij->i', turned, moved[:, 2] - moved[:, 0]), 0)
+
+    # Lists are converted to new arrays
+    listed = original.tolist()
+    assert np.allclose(apply_transform(matrix, listed)[0], transform_points(matrix, original))
+    assert listed == original.tolist()
+
+def test_axis_swap():
+    swap = axis_swap_matrix('y-up', 'z-up')
+    assert np.allclose(transform_points(swap, np.array([[1.0, 2, 3]])), [[3, 1, 2]])
+    assert np.isclose(np.linalg.det(swap[:3, :3]), 1)
+    assert np.allclose(compose(swap, axis_swap_matrix('z-up', 'y-up')), np.eye(4))
+    with pytest.raises(ValueError, match='Unknown axis convention'):
+        axis_swap_matrix('y-up', 'x-up')
+
+def test_sample_z_up_and_mirroring(tmp_path):
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'y.obj'))
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'z.obj'), up='z-up')
+
+    # [north, up, east] becomes [east, north, up] with the same triangles in the same winding
+    y_up = read_triangles(tmp_path / 'y.obj').reshape(-1, 3, 3)[:, :, [2, 0, 1]].reshape(-1, 9)
+    assert np.allclose(y_up[np.lexsort(y_up.T[::-1])], read_triangles(tmp_path / 'z.obj'), atol=1e-6)
+
+    # A mirrored mesh reverses its triangles so that they still face outwards; the cached normals follow
+    mesh = Mesh.build(SAMPLE_SHP)
+    assert mesh.normals is not None
+    mesh.transform(scale_matrix(-1, 1, 1))
+    winding = check_winding(mesh.positions, mesh.indices + 1, mesh.ranges)
+    assert len(winding['inconsistent_faces']) == 0 and len(winding['inward_features']) == 0
+    p1, p2, p3 = (mesh.positions[mesh.indices[:, k]] for k in range(3))
+    assert (np.einsum('ij,ij->i', np.cross(p2 - p1, p3 - p1), mesh.normals) > 0).all()
@@ -0,0 +1,89 @@
+"""
+Test module for the local tile server.
+This module checks that tiles partition the sample buildings, that repeated requests are answered from the LRU cache and that the cache stays within its size.
+"""
+
+import json
+import math
+import threading
+import urllib.error
+import urllib.request
+import numpy as np
+import pytest
+from conftest import SAMPLE_SHP
+from serve import TileCache, TileServer, load_index, query_features, tile_bounds
+from test_glb import read_glb, read_source_ids
+
+# Zoom level at which the sample buildings spread over several tiles
+ZOOM = 17
+
+def covering_tiles(bounds, z):
+    """
+    List the XYZ tiles covering a bounding box.
+
+    Args:
+        bounds (tuple): (min_lon, min_lat, max_lon, max_lat)
+        z (int): Zoom level
+
+    Returns:
+        list: (x, y) of every tile
+    """
+    n = 2 ** z
+
+    def row(latitude):
+        return int((1 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2 * n)
+
+    columns = range(int((bounds[0] + 180) / 360 * n), int((bounds[2] + 180) / 360 * n) + 1)
+    return [(x, y) for x in columns for y in range(row(bounds[3]), row(bounds[1]) + 1)]
+
+def test_tiles_own_every_building_once():
+    index = load_index(SAMPLE_SHP)
+    tiles = covering_tiles(index['footprints']['bounds'], ZOOM)
+    owned = [query_features(index, tile_bounds(ZOOM, x, y), owned_only=True) for x, y in tiles]
+    assert sum(len(indices) > 0 for indices in owned) > 1
+    assert sorted(np.concatenate(owned).tolist()) == list(range(len(index['footprints']['feature_ids'])))
+
+def test_repeated_tile_requests_hit_the_cache():
+    index = load_index(SAMPLE_SHP)
+    server = TileServer(('127.0.0.1', 0), index)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        x, y = next((x, y) for x, y in covering_tiles(index['footprints']['bounds'], ZOOM)
+                    if len(query_features(index, tile_bounds(ZOOM, x, y), owned_only=True)))
+        url = f'http://127.0.0.1:{server.server_port}'
+        responses = [urllib.request.urlopen(f'{url}/tiles/{ZOOM}/{x}/{y}.glb') for _ in range(2)]
+        bodies = [response.read() for response in responses]
+        assert [response.headers['X-Cache'] for response in responses] == ['MISS', 'HIT']
+        assert bodies[0] == bodies[1]
+
+        # The tile holds exactly the buildings it owns
+        gltf, binary = read_glb(bodies[0])
+        source_ids = np.concatenate([
+            read_source_ids(gltf, binary, primitive['extensions']['EXT_mesh_features']['featureIds'][0])
+            for primitive in gltf['meshes'][0]['primitives']
+        ])
+        expected = index['footprints']['feature_ids'][query_features(index, tile_bounds(ZOOM, x, y), owned_only=True)]
+        assert sorted(source_ids.tolist()) == sorted(expected.tolist())
+
+        metrics = json.loads(urllib.request.urlopen(f'{url}/metrics').read())
+        assert metrics['requests'] == 2 and metrics['cache']['hits'] == 1 and metrics['cache']['misses'] == 1
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f'{url}/bbox?bbox=1,2,3')
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_cache_evicts_least_recently_used_tiles():
+    cache = TileCache(max_bytes=10)
+    cache.put('a', b'aaaa')
+    cache.put('b', b'bbbb')
+    assert cache.get_or_create('a', lambda: b'') == (b'aaaa', True)
+
+    # 'b' is now the least recently used tile and makes room for 'c'
+    cache.put('c', b'cccc')
+    assert cache.get_or_create('b', lambda: b'BBBB') == (b'BBBB', False)
+    assert 'a' not in cache.entries and cache.size <= 10
+    assert cache.stats()['evictions'] == 2
@@ -0,0 +1,82 @@
+"""
+Test module for the shard-and-merge mode.
+This module checks that building a sample input in concurrent shards and merging them gives the same mesh as a single-process run.
+"""
+
+import subprocess
+import sys
+import numpy as np
+from conftest import ROOT, SAMPLE_SHP
+from shard import merge_shards
+
+# Number of concurrent shard processes
+NUM_SHARDS = 3
+
+def read_triangles(obj_path):
+    """
+    Read an OBJ file as a sorted array of triangles given by their vertex positions.
+
+    Args:
+        obj_path (str): Path to the OBJ file
+
+    Returns:
+        numpy.ndarray: Triangles with shape (M, 9), independent of vertex and face order
+    """
+    positions, faces = [], []
+    with open(obj_path) as f:
+        for line in f:
+            if line.startswith('v '):
+                positions.append([float(v) for v in line.split()[1:4]])
+            elif line.startswith('f '):
+                faces.append([int(v.split('/')[0]) for v in line.split()[1:4]])
+    triangles = np.array(positions)[np.array(faces) - 1].reshape(-1, 9).round(6)
+    return triangles[np.lexsort(triangles.T[::-1])]
+
+def mesh_area(triangles):
+    """
+    Calculate the total surface area of triangles from ``read_triangles``.
+
+    Args:
+        triangles (numpy.ndarray): Triangles with shape (M, 9)
+
+    Returns:
+        float: Surface area in square meters
+    """
+    p1, p2, p3 = triangles[:, 0:3], triangles[:, 3:6], triangles[:, 6:9]
+    return float(np.linalg.norm(np.cross(p2 - p1, p3 - p1), axis=1).sum() / 2)
+
+def run_shp2obj(*args):
+    """
+    Start the command-line converter in a separate process.
+
+    Args:
+        *args (str): Command-line arguments after the script name
+
+    Returns:
+        subprocess.Popen: The running process
+    """
+    return subprocess.Popen([sys.executable, 'shp2obj.py', *args], cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+def test_merged_shards_match_single_process(tmp_path):
+    full_path = str(tmp_path / 'full' / 'building.obj')
+    shard_path = str(tmp_path / 'shards' / 'building.obj')
+    (tmp_path / 'full').mkdir()
+    (tmp_path / 'shards').mkdir()
+
+    processes = [run_shp2obj(SAMPLE_SHP, full_path)]
+    processes += [run_shp2obj(SAMPLE_SHP, shard_path, '--shard', f'{shard}/{NUM_SHARDS}')
+                  for shard in range(NUM_SHARDS)]
+    for process in processes:
+        output, _ = process.communicate()
+        assert process.returncode == 0, output.decode()
+
+    stats = merge_shards(shard_path)
+    assert stats['shards'] == NUM_SHARDS
+
+    full = read_triangles(full_path)
+    merged = read_triangles(shard_path)
+    assert len(merged) == len(full)
+    assert np.array_equal(merged, full)
+    assert np.isclose(mesh_area(merged), mesh_area(full))
+    assert (tmp_path / 'shards' / 'building.glb').exists()
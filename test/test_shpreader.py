@@ -0,0 +1,51 @@
+"""
+Test module for the memory-mapped Shapefile reader.
+This module checks that the fast path decodes the same footprint buffers as GDAL through pyogrio.
+"""
+
+import geopandas as gpd
+import numpy as np
+import pyogrio
+from shapely.geometry import MultiPolygon, Polygon, box
+from conftest import SAMPLE_SHP
+from ingest import arrow_geometry_name, column_heights, geometry_to_footprints
+from shpreader import read_shapefile
+
+def read_with_pyogrio(shp_path, field):
+    """
+    Read footprints the way ``ingest.read_footprints`` does for inputs without a fast path.
+
+    Args:
+        shp_path (str): Path to the .shp file
+        field (str): Field name containing building height data
+
+    Returns:
+        dict: Footprint buffers (see ``ingest.make_footprints``)
+    """
+    meta, table = pyogrio.read_arrow(shp_path, columns=[field])
+    geometry = table.column(arrow_geometry_name(table, meta.get('geometry_name'))).combine_chunks()
+    return geometry_to_footprints(geometry, 'WKB', column_heights(table, field))
+
+def assert_same_footprints(fast, reference):
+    for key in ('ring_offsets', 'polygon_offsets', 'feature_ids'):
+        assert np.array_equal(fast[key], reference[key]), key
+    assert np.array_equal(fast['coords'], reference['coords'])
+    assert np.array_equal(fast['heights'], reference['heights'])
+
+def test_sample_matches_pyogrio():
+    assert_same_footprints(read_shapefile(SAMPLE_SHP, 'MEAN'), read_with_pyogrio(SAMPLE_SHP, 'MEAN'))
+
+def test_holes_multipolygons_and_null_shapes(tmp_path):
+    shp_path = str(tmp_path / 'buildings.shp')
+    courtyard = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)], [[(2, 2), (2, 4), (4, 4), (4, 2)]])
+    gpd.GeoDataFrame({'height': [12.5, 7.0, 3.0, 4.0]},
+                     geometry=[courtyard, None, MultiPolygon([box(20, 0, 25, 5), box(30, 0, 35, 5)]), box(40, 0, 41, 1)],
+                     crs='EPSG:4326').to_file(shp_path)
+
+    footprints = read_shapefile(shp_path, 'height')
+    assert_same_footprints(footprints, read_with_pyogrio(shp_path, 'height'))
+
+    # The null shape is skipped, the courtyard keeps its hole and both parts keep their source row
+    assert footprints['feature_ids'].tolist() == [0, 2, 2, 3]
+    assert np.diff(footprints['polygon_offsets']).tolist() == [2, 1, 1, 1]
+    assert footprints['heights'].tolist() == [12.5, 3.0, 3.0, 4.0]
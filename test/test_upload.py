@@ -0,0 +1,86 @@
+"""
+Test module for uploading outputs to S3-compatible object storage.
+This module runs the uploader and the converter against the local stand-in in ``s3_stub``.
+"""
+
+import json
+import os
+import numpy as np
+import pytest
+from conftest import SAMPLE_SHP
+from s3_stub import S3Stub
+from outputs import OutputWriter
+from upload import Uploader
+from shp2obj import shp2obj
+
+def test_single_put():
+    with S3Stub() as s3:
+        with Uploader(s3.url(prefix='run')) as uploader:
+            uploader.upload('building.txt', b'[116.3 39.9]')
+        assert s3.objects == {'/bucket/run/building.txt': b'[116.3 39.9]'}
+        assert s3.requests['put'] == 1
+        assert uploader.stats()['objects'] == 1
+
+def test_multipart_with_retries():
+    blocks = [np.full(700, i, dtype=np.uint8).tobytes() for i in range(10)]
+    with S3Stub(failures=2) as s3:
+        with Uploader(s3.url(), part_size=1024, backoff=0.01) as uploader:
+            uploader.upload('building.ply', iter(blocks))
+        assert s3.objects['/bucket/building.ply'] == b''.join(blocks)
+        assert s3.requests['create'] == 1 and s3.requests['complete'] == 1
+        assert s3.requests['part'] == 7
+        stats = uploader.stats()
+        assert stats['multipart'] == 1 and stats['retries'] == 2
+
+def test_declined_stream_keeps_stored_object():
+    blocks = [np.full(700, i, dtype=np.uint8).tobytes() for i in range(10)]
+    with S3Stub() as s3:
+        s3.objects['/bucket/building.ply'] = b'previous'
+        with Uploader(s3.url(), part_size=1024) as uploader:
+            assert uploader.upload('building.ply', iter(blocks), commit=lambda: False).result() is None
+        assert s3.objects['/bucket/building.ply'] == b'previous'
+        assert s3.requests['abort'] == 1 and s3.requests['complete'] == 0
+
+def test_rerun_skips_unchanged_outputs(tmp_path):
+    local_path = tmp_path / 'building.obj'
+    shp2obj(SAMPLE_SHP, str(local_path), ply=True)
+
+    with S3Stub() as s3:
+        url = s3.url(prefix='city')
+        shp2obj(SAMPLE_SHP, str(tmp_path / 'remote' / 'building.obj'), ply=True, upload=url)
+        uploaded = dict(s3.objects)
+        for name in ('building.glb', 'building.obj', 'building.txt', 'building.ply'):
+            assert uploaded[f'/bucket/city/{name}'] == (tmp_path / name).read_bytes()
+        assert '/bucket/city/building.manifest.json' in uploaded
+        assert not (tmp_path / 'remote').exists()
+
+        # Nothing changed, so the rerun only reads the manifest
+        puts = s3.requests['put']
+        shp2obj(SAMPLE_SHP, str(tmp_path / 'remote' / 'building.obj'), ply=True, upload=url)
+        assert s3.requests['put'] == puts
+        assert s3.objects == uploaded
+
+        # A changed setting uploads only the outputs it changes, plus the manifest
+        shp2obj(SAMPLE_SHP, str(tmp_path / 'remote' / 'building.obj'), building_height=6, ply=True, upload=url)
+        assert s3.requests['put'] - puts == 4
+        assert s3.objects['/bucket/city/building.txt'] == uploaded['/bucket/city/building.txt']
+
+def test_failed_manifest_write_keeps_previous_manifest(tmp_path, monkeypatch):
+    with OutputWriter(str(tmp_path), 'building.manifest.json') as outputs:
+        outputs.put('building.txt', b'[116.3 39.9]')
+    previous = (tmp_path / 'building.manifest.json').read_bytes()
+
+    # The disk fills up before the new manifest replaces the old one
+    def full(source, destination):
+        raise OSError('No space left on device')
+
+    outputs = OutputWriter(str(tmp_path), 'building.manifest.json')
+    outputs.put('building.glb', b'glTF')
+    monkeypatch.setattr(os, 'replace', full)
+    with pytest.raises(OSError):
+        outputs.close()
+    monkeypatch.undo()
+
+    assert (tmp_path / 'building.manifest.json').read_bytes() == previous
+    assert set(json.loads(previous)['outputs']) == {'building.txt'}
+    assert sorted(os.listdir(tmp_path)) == ['building.glb', 'building.manifest.json', 'building.txt']
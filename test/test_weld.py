@@ -0,0 +1,74 @@
+"""
+Test module for vertex welding.
+This module compares the hashed-grid weld with a brute-force search and checks that welding the sample mesh keeps its surface and its features.
+"""
+
+import numpy as np
+from conftest import SAMPLE_SHP
+from mesh import Mesh
+from shp2obj import shp2obj
+from test_shard import mesh_area, read_triangles
+from weld import weld_mesh, weld_vertices
+
+def brute_force_components(positions, tolerance, groups):
+    """
+    Label the clusters of vertices chained by distances within a tolerance, by testing every pair.
+
+    Args:
+        positions (numpy.ndarray): Vertex positions with shape (N, 3)
+        tolerance (float): Merge distance
+        groups (numpy.ndarray): Group of every vertex; only vertices of one group are chained
+
+    Returns:
+        numpy.ndarray: Smallest vertex index of the cluster of every vertex
+    """
+    distances = np.linalg.norm(positions[:, None] - positions[None], axis=2)
+    linked = (distances <= tolerance) & (groups[:, None] == groups[None])
+    labels = np.arange(len(positions))
+    while True:
+        lowest = np.where(linked, labels[None], len(positions)).min(axis=1)
+        if np.array_equal(lowest, labels):
+            return labels
+        labels = lowest
+
+def test_weld_matches_brute_force():
+    # Clusters of nearly coincident points around cell corners, plus chains a bit longer than the tolerance
+    rng = np.random.default_rng(0)
+    tolerance = 0.01
+    centers = rng.integers(-20, 20, (60, 3)) * tolerance
+    positions = np.repeat(centers, 5, axis=0) + rng.normal(0, tolerance / 3, (300, 3))
+    positions = np.vstack([positions, np.arange(20)[:, None] * [tolerance * 0.9, 0, 0] + 5])
+    groups = rng.integers(0, 2, len(positions))
+
+    for group_keys in (None, groups):
+        welded, _, remap, _ = weld_vertices(positions, np.zeros((0, 3), dtype=np.int64), tolerance, group_keys)
+        labels = brute_force_components(positions, tolerance, np.zeros(len(positions)) if group_keys is None else groups)
+
+        # Same partition of the vertices, with the first vertex of every cluster kept
+        assert np.array_equal(np.unique(labels, return_inverse=True)[1].ravel(), remap)
+        assert np.array_equal(welded, positions[np.unique(labels)])
+
+def test_collapsed_faces_are_dropped():
+    positions = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1e-4, 0, 0]], dtype=np.float64)
+    welded, indices, remap, kept = weld_vertices(positions, np.array([[0, 1, 2], [0, 3, 2]]), 1e-3)
+    assert len(welded) == 3 and remap.tolist() == [0, 1, 2, 0]
+    assert kept.tolist() == [True, False] and indices.tolist() == [[0, 1, 2]]
+
+def test_sample_weld_keeps_surface_and_features(tmp_path):
+    # Give every triangle its own three vertices, as a flat-shaded export would
+    mesh = Mesh.build(SAMPLE_SHP)
+    split_ranges = np.column_stack([mesh.ranges[:, 2:] * 3, mesh.ranges[:, 2:]])
+    positions, faces, ranges = weld_mesh(mesh.positions[mesh.indices].reshape(-1, 3),
+                                         np.arange(3 * len(mesh.indices)).reshape(-1, 3) + 1, split_ranges)
+    assert len(positions) == len(mesh.positions)
+    assert np.array_equal(positions[faces - 1], mesh.positions[mesh.indices])
+
+    # Every face still only uses vertices of its own feature
+    face_rows = np.repeat(np.arange(len(ranges)), ranges[:, 3] - ranges[:, 2])
+    assert ((faces - 1 >= ranges[face_rows, :1]) & (faces - 1 < ranges[face_rows, 1:2])).all()
+
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'plain.obj'))
+    shp2obj(SAMPLE_SHP, str(tmp_path / 'welded.obj'), weld=1e-3)
+    plain = read_triangles(tmp_path / 'plain.obj')
+    welded = read_triangles(tmp_path / 'welded.obj')
+    assert np.isclose(mesh_area(welded), mesh_area(plain))
@@ -0,0 +1,69 @@
+"""
+Test module for triangle winding.
+This module extrudes rings given in either direction and the sample input and checks that every face is wound outwards, and that flipped faces are reported.
+"""
+
+import numpy as np
+from conftest import SAMPLE_SHP
+from ingest import make_footprints, footprint_center
+from mesh import Mesh
+from shp2obj import build_mesh
+from winding import check_winding, orient_triangles, signed_area
+
+def enclosed_volume(positions, faces):
+    """
+    Calculate the volume enclosed by a closed mesh from its signed tetrahedra.
+
+    Args:
+        positions (list): Vertex positions
+        faces (list): 1-based faces
+
+    Returns:
+        float: Volume, negative when the faces point inwards
+    """
+    a, b, c = (np.asarray(positions, dtype=np.float64)[np.asarray(faces)[:, k] - 1] for k in range(3))
+    return float(np.einsum('ij,ij->i', a, np.cross(b, c)).sum() / 6)
+
+def test_caps_face_up():
+    square = np.array([(0, 0), (0, 1), (1, 1), (1, 0)], dtype=np.float64)
+    assert abs(signed_area(square)) == 1 and signed_area(square[::-1]) == -signed_area(square)
+
+    # Triangles in either direction all end up counter-clockwise seen from above
+    rng = np.random.default_rng(0)
+    points = rng.random((30, 2))
+    triangles = orient_triangles(points, rng.integers(0, 30, (100, 3)))
+    areas = [signed_area(points[triangle]) for triangle in triangles]
+    assert all(area >= 0 for area in areas)
+
+def test_ring_direction_does_not_matter():
+    # A courtyard building, once with a counter-clockwise and once with a clockwise outer ring and hole
+    outer = [(0, 0), (4e-4, 0), (4e-4, 4e-4), (0, 4e-4), (0, 0)]
+    hole = [(1e-4, 1e-4), (1e-4, 3e-4), (3e-4, 3e-4), (3e-4, 1e-4), (1e-4, 1e-4)]
+    rings = [outer, hole, outer[::-1], hole[::-1]]
+    footprints = make_footprints(np.array([p for ring in rings for p in ring]) + (116, 40), np.arange(5) * 5,
+                                 np.array([0, 2, 4]), np.array([0, 1]))
+    center = footprint_center(footprints)
+
+    volumes = []
+    for index in range(2):
+        positions, faces, ranges = build_mesh(footprints, center, 3, [index])
+        winding = check_winding(positions, faces, ranges)
+        assert len(winding['inconsistent_faces']) == 0 and len(winding['inward_features']) == 0
+        volumes.append(enclosed_volume(positions, faces))
+    assert volumes[0] > 0 and np.isclose(volumes[0], volumes[1])
+
+def test_sample_is_wound_outwards_and_flips_are_reported():
+    mesh = Mesh.build(SAMPLE_SHP)
+    faces = mesh.indices + 1
+    winding = check_winding(mesh.positions, faces, mesh.ranges)
+    assert len(winding['inconsistent_faces']) == 0 and len(winding['inward_features']) == 0
+
+    # One reversed face clashes with its neighbours; a fully reversed feature faces inwards
+    flipped = faces.copy()
+    flipped[mesh.ranges[0, 2]] = flipped[mesh.ranges[0, 2], ::-1]
+    start, end = mesh.ranges[1, 2:]
+    flipped[start:end] = flipped[start:end, ::-1]
+    winding = check_winding(mesh.positions, flipped, mesh.ranges)
+    assert mesh.ranges[0, 2] in winding['inconsistent_faces']
+    assert not np.isin(winding['inconsistent_faces'], np.arange(start, end)).any()
+    assert winding['inward_features'].tolist() == [1]
@@ -0,0 +1,166 @@
+"""
+Static 3D Tiles export of extruded buildings.
+This module splits footprints into XYZ tiles by ownership, extrudes every tile into GLB, hands each tile to a local directory or an object storage uploader as soon as it is finished and describes all tiles in a tileset.json.
+"""
+
+import argparse
+import json
+import math
+import time
+import numpy as np
+import shapely
+from serve import load_index, extrude_glb
+from instance import WGS84_A, WGS84_E2
+from outputs import OutputWriter, etag
+
+# Default zoom level of the exported tiles
+TILE_ZOOM = 16
+
+# Earth circumference at the equator in meters, for the size of a tile
+EQUATOR_LENGTH = 2 * math.pi * WGS84_A
+
+def owned_tiles(index, zoom):
+    """
+    Group footprints by the XYZ tile that owns their representative point.
+
+    Uses the same ownership rule as the ``/tiles`` endpoint of ``serve``, so
+    every building is exported in exactly one tile.
+
+    Args:
+        index (dict): Spatial index from ``serve.load_index``
+        zoom (int): Zoom level
+
+    Returns:
+        list: (x, y, polygon indices) per non-empty tile
+    """
+    points = index['points']
+    if len(points) == 0:
+        return []
+    n = 2 ** zoom
+    x = np.floor((points[:, 0] + 180) / 360 * n).astype(np.int64)
+    latitude = np.radians(points[:, 1])
+    y = np.floor((1 - np.arcsinh(np.tan(latitude)) / math.pi) / 2 * n).astype(np.int64)
+    x, y = np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+    tiles, inverse = np.unique(np.column_stack([x, y]), axis=0, return_inverse=True)
+    order = np.argsort(inverse.reshape(-1), kind='stable')
+    splits = np.cumsum(np.bincount(inverse.reshape(-1), minlength=len(tiles)))[:-1]
+    return [(int(tx), int(ty), members) for (tx, ty), members in zip(tiles, np.split(order, splits))]
+
+def tileset_transform(center, height=0.0):
+    """
+    Calculate the 3D Tiles transform placing the model frame at the center on the globe.
+
+    Clients turn the Y-up glTF content into Z-up, which makes the model frame
+    [north, -east, up]; this matrix maps that frame onto the local east-north-up
+    frame of the center in Earth-centered, Earth-fixed coordinates.
+
+    Args:
+        center (numpy.ndarray): Global center (longitude, latitude) in degrees
+        height (float): Ellipsoid height of the model origin in meters (default: 0)
+
+    Returns:
+        list: Column-major 4x4 matrix with 16 values
+    """
+    longitude, latitude = np.radians(center[0]), np.radians(center[1])
+    east = np.array([-np.sin(longitude), np.cos(longitude), 0.0])
+    north = np.array([-np.sin(latitude) * np.cos(longitude), -np.sin(latitude) * np.sin(longitude), np.cos(latitude)])
+    up = np.array([np.cos(latitude) * np.cos(longitude), np.cos(latitude) * np.sin(longitude), np.sin(latitude)])
+
+    prime_vertical = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(latitude) ** 2)
+    origin = np.array([(prime_vertical + height) * np.cos(latitude) * np.cos(longitude),
+                       (prime_vertical + height) * np.cos(latitude) * np.sin(longitude),
+                       (prime_vertical * (1 - WGS84_E2) + height) * np.sin(latitude)])
+
+    columns = [np.append(north, 0), np.append(-east, 0), np.append(up, 0), np.append(origin, 1)]
+    return np.concatenate(columns).tolist()
+
+def tile_region(index, indices, building_height):
+    """
+    Calculate the 3D Tiles bounding region of a set of footprints.
+
+    Args:
+        index (dict): Spatial index from ``serve.load_index``
+        indices (numpy.ndarray): Polygon indices
+        building_height (float): Default building height in meters
+
+    Returns:
+        list: [west, south, east, north] in radians followed by the lowest and highest height in meters
+    """
+    bounds = shapely.bounds(index['tree'].geometries[indices])
+    heights = index['footprints']['heights']
+    base = heights[indices] if heights is not None else np.zeros(len(indices))
+    return np.radians([bounds[:, 0].min(), bounds[:, 1].min(), bounds[:, 2].max(), bounds[:, 3].max()]).tolist() \
+        + [float(base.min()), float(base.max() + building_height)]
+
+def export_tiles(shp_path, out, zoom=TILE_ZOOM, field=None, building_height=3, force=False):
+    """
+    Export footprints as GLB tiles with a 3D Tiles tileset.
+
+    Tiles are written to ``tiles/{z}/{x}/{y}.glb`` below ``out``, followed by
+    ``tileset.json``. When ``out`` is an object storage URL (see
+    ``upload.Uploader``), every tile is queued for upload as soon as it is
+    extruded and nothing is written to local disk. Tiles whose content hash
+    matches ``tileset.manifest.json`` of the previous export are neither
+    rewritten nor uploaded, and every tile's hash is published as the
+    ``etag`` in the extras of its content.
+
+    Args:
+        shp_path (str): Path to the input footprints
+        out (str): Output directory or 'http(s)://host/bucket[/prefix]' URL
+        zoom (int): Zoom level of the tiles (default: 16)
+        field (str, optional): Field name containing building height data
+        building_height (float): Default building height in meters (default: 3)
+        force (bool): Whether to write every tile regardless of the manifest (default: False)
+
+    Returns:
+        dict: The tileset
+    """
+    start_time = time.perf_counter()
+    index = load_index(shp_path, field)
+
+    with OutputWriter(out, 'tileset.manifest.json', force) as writer:
+        children = []
+        for x, y, indices in owned_tiles(index, zoom):
+            name = f'tiles/{zoom}/{x}/{y}.glb'
+            digest = writer.put(name, extrude_glb(index, indices, building_height))
+            children.append({
+                'boundingVolume': {'region': tile_region(index, indices, building_height)},
+                'geometricError': 0,
+                'content': {'uri': name, 'extras': {'etag': etag(digest)}},
+            })
+
+        # The root has no content of its own; it refines into the tiles once a
+        # tile's width would cover enough pixels
+        regions = np.array([child['boundingVolume']['region'] for child in children]).reshape(-1, 6)
+        tile_size = EQUATOR_LENGTH / 2 ** zoom * math.cos(math.radians(index['center'][1]))
+        tileset = {
+            'asset': {'version': '1.1', 'generator': 'shp-transform-obj'},
+            'geometricError': tile_size,
+            'root': {
+                'transform': tileset_transform(index['center']),
+                'boundingVolume': {'region': np.concatenate([regions[:, :2].min(axis=0), regions[:, 2:4].max(axis=0),
+                                                             [regions[:, 4].min(), regions[:, 5].max()]]).tolist()},
+                'geometricError': tile_size,
+                'refine': 'ADD',
+                'children': children,
+            },
+        }
+        writer.put('tileset.json', json.dumps(tileset).encode('utf-8'))
+
+    print(f"Tiles: {len(children)} tiles at zoom {zoom} with {len(index['footprints']['feature_ids'])} buildings "
+          f"in {time.perf_counter() - start_time:.2f} s")
+    writer.report()
+    return tileset
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export building footprints as GLB tiles with a 3D Tiles tileset')
+    parser.add_argument('shp_path', help='Input Shapefile, GeoParquet, FlatGeobuf or zipped Shapefile')
+    parser.add_argument('out', help='Output directory or http(s)://host/bucket[/prefix] URL')
+    parser.add_argument('--zoom', type=int, default=TILE_ZOOM, help='Zoom level of the tiles')
+    parser.add_argument('--field', default=None, help='Field name containing building height data')
+    parser.add_argument('--height', type=float, default=3, help='Default building height in meters')
+    parser.add_argument('--force', action='store_true', help='Rewrite tiles even when their content is unchanged')
+    args = parser.parse_args()
+
+    export_tiles(args.shp_path, args.out, args.zoom, args.field, args.height, args.force)
@@ -0,0 +1,503 @@
+"""
+Concurrent uploader for S3-compatible object storage.
+This module sends conversion outputs from memory to an S3-compatible endpoint (AWS S3, MinIO) through a pool of keep-alive connections, with multipart uploads for large objects, retries with exponential backoff and a throughput report.
+"""
+
+import argparse
+import datetime
+import hashlib
+import hmac
+import http.client
+import os
+import random
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, quote
+
+# Number of requests in flight at once
+UPLOAD_WORKERS = 8
+
+# Objects larger than one part are uploaded in parts (S3 requires at least 5 MiB per part but the last)
+PART_SIZE = 8 * 1024 * 1024
+
+# Failed requests are retried this often, waiting BACKOFF * 2^attempt seconds (with jitter) in between
+MAX_RETRIES = 4
+BACKOFF = 0.5
+
+# Responses worth retrying: throttling and server-side errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+CONTENT_TYPES = {
+    '.obj': 'model/obj',
+    '.glb': 'model/gltf-binary',
+    '.json': 'application/json',
+    '.txt': 'text/plain',
+}
+
+class UploadError(Exception):
+    """
+    Raised when an object cannot be uploaded after all retries.
+    """
+
+def is_upload_target(target):
+    """
+    Check whether an output location is an object storage URL rather than a local path.
+
+    Args:
+        target (str): Output location
+
+    Returns:
+        bool: True for http:// and https:// URLs
+    """
+    return urlsplit(str(target)).scheme in ('http', 'https')
+
+def parse_target(url):
+    """
+    Split a path-style object storage URL into endpoint, bucket and key prefix.
+
+    Args:
+        url (str): URL like 'http://localhost:9000/bucket/prefix'
+
+    Returns:
+        tuple: (scheme, host, bucket, prefix without slashes)
+    """
+    parts = urlsplit(url)
+    path = parts.path.strip('/')
+    if parts.scheme not in ('http', 'https') or not path:
+        raise ValueError(f'Invalid upload target "{url}", expected http(s)://host/bucket[/prefix]')
+    bucket, _, prefix = path.partition('/')
+    return parts.scheme, parts.netloc, bucket, prefix.strip('/')
+
+def sign_request(method, host, path, query, headers, payload_hash, access_key, secret_key, region, now=None):
+    """
+    Sign a request with AWS Signature Version 4.
+
+    Args:
+        method (str): HTTP method
+        host (str): Host header value (with port, if any)
+        path (str): URI-encoded request path
+        query (dict): Query parameters
+        headers (dict): Headers to sign besides host and the x-amz headers
+        payload_hash (str): Hex SHA-256 of the request body
+        access_key (str): Access key ID
+        secret_key (str): Secret access key
+        region (str): Signing region
+        now (datetime.datetime, optional): Signing time (default: now, UTC)
+
+    Returns:
+        dict: Headers to send, including Authorization
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    date = amz_date[:8]
+
+    headers = dict(headers, host=host)
+    headers['x-amz-date'] = amz_date
+    headers['x-amz-content-sha256'] = payload_hash
+    signed = {key.lower(): str(value).strip() for key, value in headers.items()}
+    names = sorted(signed)
+
+    canonical_query = '&'.join(f"{quote(key, safe='-_.~')}={quote(str(value), safe='-_.~')}"
+                               for key, value in sorted(query.items()))
+    canonical_request = '\n'.join([
+        method, path, canonical_query,
+        ''.join(f'{name}:{signed[name]}\n' for name in names),
+        ';'.join(names), payload_hash,
+    ])
+
+    scope = f'{date}/{region}/s3/aws4_request'
+    string_to_sign = '\n'.join(['AWS4-HMAC-SHA256', amz_date, scope,
+                                hashlib.sha256(canonical_request.encode()).hexdigest()])
+    key = f'AWS4{secret_key}'.encode()
+    for part in (date, region, 's3', 'aws4_request'):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    headers['Authorization'] = (f'AWS4-HMAC-SHA256 Credential={access_key}/{scope}, '
+                                f"SignedHeaders={';'.join(names)}, Signature={signature}")
+    del headers['host']
+    return headers
+
+class Uploader:
+    """
+    Pooled, concurrent uploader to one bucket and key prefix of an S3-compatible endpoint.
+
+    Objects are queued with ``upload`` and sent in the background, so callers
+    can keep producing outputs while earlier ones are on the wire. Every
+    worker thread keeps its own keep-alive connection. Objects larger than
+    ``part_size`` (or streamed as blocks) are sent as multipart uploads whose
+    parts go out concurrently while later blocks are still being produced.
+    Credentials default to the AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY and
+    AWS_REGION environment variables.
+    """
+
+    def __init__(self, url, access_key=None, secret_key=None, region=None, workers=UPLOAD_WORKERS,
+                 part_size=PART_SIZE, retries=MAX_RETRIES, backoff=BACKOFF):
+        """
+        Args:
+            url (str): Path-style target URL 'http(s)://host[:port]/bucket[/prefix]'
+            access_key (str, optional): Access key ID
+            secret_key (str, optional): Secret access key
+            region (str, optional): Signing region (default: AWS_REGION or 'us-east-1')
+            workers (int): Number of concurrent requests (default: 8)
+            part_size (int): Multipart part size in bytes (default: 8 MiB)
+            retries (int): Retries of a failed request (default: 4)
+            backoff (float): Base delay between retries in seconds (default: 0.5)
+        """
+        self.scheme, self.host, self.bucket, self.prefix = parse_target(url)
+        self.access_key = access_key or os.environ.get('AWS_ACCESS_KEY_ID', '')
+        self.secret_key = secret_key or os.environ.get('AWS_SECRET_ACCESS_KEY', '')
+        self.region = region or os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION') or 'us-east-1'
+        self.part_size = part_size
+        self.retries = retries
+        self.backoff = backoff
+
+        # Requests run on one pool; multipart uploads are coordinated on another, so a
+        # coordinator waiting for its parts never blocks the requests it waits for
+        self.requests = ThreadPoolExecutor(workers, thread_name_prefix='upload')
+        self.objects = ThreadPoolExecutor(workers, thread_name_prefix='upload-object')
+        self.in_flight = threading.BoundedSemaphore(2 * workers)
+        self.local = threading.local()
+        self.connections = []
+        self.futures = []
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.counters = {'objects': 0, 'bytes': 0, 'requests': 0, 'retries': 0, 'multipart': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close(wait=exc_type is None)
+
+    def key(self, name):
+        """
+        Get the object key of an output name under the prefix.
+
+        Args:
+            name (str): Output name relative to the target, using '/' separators
+
+        Returns:
+            str: Object key
+        """
+        return f'{self.prefix}/{name}' if self.prefix else name
+
+    def upload(self, name, data, content_type=None, commit=None):
+        """
+        Queue an object for upload.
+
+        Args:
+            name (str): Output name relative to the target
+            data (bytes-like or iterable): Object content, or an iterable of
+                                           bytes-like blocks that is streamed
+            content_type (str, optional): Content type (default: from the file extension)
+            commit (callable, optional): Called once a streamed object has been read
+                                         completely; when it returns False the object
+                                         is discarded instead of stored
+
+        Returns:
+            concurrent.futures.Future: Resolves to the object's ETag, or None when discarded
+        """
+        key = self.key(name)
+        content_type = content_type or CONTENT_TYPES.get(os.path.splitext(name)[1], 'application/octet-stream')
+        if isinstance(data, (bytes, bytearray, memoryview)) and len(data) <= self.part_size and commit is None:
+            future = self.requests.submit(self.put_object, key, bytes(data), content_type)
+        else:
+            blocks = [data] if isinstance(data, (bytes, bytearray, memoryview)) else data
+            future = self.objects.submit(self.upload_stream, key, blocks, content_type, commit)
+        with self.lock:
+            self.futures.append(future)
+        return future
+
+    def download(self, name):
+        """
+        Download an object right away, bypassing the upload queue.
+
+        Args:
+            name (str): Output name relative to the target
+
+        Returns:
+            bytes or None: Object content, or None when the object does not exist
+        """
+        status, _, content = self.request('GET', self.key(name), accept=(404,))
+        return content if status < 300 else None
+
+    def put_object(self, key, data, content_type):
+        """
+        Upload an object with a single request.
+
+        Args:
+            key (str): Object key
+            data (bytes): Object content
+            content_type (str): Content type
+
+        Returns:
+            str: ETag of the object
+        """
+        _, headers, _ = self.request('PUT', key, body=data, headers={'content-type': content_type})
+        self.count(objects=1, bytes=len(data))
+        return headers.get('etag', '')
+
+    def upload_stream(self, key, blocks, content_type, commit=None):
+        """
+        Upload blocks as a multipart upload, sending each part as soon as it is full.
+
+        Content that fits into a single part is sent with one request instead.
+
+        Args:
+            key (str): Object key
+            blocks (iterable): Bytes-like blocks
+            content_type (str): Content type
+            commit (callable, optional): Called after the last block; when it returns
+                                         False the upload is aborted instead of completed
+
+        Returns:
+            str or None: ETag of the object, or None when ``commit`` declined it
+        """
+        buffer = bytearray()
+        blocks = iter(blocks)
+        for block in blocks:
+            buffer += memoryview(block).cast('B')
+            if len(buffer) > self.part_size:
+                break
+        else:
+            if commit is not None and not commit():
+                return None
+            return self.put_object(key, bytes(buffer), content_type)
+
+        _, _, body = self.request('POST', key, {'uploads': ''}, headers={'content-type': content_type})
+        upload_id = find_text(body, 'UploadId')
+        parts = []
+        try:
+            # Full parts go out while later blocks are still being produced; the
+            # semaphore bounds the parts held in memory
+            for block in blocks:
+                buffer += memoryview(block).cast('B')
+                while len(buffer) >= self.part_size:
+                    parts.append(self.submit_part(key, upload_id, len(parts) + 1, bytes(buffer[:self.part_size])))
+                    del buffer[:self.part_size]
+            while len(buffer) > self.part_size:
+                parts.append(self.submit_part(key, upload_id, len(parts) + 1, bytes(buffer[:self.part_size])))
+                del buffer[:self.part_size]
+            if buffer or not parts:
+                parts.append(self.submit_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+            etags = [part.result() for part in parts]
+
+            # Declined content keeps the stored object; its parts are dropped
+            if commit is not None and not commit():
+                self.request('DELETE', key, {'uploadId': upload_id})
+                return None
+
+            listing = ''.join(f'<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>'
+                              for number, etag in enumerate(etags, 1))
+            _, _, body = self.request('POST', key, {'uploadId': upload_id},
+                                      f'<CompleteMultipartUpload>{listing}</CompleteMultipartUpload>'.encode())
+        except BaseException:
+            # Parts that never started give their slot back; the upload is aborted so
+            # the storage does not keep its parts
+            for part in parts:
+                if part.cancel():
+                    self.in_flight.release()
+            try:
+                self.request('DELETE', key, {'uploadId': upload_id})
+            except UploadError:
+                pass
+            raise
+        self.count(objects=1, multipart=1)
+        return find_text(body, 'ETag')
+
+    def submit_part(self, key, upload_id, number, data):
+        """
+        Queue one part of a multipart upload.
+
+        Args:
+            key (str): Object key
+            upload_id (str): Multipart upload ID
+            number (int): 1-based part number
+            data (bytes): Part content
+
+        Returns:
+            concurrent.futures.Future: Resolves to the part's ETag
+        """
+        self.in_flight.acquire()
+
+        def send():
+            try:
+                _, headers, _ = self.request('PUT', key, {'partNumber': number, 'uploadId': upload_id}, data)
+                self.count(bytes=len(data))
+                return headers.get('etag', '')
+            finally:
+                self.in_flight.release()
+
+        return self.requests.submit(send)
+
+    def request(self, method, key, query=None, body=b'', headers=None, accept=()):
+        """
+        Send a signed request over this thread's connection, retrying transient failures.
+
+        Args:
+            method (str): HTTP method
+            key (str): Object key
+            query (dict, optional): Query parameters
+            body (bytes): Request body
+            headers (dict, optional): Extra headers
+            accept (tuple): Error statuses returned instead of raised (default: none)
+
+        Returns:
+            tuple: (status, lower-case response headers, response body)
+        """
+        query = query or {}
+        path = '/' + quote(f'{self.bucket}/{key}', safe='/-_.~')
+        target = path + ('?' + '&'.join(f"{k}={quote(str(v), safe='-_.~')}" if v != '' else k
+                                        for k, v in sorted(query.items())) if query else '')
+        payload_hash = hashlib.sha256(body).hexdigest()
+
+        for attempt in range(self.retries + 1):
+            signed = sign_request(method, self.host, path, query, headers or {}, payload_hash,
+                                  self.access_key, self.secret_key, self.region)
+            try:
+                connection = self.connection()
+                connection.request(method, target, body=body, headers=signed)
+                response = connection.getresponse()
+                content = response.read()
+                status = response.status
+                response_headers = {name.lower(): value for name, value in response.getheaders()}
+            except (OSError, http.client.HTTPException) as e:
+                # The connection is broken; the next attempt opens a new one
+                self.reset_connection()
+                status, error = None, e
+            else:
+                self.count(requests=1)
+                if status < 300 or status in accept:
+                    return status, response_headers, content
+                error = f'{status} {content[:200].decode(errors="replace")}'
+                if status not in RETRY_STATUSES:
+                    break
+            if attempt < self.retries:
+                self.count(retries=1)
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+        raise UploadError(f'{method} {key} failed: {error}')
+
+    def connection(self):
+        """
+        Get the keep-alive connection of the calling thread.
+
+        Returns:
+            http.client.HTTPConnection: Connection to the endpoint
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            factory = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            connection = factory(self.host, timeout=60)
+            self.local.connection = connection
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    def reset_connection(self):
+        """
+        Close and forget the calling thread's connection.
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+    def count(self, **counters):
+        """
+        Add to the upload counters.
+
+        Args:
+            **counters: Amounts to add per counter name
+        """
+        with self.lock:
+            for name, value in counters.items():
+                self.counters[name] += value
+
+    def wait(self):
+        """
+        Wait for every queued object and raise the first failure.
+
+        Returns:
+            dict: Upload statistics (see ``stats``)
+        """
+        while True:
+            with self.lock:
+                futures, self.futures = self.futures, []
+            if not futures:
+                return self.stats()
+            for future in futures:
+                future.result()
+
+    def stats(self):
+        """
+        Get the upload statistics.
+
+        Returns:
+            dict: Objects, multipart uploads, bytes, requests, retries, seconds since
+                  the uploader was created and throughput in bytes per second
+        """
+        with self.lock:
+            stats = dict(self.counters)
+        stats['seconds'] = time.perf_counter() - self.start
+        stats['throughput'] = stats['bytes'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+        return stats
+
+    def close(self, wait=True):
+        """
+        Optionally wait for the queued objects, then stop the pools and close all connections.
+
+        Args:
+            wait (bool): Whether to wait for queued objects and raise their failures (default: True)
+        """
+        try:
+            if wait:
+                self.wait()
+        finally:
+            self.objects.shutdown(wait=wait, cancel_futures=not wait)
+            self.requests.shutdown(wait=wait, cancel_futures=not wait)
+            for connection in self.connections:
+                connection.close()
+
+def find_text(body, tag):
+    """
+    Find the text of the first element with a tag in an S3 XML response.
+
+    Args:
+        body (bytes): XML response body
+        tag (str): Element tag without namespace
+
+    Returns:
+        str: Element text
+    """
+    for element in ElementTree.fromstring(body).iter():
+        if element.tag.rsplit('}', 1)[-1] == tag:
+            return element.text or ''
+    raise UploadError(f'No {tag} in response: {body[:200]!r}')
+
+def print_upload_report(stats):
+    """
+    Print the upload statistics.
+
+    Args:
+        stats (dict): Statistics from ``Uploader.stats``
+    """
+    print(f"Upload: {stats['objects']} objects ({stats['multipart']} multipart), "
+          f"{stats['bytes'] / 1024 / 1024:.1f} MiB in {stats['seconds']:.2f} s "
+          f"({stats['throughput'] / 1024 / 1024:.1f} MiB/s, {stats['retries']} retries)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Upload files to S3-compatible object storage')
+    parser.add_argument('url', help='Target URL http(s)://host[:port]/bucket[/prefix]')
+    parser.add_argument('paths', nargs='+', help='Files to upload under their file names')
+    parser.add_argument('--workers', type=int, default=UPLOAD_WORKERS)
+    parser.add_argument('--part-mb', type=float, default=PART_SIZE / 1024 / 1024, help='Multipart part size in MiB')
+    args = parser.parse_args()
+
+    with Uploader(args.url, workers=args.workers, part_size=int(args.part_mb * 1024 * 1024)) as uploader:
+        for path in args.paths:
+            with open(path, 'rb') as f:
+                uploader.upload(os.path.basename(path), f.read())
+    print_upload_report(uploader.stats())
@@ -0,0 +1,152 @@
+"""
+Vertex welding for extruded building meshes.
+This module merges vertices closer than a tolerance with a hashed spatial grid over the position array and remaps the faces onto the merged vertices.
+"""
+
+import numpy as np
+from glb import concatenate_ranges
+
+# Large primes of the spatial hash (Teschner et al.) for cell x, y, z and the group
+HASH_PRIMES = np.array([73856093, 19349663, 83492791, 2654435761], dtype=np.uint64)
+
+# Half of the 26 neighbour cells plus the cell itself; every adjacent pair of cells is visited once
+HALF_NEIGHBOURS = np.array([(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                            if (dx, dy, dz) >= (0, 0, 0)], dtype=np.int64)
+
+def weld_vertices(positions, indices, tolerance=1e-3, groups=None):
+    """
+    Merge vertices closer than a tolerance and remap the faces.
+
+    Vertices are hashed into grid cells of the tolerance size. Candidate pairs
+    come from each cell and its neighbours, are confirmed by their distance and
+    joined into connected components; each component keeps the position of its
+    first vertex. Vertices of different groups are never merged. Faces that
+    collapse to fewer than three distinct vertices are dropped.
+
+    Args:
+        positions (numpy.ndarray): Vertex positions with shape (N, 3)
+        indices (numpy.ndarray): 0-based triangle vertex indices with shape (M, 3)
+        tolerance (float): Merge distance in position units (default: 1e-3, i.e. 1 mm)
+        groups (numpy.ndarray, optional): Group of every vertex, e.g. its feature row
+
+    Returns:
+        tuple: (welded positions, remapped indices, old-to-new vertex map,
+               boolean mask of the kept faces)
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    num_vertices = len(positions)
+    if num_vertices == 0:
+        return positions, indices, np.arange(0), np.ones(len(indices), dtype=bool)
+
+    # Hash every vertex's grid cell (and group) into one 64-bit key
+    cells = np.floor(positions / tolerance).astype(np.int64)
+    group_keys = np.zeros(num_vertices, dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+    keys = grid_hash(cells, group_keys)
+    order = np.argsort(keys, kind='stable')
+    bucket_keys, bucket_starts, bucket_counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    # Collect the pairs of close vertices in neighbouring cells
+    pairs_a, pairs_b = [], []
+    for offset in HALF_NEIGHBOURS:
+        neighbour_keys = grid_hash(cells + offset, group_keys)
+        slot = np.minimum(np.searchsorted(bucket_keys, neighbour_keys), len(bucket_keys) - 1)
+        found = np.flatnonzero(bucket_keys[slot] == neighbour_keys)
+        counts = bucket_counts[slot[found]]
+        a = np.repeat(found, counts)
+        b = order[concatenate_ranges(bucket_starts[slot[found]], counts)]
+
+        # Hash collisions and distant vertices fail the exact tests
+        close = (a < b) if not offset.any() else (a != b)
+        close &= group_keys[a] == group_keys[b]
+        close &= np.einsum('ij,ij->i', positions[a] - positions[b], positions[a] - positions[b]) <= tolerance ** 2
+        pairs_a.append(a[close])
+        pairs_b.append(b[close])
+
+    labels = connected_components(num_vertices, np.concatenate(pairs_a), np.concatenate(pairs_b))
+
+    # Every component is represented by its first vertex, in the original order
+    representative = labels == np.arange(num_vertices)
+    new_index = np.cumsum(representative) - 1
+    remap = new_index[labels]
+
+    faces = remap[indices]
+    kept = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])
+    return positions[representative], faces[kept], remap, kept
+
+def grid_hash(cells, groups):
+    """
+    Hash integer grid cells and groups into 64-bit keys.
+
+    Args:
+        cells (numpy.ndarray): Integer cell coordinates with shape (N, 3)
+        groups (numpy.ndarray): Group of every cell
+
+    Returns:
+        numpy.ndarray: Hash key of every cell (unsigned 64-bit, wrapping)
+    """
+    cells = cells.astype(np.uint64)
+    return (cells[:, 0] * HASH_PRIMES[0]) ^ (cells[:, 1] * HASH_PRIMES[1]) \
+        ^ (cells[:, 2] * HASH_PRIMES[2]) ^ (groups.astype(np.uint64) * HASH_PRIMES[3])
+
+def connected_components(count, a, b):
+    """
+    Label the connected components of a graph given as an edge list.
+
+    Labels propagate along the edges as minimums, with pointer jumping after
+    every round, until no label changes.
+
+    Args:
+        count (int): Number of nodes
+        a (numpy.ndarray): First node of every edge
+        b (numpy.ndarray): Second node of every edge
+
+    Returns:
+        numpy.ndarray: Smallest node index of the component of every node
+    """
+    labels = np.arange(count)
+    while len(a) > 0:
+        lowest = np.minimum(labels[a], labels[b])
+        previous = labels.copy()
+        np.minimum.at(labels, a, lowest)
+        np.minimum.at(labels, b, lowest)
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+    return labels
+
+def weld_mesh(positions, faces, ranges, tolerance=1e-3, keep_features=True):
+    """
+    Weld an extruded mesh and update its per-feature ranges.
+
+    Args:
+        positions (list): Vertex positions from ``build_mesh``
+        faces (list): 1-based faces from ``build_mesh``
+        ranges (numpy.ndarray): Per-feature [vertex_start, vertex_end, face_start, face_end] rows
+        tolerance (float): Merge distance in meters (default: 1e-3)
+        keep_features (bool): Never merge vertices of different features, so that the
+                              ranges and feature IDs stay valid (default: True)
+
+    Returns:
+        tuple: (positions, 1-based faces, ranges) of the welded mesh; without
+               ``keep_features`` the ranges are a single row covering everything
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 4)
+    vertex_features = np.repeat(np.arange(len(ranges)), ranges[:, 1] - ranges[:, 0])
+    face_features = np.repeat(np.arange(len(ranges)), ranges[:, 3] - ranges[:, 2])
+
+    welded, indices, remap, kept = weld_vertices(positions, np.asarray(faces, dtype=np.int64) - 1, tolerance,
+                                                 vertex_features if keep_features else None)
+    if not keep_features:
+        return welded, indices + 1, np.array([[0, len(welded), 0, len(indices)]])
+
+    # Representatives keep the original vertex order, so features stay contiguous
+    representatives = np.unique(remap, return_index=True)[1]
+    vertex_ends = np.cumsum(np.bincount(vertex_features[representatives], minlength=len(ranges)))
+    face_ends = np.cumsum(np.bincount(face_features[kept], minlength=len(ranges)))
+    welded_ranges = np.column_stack([
+        np.concatenate([[0], vertex_ends[:-1]]), vertex_ends,
+        np.concatenate([[0], face_ends[:-1]]), face_ends,
+    ])
+    return welded, indices + 1, welded_ranges
@@ -0,0 +1,87 @@
+"""
+Triangle winding helpers for extruded building meshes.
+This module orients caps and rings so that every face is counter-clockwise seen from outside, and validates the winding of a finished mesh.
+"""
+
+import numpy as np
+
+def signed_area(points):
+    """
+    Calculate the signed area of a ring in local [x, z] coordinates.
+
+    The area is positive when the ring runs counter-clockwise seen from above
+    (+Y), i.e. when ``positions`` built as [x, height, z] face upwards.
+
+    Args:
+        points (numpy.ndarray): Ring vertices with shape (N, 2), not closed
+
+    Returns:
+        float: Signed area in square meters
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    following = np.roll(points, -1, axis=0)
+    return float((points[:, 1] * following[:, 0] - points[:, 0] * following[:, 1]).sum() / 2)
+
+def orient_triangles(points, triangles):
+    """
+    Reorder cap triangles to run counter-clockwise seen from above.
+
+    Args:
+        points (numpy.ndarray): Triangulation vertices in local [x, z] coordinates with shape (N, 2)
+        triangles (numpy.ndarray): 0-based triangle vertex indices with shape (M, 3)
+
+    Returns:
+        numpy.ndarray: Triangles facing +Y; flip the columns for the bottom cap
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    u = points[triangles[:, 1]] - points[triangles[:, 0]]
+    v = points[triangles[:, 2]] - points[triangles[:, 0]]
+    clockwise = u[:, 1] * v[:, 0] - u[:, 0] * v[:, 1] < 0
+    triangles = triangles.copy()
+    triangles[clockwise] = triangles[clockwise][:, ::-1]
+    return triangles
+
+def check_winding(positions, faces, ranges=None):
+    """
+    Report faces whose winding disagrees with the rest of the mesh.
+
+    Two faces sharing an edge are consistently wound when they traverse it in
+    opposite directions, so every directed edge used by more than one face
+    marks those faces as inconsistent. A feature whose signed volume, taken
+    from its first (bottom) vertex, is negative faces inward as a whole; the
+    bottom plane adds no volume, so features without bottom caps are still
+    measured correctly.
+
+    Args:
+        positions (list): Vertex positions
+        faces (list): 1-based faces
+        ranges (numpy.ndarray, optional): Per-feature [vertex_start, vertex_end,
+                                          face_start, face_end] rows (default: one feature)
+
+    Returns:
+        dict: 'inconsistent_faces' (face indices), 'inward_features' (range rows)
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    indices = np.asarray(faces, dtype=np.int64).reshape(-1, 3) - 1
+    if ranges is None:
+        ranges = np.array([[0, len(positions), 0, len(indices)]])
+    ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 4)
+
+    # Directed edges used more than once belong to faces wound the wrong way
+    edges = indices[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    keys = edges[:, 0] * max(len(positions), 1) + edges[:, 1]
+    unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    repeated = (counts[inverse] > 1).reshape(-1, 3).any(axis=1)
+
+    # Signed volume of every feature relative to its first vertex
+    face_features = np.repeat(np.arange(len(ranges)), ranges[:, 3] - ranges[:, 2])
+    origin = positions[np.minimum(ranges[:, 0], max(len(positions) - 1, 0))][face_features] \
+        if len(positions) else np.zeros((0, 3))
+    a, b, c = (positions[indices[:, k]] - origin for k in range(3))
+    volumes = np.bincount(face_features, np.einsum('ij,ij->i', a, np.cross(b, c)) / 6, minlength=len(ranges))
+
+    return {
+        'inconsistent_faces': np.flatnonzero(repeated),
+        'inward_features': np.flatnonzero(volumes < 0),
+    }